@@ -0,0 +1,79 @@
+"""Import-time budget report for the serverless handlers
+
+    python api/_budget.py [--budget-ms 150]
+
+Imports each handler in a fresh interpreter with ``-X importtime`` (the same
+work a cold start does before the first request) and prints the total and the
+heaviest top-level imports. Exits non-zero if a handler is over budget or
+pulls in a module that should only load on demand.
+"""
+
+import os
+import re
+import sys
+import argparse
+import subprocess
+from typing import Dict, List, Tuple
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+HANDLERS = ('llm_service', 'pptx_analyzer', 'pptx_generator')
+
+# Heavy libraries that must not be imported just by loading a handler
+DEFERRED_MODULES = ('pptx', 'PIL', 'numpy', 'lxml', 'openai', 'anthropic',
+                    'google.generativeai', 'flask')
+
+_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def measure(handler: str) -> Tuple[float, List[Tuple[float, str]], List[str]]:
+    """Return (total ms, [(ms, top-level module)], deferred modules loaded eagerly)"""
+
+    code = f"import {handler}"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=API_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{handler} failed to import:\n{result.stderr[-2000:]}")
+
+    top_level: List[Tuple[float, str]] = []
+    loaded = set()
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        cumulative_us, indent, module = int(match.group(2)), match.group(3), match.group(4)
+        loaded.add(module)
+        # Top-level entries are indented by exactly one space
+        if len(indent) == 1:
+            top_level.append((cumulative_us / 1000.0, module))
+
+    eager = [m for m in DEFERRED_MODULES if m in loaded]
+    total = sum(ms for ms, _ in top_level)
+    return total, sorted(top_level, reverse=True), eager
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--budget-ms', type=float, default=150.0,
+                        help='maximum cold import time per handler')
+    parser.add_argument('--top', type=int, default=5, help='heaviest imports to list')
+    args = parser.parse_args()
+
+    failures: Dict[str, str] = {}
+    for handler in HANDLERS:
+        total, heaviest, eager = measure(handler)
+        status = 'ok' if total <= args.budget_ms and not eager else 'OVER'
+        print(f"{handler:<16} {total:8.1f} ms  [{status}]")
+        for ms, module in heaviest[:args.top]:
+            print(f"    {ms:8.1f} ms  {module}")
+        if total > args.budget_ms:
+            failures[handler] = f"{total:.1f} ms exceeds budget of {args.budget_ms:.0f} ms"
+        if eager:
+            failures[handler] = f"imports {', '.join(eager)} at load time"
+
+    for handler, reason in failures.items():
+        print(f"FAIL {handler}: {reason}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
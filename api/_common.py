@@ -0,0 +1,132 @@
+"""Shared helpers for the serverless handlers in this directory
+
+Files starting with an underscore are not deployed as functions of their own.
+Everything here must stay cheap to import: heavy libraries (python-pptx,
+Pillow, numpy, provider SDKs) are imported inside the handlers that need them.
+"""
+
+import os
+import sys
+import json
+import base64
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+logging.basicConfig(level=logging.INFO)
+
+PPTX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
+# Scratch space that survives between warm invocations of the same instance
+WORK_DIR = os.path.join(os.environ.get('TMPDIR', '/tmp'), 'text-to-pptx')
+MAX_TEMPLATE_BYTES = 50 * 1024 * 1024
+
+
+class WarmCache:
+    """Small LRU kept at module scope so warm invocations can reuse earlier work"""
+
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Any, Any]' = OrderedDict()
+
+    def get(self, key):
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def read_json(request: Dict) -> Dict[str, Any]:
+    """Decode the JSON body of a serverless request event"""
+
+    body = request.get('body') or '{}'
+    if request.get('isBase64Encoded'):
+        body = base64.b64decode(body)
+    if isinstance(body, (bytes, bytearray)):
+        body = body.decode('utf-8')
+    if isinstance(body, str):
+        body = json.loads(body)
+    if not isinstance(body, dict):
+        raise ValueError("Request body must be a JSON object")
+    return body
+
+
+def json_response(payload: Dict[str, Any], status: int = 200) -> Dict[str, Any]:
+    return {
+        "statusCode": status,
+        "headers": {"Content-Type": "application/json"},
+        "body": json.dumps(payload, default=str)
+    }
+
+
+def error_response(message: str, status: int) -> Dict[str, Any]:
+    return json_response({"error": message}, status)
+
+
+def file_response(data: bytes, mimetype: str, filename: Optional[str] = None,
+                  headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    response_headers = {"Content-Type": mimetype}
+    if filename:
+        response_headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response_headers.update(headers or {})
+    return {
+        "statusCode": 200,
+        "headers": response_headers,
+        "body": base64.b64encode(data).decode('ascii'),
+        "isBase64Encoded": True
+    }
+
+
+def decode_template(payload: Dict[str, Any]) -> bytes:
+    """Template bytes from a request's base64 'template' field"""
+
+    encoded = payload.get('template')
+    if not encoded:
+        raise ValueError("No template file provided")
+    try:
+        return base64.b64decode(encoded, validate=True)
+    except (ValueError, TypeError):
+        raise ValueError("Template must be base64 encoded")
+
+
+def store_template(data: bytes) -> str:
+    """Save template bytes under their content hash and validate the package once
+
+    Returns the content hash; the file lives at template_path(hash).
+    """
+
+    from services.upload_validator import UploadRejected, validate_package
+
+    if len(data) > MAX_TEMPLATE_BYTES:
+        raise UploadRejected("File too large. Maximum size is 50MB.")
+
+    digest = hashlib.sha256(data).hexdigest()
+    path = template_path(digest)
+    if os.path.exists(path):
+        return digest
+
+    os.makedirs(WORK_DIR, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    try:
+        validate_package(temp_path)
+    except UploadRejected:
+        os.remove(temp_path)
+        raise
+    os.replace(temp_path, path)
+    return digest
+
+
+def template_path(digest: str) -> str:
+    return os.path.join(WORK_DIR, f"{digest}.pptx")
@@ -1,12 +1,86 @@
+import os
 import sys
-sys.path.append('backend/services')
-from llm_service import main_function  # Adjust to your actual function name
+import hashlib
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _common import WarmCache, read_json, json_response, error_response  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+# LLM clients are reused across warm invocations; keyed by provider and key digest
+_services = WarmCache(max_entries=8)
+
+
+def _get_service(provider: str, api_key: str):
+    # The provider SDK is imported when the service is first built, not here
+    from services.llm_service import LLMService
+
+    key = (provider, hashlib.sha256(api_key.encode('utf-8')).hexdigest())
+    service = _services.get(key)
+    if service is None:
+        service = LLMService(provider, api_key)
+        _services.put(key, service)
+    service.usage.reset()
+    return service
+
 
 def handler(request):
-    # Vercel passes request as a dict
-    # You may need to parse request['body'] or request['queryStringParameters']
-    result = main_function(request)
-    return {
-        "statusCode": 200,
-        "body": result
-    }
+    """Analyze text into slides ("analyze") or write speaker notes ("notes")"""
+
+    try:
+        data = read_json(request)
+    except ValueError as e:
+        return error_response(f"Invalid request body: {e}", 400)
+
+    action = data.get('action', 'analyze')
+    provider = data.get('provider', 'openai')
+    api_key = data.get('apiKey', '')
+    guidance = data.get('guidance', '')
+
+    if not api_key and provider != 'local':
+        return error_response("API key is required", 400)
+
+    try:
+        if action == 'analyze':
+            text = data.get('text')
+            if not text:
+                return error_response("No text provided", 400)
+            if len(text) > 50000:
+                return error_response("Text too long. Maximum 50,000 characters.", 400)
+
+            slide_count = data.get('slideCount')
+            if slide_count is not None:
+                try:
+                    slide_count = max(1, min(30, int(slide_count)))
+                except (TypeError, ValueError):
+                    return error_response("slideCount must be a number", 400)
+
+            service = _get_service(provider, api_key)
+            slides = service.analyze_text_for_slides(text, guidance, slide_count)
+            return json_response({
+                "slides": slides.to_list(),
+                "slide_count": len(slides),
+                "token_usage": service.usage.summary()
+            })
+
+        if action == 'notes':
+            slides = data.get('slides')
+            if not isinstance(slides, list):
+                return error_response("No slides provided", 400)
+
+            service = _get_service(provider, api_key)
+            slides = service.generate_speaker_notes(slides, guidance)
+            return json_response({
+                "notes_generated": True,
+                "slides": slides.to_list(),
+                "token_usage": service.usage.summary()
+            })
+
+        return error_response(f"Unknown action: {action}", 400)
+
+    except ValueError as e:
+        return error_response(str(e), 400)
+    except Exception as e:
+        logger.error(f"Error in llm_service handler: {e}")
+        return error_response(f"Text analysis failed: {str(e)}", 500)
@@ -1,10 +1,48 @@
+import os
 import sys
-sys.path.append('backend/services')
-from pptx_analyzer import analyze_pptx  # Adjust to your actual function name
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _common import (WarmCache, read_json, json_response, error_response,  # noqa: E402
+                     decode_template, store_template, template_path)
+
+logger = logging.getLogger(__name__)
+
+# Template summaries by content hash; re-uploading the same template is free when warm
+_summaries = WarmCache(max_entries=32)
+
 
 def handler(request):
-    result = analyze_pptx(request)
-    return {
-        "statusCode": 200,
-        "body": result
-    }
+    """Validate and analyze a base64-encoded .pptx/.potx template"""
+
+    # Only the standard library is loaded until a request needs more
+    from services.upload_validator import UploadRejected
+
+    try:
+        template_hash = store_template(decode_template(read_json(request)))
+    except UploadRejected as e:
+        return error_response(str(e), 400)
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    summary = _summaries.get(template_hash)
+    if summary is None:
+        try:
+            # python-pptx and Pillow load here, on the first real analysis
+            from services.pptx_analyzer import PPTXAnalyzer
+
+            template_data = PPTXAnalyzer().analyze_template(template_path(template_hash))
+            summary = {
+                "template_analyzed": True,
+                "template_hash": template_hash,
+                "layouts_found": len(template_data.get('layouts', [])),
+                "images_found": template_data.get('image_count', 0),
+                "theme_colors": len(template_data.get('colors', []))
+            }
+            _summaries.put(template_hash, summary)
+
+        except Exception as e:
+            logger.error(f"Error in pptx_analyzer handler: {e}")
+            return error_response(f"Template analysis failed: {str(e)}", 500)
+
+    return json_response(summary)
@@ -1,10 +1,102 @@
+import os
 import sys
-sys.path.append('backend/services')
-from pptx_generator import generate_pptx  # Adjust to your actual function name
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _common import (PPTX_MIMETYPE, WarmCache, read_json, error_response,  # noqa: E402
+                     file_response, decode_template, store_template, template_path)
+
+logger = logging.getLogger(__name__)
+
+# Lazy template analyses by content hash, the slide part cache behind
+# incremental regeneration and finished decks; all are kept while warm
+_analyses = WarmCache(max_entries=8)
+_slide_cache = None
+_deck_cache = None
+
+
+def _get_slide_cache():
+    global _slide_cache
+    if _slide_cache is None:
+        from services.slide_cache import SlidePartCache
+        _slide_cache = SlidePartCache(max_bytes=64 * 1024 * 1024)
+    return _slide_cache
+
+
+def _get_deck_cache():
+    global _deck_cache
+    if _deck_cache is None:
+        from services.deck_cache import GeneratedDeckCache
+        _deck_cache = GeneratedDeckCache(max_bytes=64 * 1024 * 1024)
+    return _deck_cache
+
 
 def handler(request):
-    result = generate_pptx(request)
-    return {
-        "statusCode": 200,
-        "body": result
-    }
+    """Build a deck from slide data and a base64-encoded template"""
+
+    from services.upload_validator import UploadRejected
+
+    try:
+        data = read_json(request)
+        slides = data.get('slides')
+        if not isinstance(slides, list) or not slides:
+            return error_response("No slides provided", 400)
+        template_hash = store_template(decode_template(data))
+    except UploadRejected as e:
+        return error_response(str(e), 400)
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    # A repeat request is answered before python-pptx is even imported
+    options = data.get('options', {})
+    deck_cache = _get_deck_cache()
+    cache_key = deck_cache.deck_key(template_hash, options, slides)
+    cached = deck_cache.get(cache_key)
+    if cached is not None:
+        try:
+            return file_response(cached.read(), PPTX_MIMETYPE, "generated_presentation.pptx",
+                                 dict(cached.headers, **{'X-Deck-Cache': 'HIT'}))
+        except FileNotFoundError:
+            # Evicted between the lookup and the read; build it again
+            pass
+
+    try:
+        # python-pptx, Pillow and lxml are only paid for on this path
+        from services.pptx_analyzer import PPTXAnalyzer
+        from services.pptx_generator import PPTXGenerator
+
+        path = template_path(template_hash)
+        template_data = _analyses.get(template_hash)
+        if template_data is None:
+            template_data = PPTXAnalyzer().analyze_template(path)
+            _analyses.put(template_hash, template_data)
+
+        generator = PPTXGenerator(slide_cache=_get_slide_cache())
+        output_path = generator.generate_presentation(
+            slides=slides,
+            template_data=template_data,
+            template_path=path,
+            options=options,
+            template_hash=template_hash
+        )
+        headers = {}
+        stats = generator.last_build_stats
+        if stats:
+            headers['X-Slides-Rebuilt'] = str(stats['rebuilt'])
+            headers['X-Slides-Reused'] = str(stats['reused'])
+        report = generator.last_optimization_report
+        if report:
+            headers['X-Deck-Size-Before'] = str(report['before_bytes'])
+            headers['X-Deck-Size-After'] = str(report['after_bytes'])
+
+        deck_cache.put(cache_key, output_path, headers)
+        with open(output_path, 'rb') as f:
+            deck = f.read()
+        os.remove(output_path)
+
+        return file_response(deck, PPTX_MIMETYPE, "generated_presentation.pptx",
+                             dict(headers, **{'X-Deck-Cache': 'MISS'}))
+
+    except Exception as e:
+        logger.error(f"Error in pptx_generator handler: {e}")
+        return error_response(f"Generation failed: {str(e)}", 500)
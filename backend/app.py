@@ -1,23 +1,42 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Request, request, jsonify, send_file, g
 from flask_cors import CORS
 import os
 import tempfile
 import uuid
 from werkzeug.utils import secure_filename
+from werkzeug.middleware.proxy_fix import ProxyFix
 import logging
 from datetime import datetime, timedelta
 import threading
 import time
+import functools
+import inspect
+import json
+from typing import Dict
 
 from services.llm_service import LLMService
 from services.pptx_analyzer import PPTXAnalyzer
-from services.pptx_generator import PPTXGenerator
+from services.pptx_generator import PPTXGenerator, parse_generation_options
+from services.token_accounting import merge_usage
+from services.incremental_analysis import IncrementalAnalyzer, build_section_index, source_excerpt
+from services.upload_validator import UploadRejected, ValidatingSpoolFile, validate_package
+from services.slide_renderer import SlideThumbnailRenderer
+from services.slide_cache import SlidePartCache
+from services.deck_cache import GeneratedDeckCache
+from services.admission import AdmissionController, AdmissionRejected
+from services.template_catalog import TemplateCatalog
+from services.memory_monitor import MemoryMonitor, TempFileTracker, session_store_stats
+from services.pptx_generator import SCRATCH_PREFIX
+from services.slide_model import Deck
+from services.deadline import Deadline, DeadlineExceeded, client_disconnect_probe
+from services.static_assets import StaticAssets
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
+# /static belongs to the React build, served by the frontend route below
+app = Flask(__name__, static_folder=None)
 CORS(app)
 
 # Configuration
@@ -28,28 +47,165 @@ ALLOWED_EXTENSIONS = {'pptx', 'potx'}
 # Store for temporary session data (in production, use Redis or similar)
 session_store = {}
 
+# Thumbnails are cached by content hash, so they are shared across sessions
+thumbnail_renderer = SlideThumbnailRenderer()
+slide_part_cache = SlidePartCache()
+# Finished decks by (slides, template, options), so repeat downloads skip generation
+deck_cache = GeneratedDeckCache()
+
+# Rate limits and global caps on in-flight LLM and build work
+admission = AdmissionController()
+
+# Reverse proxies in front of the app. Limits key on request.remote_addr, so it
+# must be the real client: the last TRUSTED_PROXY_HOPS X-Forwarded-For entries
+# were added by our proxies; anything further left is whatever the client sent.
+# 0 trusts the header not at all
+TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', '0'))
+if TRUSTED_PROXY_HOPS:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS, x_proto=TRUSTED_PROXY_HOPS)
+
+# Approved templates, analyzed and compiled once at startup
+TEMPLATE_CATALOG_DIR = os.environ.get(
+    'TEMPLATE_CATALOG_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates'))
+template_catalog = TemplateCatalog(TEMPLATE_CATALOG_DIR)
+template_catalog.load()
+
+# Per-request memory sampling and what is left behind on disk
+memory_monitor = MemoryMonitor(sample_rate=float(os.environ.get('MEMORY_SAMPLE_RATE', '0.05')))
+temp_tracker = TempFileTracker()
+temp_tracker.track(UPLOAD_FOLDER)
+temp_tracker.track_pattern(os.path.join(tempfile.gettempdir(), SCRATCH_PREFIX + '*'))
+
+# The React build, served precompressed straight from disk
+FRONTEND_BUILD_DIR = os.environ.get(
+    'FRONTEND_BUILD_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'frontend', 'build'))
+static_assets = StaticAssets(FRONTEND_BUILD_DIR)
+static_assets.load()
+
+# The frontend gives up after 60s; clients may ask for less with X-Request-Timeout
+REQUEST_TIMEOUT = float(os.environ.get('REQUEST_TIMEOUT', '60'))
+MAX_REQUEST_TIMEOUT = 600
+
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+
+class UploadRequest(Request):
+    """Request that validates file uploads while they stream in"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if filename and not allowed_file(filename):
+            raise UploadRejected("Invalid file type. Only .pptx and .potx files are allowed")
+        return ValidatingSpoolFile(UPLOAD_FOLDER, filename, app.config['MAX_CONTENT_LENGTH'])
+
+
+app.request_class = UploadRequest
+
+
+def _deck_edited(session_id: str, read: Deck):
+    """The session's deck if it is still the one read before an await, else a 409 response
+
+    Async views wait on providers with the deck read up front; anything that
+    replaced it meanwhile (reanalysis, expiry) must not be overwritten.
+    """
+    session_data = session_store.get(session_id)
+    if session_data is None:
+        return None, (jsonify({"error": "Session expired while the request was running"}), 409)
+    current = Deck.from_raw(session_data.get('slide_data') or [])
+    if len(current) != len(read):
+        return None, (jsonify({"error": "The deck changed while the request was running; retry"}), 409)
+    return current, None
+
+def deck_response(deck, **fields):
+    """JSON response with the deck's cached serialization spliced in as its slides"""
+    body = json.dumps(fields, default=str)
+    body = body[:-1] + (', ' if fields else '') + '"slides": ' + deck.to_json() + '}'
+    return app.response_class(body, mimetype='application/json')
+
+
+def _request_cost_text():
+    data = request.get_json(silent=True) or {}
+    # Long documents mean bigger prompts and longer provider calls
+    return 1.0 + len(data.get('text') or '') / 10000
+
+
+def _request_cost_upload():
+    return 1.0 + (request.content_length or 0) / (5 * 1024 * 1024)
+
+
+def _too_busy(e: AdmissionRejected):
+    response = jsonify({"error": str(e), "retry_after": e.retry_after_header})
+    response.status_code = 429
+    response.headers['Retry-After'] = e.retry_after_header
+    return response
+
+
+def admission_controlled(kind: str, cost=None):
+    """Shed the request with 429 unless its client is within limits and a work slot frees up"""
+
+    def decorator(view):
+        def client():
+            data = request.get_json(silent=True) if request.is_json else None
+            api_key = (data or {}).get('apiKey') or request.headers.get('X-API-Key')
+            return request.remote_addr, api_key, cost() if cost else 1.0
+
+        if inspect.iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def async_wrapper(*args, **kwargs):
+                try:
+                    # Waits for a slot on the event loop, without a thread
+                    async with admission.admit_async(kind, *client()):
+                        return await view(*args, **kwargs)
+                except AdmissionRejected as e:
+                    return _too_busy(e)
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                with admission.admit(kind, *client()):
+                    return view(*args, **kwargs)
+            except AdmissionRejected as e:
+                return _too_busy(e)
+        return wrapper
+
+    return decorator
+
+def generated_path(session_id: str) -> str:
+    return os.path.join(UPLOAD_FOLDER, f"{session_id}_generated.pptx")
+
+def expire_sessions(max_age: timedelta) -> int:
+    """Drop sessions older than max_age along with their files; returns how many"""
+    current_time = datetime.now()
+    expired_sessions = [
+        session_id for session_id, data in list(session_store.items())
+        if current_time - data.get('created', current_time) >= max_age
+    ]
+
+    for session_id in expired_sessions:
+        drop_session(session_id)
+    return len(expired_sessions)
+
+def drop_session(session_id: str):
+    """Forget a session and remove the files that belong to it"""
+    session_data = session_store.pop(session_id, None)
+    if session_data is None:
+        return
+    # Catalog templates are shared; only uploaded ones belong to the session
+    paths = [generated_path(session_id)]
+    if 'template_path' in session_data and 'template_id' not in session_data:
+        paths.append(session_data['template_path'])
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
 def cleanup_old_sessions():
     """Clean up session data older than 1 hour"""
     while True:
         try:
-            current_time = datetime.now()
-            expired_sessions = [
-                session_id for session_id, data in session_store.items()
-                if current_time - data.get('created', current_time) > timedelta(hours=1)
-            ]
-            
-            for session_id in expired_sessions:
-                if session_id in session_store:
-                    # Clean up any temporary files
-                    session_data = session_store[session_id]
-                    if 'template_path' in session_data and os.path.exists(session_data['template_path']):
-                        os.remove(session_data['template_path'])
-                    del session_store[session_id]
-                    
+            expire_sessions(timedelta(hours=1))
             time.sleep(300)  # Run every 5 minutes
         except Exception as e:
             logger.error(f"Error in cleanup: {e}")
@@ -59,12 +215,52 @@ def cleanup_old_sessions():
 cleanup_thread = threading.Thread(target=cleanup_old_sessions, daemon=True)
 cleanup_thread.start()
 
+@app.before_request
+def sample_memory():
+    # Page loads are not API work; keep them out of the samples
+    g.memory_token = memory_monitor.begin() if request.endpoint != 'frontend' else None
+
+@app.teardown_request
+def record_memory(exc=None):
+    memory_monitor.end(request.endpoint, g.pop('memory_token', None))
+
+@app.before_request
+def start_deadline():
+    if request.endpoint == 'frontend':
+        return
+    try:
+        seconds = float(request.headers.get('X-Request-Timeout', REQUEST_TIMEOUT))
+    except ValueError:
+        seconds = REQUEST_TIMEOUT
+    g.deadline = Deadline(max(1.0, min(seconds, MAX_REQUEST_TIMEOUT)),
+                          client_disconnect_probe(request.environ))
+
+def _abandoned(e: DeadlineExceeded):
+    # The client has most likely stopped listening; the status is for logs and proxies
+    logger.info(f"Abandoned {request.endpoint}: {e}")
+    return jsonify({"error": f"Request abandoned: {e}"}), 504
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "healthy", "timestamp": datetime.now().isoformat()})
+    return jsonify({"status": "healthy", "timestamp": datetime.now().isoformat(),
+                    "load": admission.stats(), "deck_cache": deck_cache.stats()})
+
+@app.route('/api/health/memory', methods=['GET'])
+def memory_health():
+    stats = memory_monitor.stats()
+    stats['session_store'] = session_store_stats(session_store)
+    stats['temp_files'] = temp_tracker.stats()
+    stats['caches'] = {
+        'deck_cache': deck_cache.stats(),
+        'slide_part_cache_bytes': slide_part_cache.size_bytes,
+        'thumbnail_cache_bytes': thumbnail_renderer.cache.size_bytes,
+        'template_catalog_bytes': template_catalog.memory_bytes
+    }
+    return jsonify(stats)
 
 @app.route('/api/analyze-text', methods=['POST'])
-def analyze_text():
+@admission_controlled('llm', _request_cost_text)
+async def analyze_text():
     try:
         data = request.get_json()
         
@@ -75,39 +271,91 @@ def analyze_text():
         guidance = data.get('guidance', '')
         provider = data.get('provider', 'openai')
         api_key = data.get('apiKey', '')
+        slide_count = data.get('slideCount')
         
-        if not api_key:
+        if not api_key and provider != 'local':
             return jsonify({"error": "API key is required"}), 400
             
         if len(text) > 50000:  # 50k character limit
             return jsonify({"error": "Text too long. Maximum 50,000 characters."}), 400
+
+        if slide_count is not None:
+            try:
+                slide_count = max(1, min(30, int(slide_count)))
+            except (TypeError, ValueError):
+                return jsonify({"error": "slideCount must be a number"}), 400
         
         # Initialize LLM service
-        llm_service = LLMService(provider, api_key)
+        llm_service = LLMService(provider, api_key, deadline=g.deadline)
+
+        previous_id = data.get('session_id')
+        previous = session_store.get(previous_id) if previous_id else None
+
+        incremental = (previous is not None
+                       and data.get('incremental', True)
+                       and 'slide_data' in previous
+                       and previous.get('guidance', '') == guidance
+                       and previous.get('slide_count') == slide_count)
+
+        if incremental:
+            # Only re-run the sections that changed since the last submission
+            slide_data, section_index, stats = await IncrementalAnalyzer(llm_service).reanalyze_async(
+                previous.get('text', ''),
+                previous['slide_data'],
+                previous.get('section_index'),
+                text,
+                guidance
+            )
+            usage = llm_service.usage.summary()
+            previous.update({
+                'slide_data': slide_data,
+                'section_index': section_index,
+                'text': text,
+                'guidance': guidance,
+                'token_usage': merge_usage(previous.get('token_usage'), usage)
+            })
+            previous.setdefault('token_calls', []).extend(llm_service.usage.calls)
+
+            return deck_response(
+                slide_data,
+                session_id=previous_id,
+                slide_count=len(slide_data),
+                token_usage=usage,
+                incremental=stats
+            )
         
         # Analyze text and generate slide structure
-        slide_data = llm_service.analyze_text_for_slides(text, guidance)
+        slide_data = await llm_service.analyze_text_for_slides_async(text, guidance, slide_count)
+        usage = llm_service.usage.summary()
         
         # Generate session ID for tracking
         session_id = str(uuid.uuid4())
         session_store[session_id] = {
             'created': datetime.now(),
             'slide_data': slide_data,
+            'section_index': build_section_index(text, slide_data),
             'text': text,
-            'guidance': guidance
+            'guidance': guidance,
+            'slide_count': slide_count,
+            'token_usage': usage,
+            'token_calls': list(llm_service.usage.calls)
         }
         
-        return jsonify({
-            "session_id": session_id,
-            "slides": slide_data,
-            "slide_count": len(slide_data)
-        })
+        return deck_response(
+            slide_data,
+            session_id=session_id,
+            slide_count=len(slide_data),
+            token_usage=usage
+        )
         
+    except DeadlineExceeded as e:
+        return _abandoned(e)
     except Exception as e:
         logger.error(f"Error in analyze_text: {e}")
         return jsonify({"error": f"Analysis failed: {str(e)}"}), 500
 
 @app.route('/api/analyze-template', methods=['POST'])
+@admission_controlled('build', _request_cost_upload)
 def analyze_template():
     try:
         if 'template' not in request.files:
@@ -125,70 +373,238 @@ def analyze_template():
         if not allowed_file(file.filename):
             return jsonify({"error": "Invalid file type. Only .pptx and .potx files are allowed"}), 400
         
-        # Save uploaded file
+        # Check the package structure before handing it to python-pptx
         filename = secure_filename(file.filename)
         filepath = os.path.join(UPLOAD_FOLDER, f"{session_id}_{filename}")
-        file.save(filepath)
+        spool = file.stream if isinstance(file.stream, ValidatingSpoolFile) else None
+        if spool:
+            # Already on disk; move it into place instead of copying
+            spool.persist(filepath)
+        else:
+            file.save(filepath)
+        try:
+            package_info = validate_package(filepath, spool)
+        except UploadRejected:
+            os.remove(filepath)
+            raise
         
         # Analyze template
         analyzer = PPTXAnalyzer()
         template_data = analyzer.analyze_template(filepath)
+        summary = template_data.select(['layouts', 'image_count', 'colors'])
+        # The session keeps extracted facets only; the rest reopen template_path when needed
+        template_data.release()
         
         # Store template data and path in session
+        session_store[session_id].pop('template_id', None)
         session_store[session_id].update({
             'template_data': template_data,
-            'template_path': filepath
+            'template_path': filepath,
+            'template_hash': package_info['sha256']
         })
         
         return jsonify({
             "template_analyzed": True,
-            "layouts_found": len(template_data.get('layouts', [])),
-            "images_found": len(template_data.get('images', [])),
-            "theme_colors": len(template_data.get('colors', []))
+            "layouts_found": len(summary.get('layouts', [])),
+            "images_found": summary.get('image_count', 0),
+            "theme_colors": len(summary.get('colors', []))
         })
         
+    except UploadRejected as e:
+        logger.warning(f"Rejected template upload: {e}")
+        return jsonify({"error": str(e)}), 400
+
     except Exception as e:
         logger.error(f"Error in analyze_template: {e}")
         return jsonify({"error": f"Template analysis failed: {str(e)}"}), 500
 
+@app.route('/api/templates', methods=['GET'])
+def list_templates():
+    return jsonify({
+        "templates": template_catalog.list(),
+        "memory_bytes": template_catalog.memory_bytes
+    })
+
+@app.route('/api/select-template', methods=['POST'])
+def select_template():
+    try:
+        data = request.get_json()
+        session_id = data.get('session_id')
+        template_id = data.get('template_id')
+
+        if not session_id or session_id not in session_store:
+            return jsonify({"error": "Invalid session"}), 400
+
+        entry = template_catalog.get(template_id) if template_id else None
+        if entry is None:
+            return jsonify({"error": "Unknown template"}), 404
+
+        _use_catalog_template(session_store[session_id], entry)
+
+        summary = entry.summary()
+        summary["template_analyzed"] = True
+        return jsonify(summary)
+
+    except Exception as e:
+        logger.error(f"Error in select_template: {e}")
+        return jsonify({"error": f"Template selection failed: {str(e)}"}), 500
+
+def _use_catalog_template(session_data, entry):
+    # Uploaded template files from an earlier step are no longer needed
+    previous = session_data.get('template_path')
+    if previous and 'template_id' not in session_data and os.path.exists(previous):
+        os.remove(previous)
+    session_data.update({
+        'template_id': entry.template_id,
+        'template_data': entry.template_data,
+        'template_path': entry.path,
+        'template_hash': entry.template_hash
+    })
+
 @app.route('/api/generate-presentation', methods=['POST'])
+@admission_controlled('build', lambda: 2.0)
 def generate_presentation():
     try:
         data = request.get_json()
         session_id = data.get('session_id')
-        options = data.get('options', {})
+        try:
+            options = parse_generation_options(data.get('options', {}))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
         if not session_id or session_id not in session_store:
             return jsonify({"error": "Invalid session"}), 400
             
         session_data = session_store[session_id]
+
+        if data.get('template_id'):
+            entry = template_catalog.get(data['template_id'])
+            if entry is None:
+                return jsonify({"error": "Unknown template"}), 404
+            _use_catalog_template(session_data, entry)
         
         if 'template_data' not in session_data:
             return jsonify({"error": "Template not analyzed"}), 400
+
+        download_name = f"generated_presentation_{session_id[:8]}.pptx"
+        cache_key = None
+        if session_data.get('template_hash'):
+            cache_key = GeneratedDeckCache.deck_key(
+                session_data['template_hash'], options, session_data['slide_data'])
+            cached = deck_cache.get(cache_key)
+            if cached is not None:
+                try:
+                    return _deck_file_response(cached.path, cached.headers, download_name, cache_status='HIT')
+                except FileNotFoundError:
+                    # Evicted between the lookup and the open; build it again
+                    pass
+
+        entry = template_catalog.get(session_data['template_id']) if 'template_id' in session_data else None
             
         # Generate presentation
-        generator = PPTXGenerator()
+        generator = PPTXGenerator(slide_cache=slide_part_cache)
         output_path = generator.generate_presentation(
             slides=session_data['slide_data'],
             template_data=session_data['template_data'],
             template_path=session_data['template_path'],
-            options=options
+            options=options,
+            template_hash=session_data.get('template_hash'),
+            base_deck=entry.base_deck if entry else None,
+            # One output per session, removed when the session expires
+            output_path=generated_path(session_id),
+            deadline=g.deadline
         )
-        
+
+        headers = {}
+        report = generator.last_optimization_report
+        if report:
+            headers['X-Deck-Size-Before'] = str(report['before_bytes'])
+            headers['X-Deck-Size-After'] = str(report['after_bytes'])
+            session_data['optimization_report'] = report
+
+        stats = generator.last_build_stats
+        if stats:
+            headers['X-Slides-Rebuilt'] = str(stats['rebuilt'])
+            headers['X-Slides-Reused'] = str(stats['reused'])
+
+        if cache_key:
+            deck_cache.put(cache_key, output_path, headers)
+
         # Return the generated file
-        return send_file(
-            output_path,
-            as_attachment=True,
-            download_name=f"generated_presentation_{session_id[:8]}.pptx",
-            mimetype='application/vnd.openxmlformats-officedocument.presentationml.presentation'
-        )
+        return _deck_file_response(output_path, headers, download_name, cache_status='MISS')
         
+    except DeadlineExceeded as e:
+        return _abandoned(e)
     except Exception as e:
         logger.error(f"Error in generate_presentation: {e}")
         return jsonify({"error": f"Generation failed: {str(e)}"}), 500
 
+def _deck_file_response(path: str, headers: Dict[str, str], download_name: str, cache_status: str):
+    # Sent by path so large decks are never read into memory
+    response = send_file(
+        path,
+        as_attachment=True,
+        download_name=download_name,
+        mimetype='application/vnd.openxmlformats-officedocument.presentationml.presentation'
+    )
+    response.headers.update(headers)
+    response.headers['X-Deck-Cache'] = cache_status
+    return response
+
+@app.route('/api/preview', methods=['POST'])
+@admission_controlled('build')
+def preview_presentation():
+    try:
+        data = request.get_json()
+        session_id = data.get('session_id')
+        options = data.get('options', {})
+        fmt = data.get('format', 'png')
+
+        if not session_id or session_id not in session_store:
+            return jsonify({"error": "Invalid session"}), 400
+
+        session_data = session_store[session_id]
+
+        if 'template_data' not in session_data:
+            return jsonify({"error": "Template not analyzed"}), 400
+
+        slides = session_data['slide_data']
+        template_data = session_data['template_data']
+        include_images = options.get('include_images', True)
+
+        generator = PPTXGenerator()
+        previews = generator.create_presentation_preview(slides, template_data)
+        keys = thumbnail_renderer.render_deck(slides, template_data, fmt, include_images)
+
+        for preview, key in zip(previews, keys):
+            preview['thumbnail_url'] = f"/api/thumbnails/{key}"
+
+        return jsonify({"slides": previews})
+
+    except Exception as e:
+        logger.error(f"Error in preview_presentation: {e}")
+        return jsonify({"error": f"Preview failed: {str(e)}"}), 500
+
+@app.route('/api/thumbnails/<key>', methods=['GET'])
+def get_thumbnail(key):
+    # The key is a content hash, so the bytes behind it never change: a client
+    # holding it is current even after the server has evicted or restarted
+    if request.if_none_match.contains(key):
+        response = app.response_class(status=304)
+    else:
+        cached = thumbnail_renderer.cache.get(key)
+        if not cached:
+            return jsonify({"error": "Thumbnail not found"}), 404
+        image_bytes, mimetype = cached
+        response = app.response_class(image_bytes, mimetype=mimetype)
+
+    response.set_etag(key)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
 @app.route('/api/generate-speaker-notes', methods=['POST'])
-def generate_speaker_notes():
+@admission_controlled('llm', lambda: 2.0)
+async def generate_speaker_notes():
     try:
         data = request.get_json()
         session_id = data.get('session_id')
@@ -199,26 +615,140 @@ def generate_speaker_notes():
             return jsonify({"error": "Invalid session"}), 400
             
         session_data = session_store[session_id]
+        deck = Deck.from_raw(session_data['slide_data'])
         
         # Generate speaker notes using LLM
-        llm_service = LLMService(provider, api_key)
-        slides_with_notes = llm_service.generate_speaker_notes(
-            session_data['slide_data'], 
+        llm_service = LLMService(provider, api_key, deadline=g.deadline)
+        slides_with_notes = await llm_service.generate_speaker_notes_async(
+            deck, 
             session_data.get('guidance', '')
         )
         
+        # Slides rewritten meanwhile keep their new content; notes of the old one would not fit
+        current, conflict = _deck_edited(session_id, deck)
+        if conflict:
+            return conflict
+        slides_with_notes = current.with_notes({
+            i: slide.notes for i, slide in enumerate(slides_with_notes)
+            if slide.notes != deck[i].notes and current[i].to_json() == deck[i].to_json()
+        })
+        
         # Update session data
-        session_store[session_id]['slide_data'] = slides_with_notes
+        usage = llm_service.usage.summary()
+        session_data = session_store[session_id]
+        session_data['slide_data'] = slides_with_notes
+        session_data['token_usage'] = merge_usage(
+            session_data.get('token_usage'), usage)
+        session_data.setdefault('token_calls', []).extend(llm_service.usage.calls)
         
-        return jsonify({
-            "notes_generated": True,
-            "slides": slides_with_notes
-        })
+        return deck_response(
+            slides_with_notes,
+            notes_generated=True,
+            token_usage=usage
+        )
         
+    except DeadlineExceeded as e:
+        return _abandoned(e)
     except Exception as e:
         logger.error(f"Error in generate_speaker_notes: {e}")
         return jsonify({"error": f"Speaker notes generation failed: {str(e)}"}), 500
 
+@app.route('/api/regenerate-slide', methods=['POST'])
+@admission_controlled('llm')
+async def regenerate_slide():
+    try:
+        data = request.get_json() or {}
+        session_id = data.get('session_id')
+        provider = data.get('provider', 'openai')
+        api_key = data.get('apiKey', '')
+        instructions = data.get('instructions', '')
+        
+        if not session_id or session_id not in session_store:
+            return jsonify({"error": "Invalid session"}), 400
+        if not api_key and provider != 'local':
+            return jsonify({"error": "API key is required"}), 400
+            
+        session_data = session_store[session_id]
+        deck = Deck.from_raw(session_data.get('slide_data') or [])
+        
+        try:
+            slide_number = int(data.get('slide_number'))
+        except (TypeError, ValueError):
+            return jsonify({"error": "slide_number must be a number"}), 400
+        if not 1 <= slide_number <= len(deck):
+            return jsonify({"error": f"slide_number must be between 1 and {len(deck)}"}), 400
+        index = slide_number - 1
+        
+        # Only the slide's own source and its neighbours' titles go to the LLM
+        excerpt = source_excerpt(session_data.get('text', ''), deck, index,
+                                 session_data.get('section_index'))
+        neighbor_titles = (deck[index - 1].title if index > 0 else '',
+                           deck[index + 1].title if index + 1 < len(deck) else '')
+        
+        llm_service = LLMService(provider, api_key, deadline=g.deadline)
+        try:
+            # The user asked for a rewrite; an extractive stand-in would silently replace their slide
+            slide = await llm_service.regenerate_slide_async(
+                deck[index], excerpt, neighbor_titles,
+                session_data.get('guidance', ''), instructions, fallback=False
+            )
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            return jsonify({"error": f"The {provider} provider could not rewrite the slide: {e}",
+                            "slide": deck[index].to_dict()}), 502
+        
+        # Applied to the deck as it is now, so a concurrent rewrite of another slide survives
+        current, conflict = _deck_edited(session_id, deck)
+        if conflict:
+            return conflict
+        if current[index].to_json() != deck[index].to_json():
+            return jsonify({"error": "The slide changed while it was being rewritten; retry",
+                            "slide": current[index].to_dict()}), 409
+        
+        # Update session data
+        usage = llm_service.usage.summary()
+        slide_data = current.with_slide(index, slide)
+        session_data = session_store[session_id]
+        session_data['slide_data'] = slide_data
+        session_data['token_usage'] = merge_usage(
+            session_data.get('token_usage'), usage)
+        session_data.setdefault('token_calls', []).extend(llm_service.usage.calls)
+        
+        return deck_response(
+            slide_data,
+            session_id=session_id,
+            slide=slide.to_dict(),
+            token_usage=usage
+        )
+        
+    except DeadlineExceeded as e:
+        return _abandoned(e)
+    except Exception as e:
+        logger.error(f"Error in regenerate_slide: {e}")
+        return jsonify({"error": f"Slide regeneration failed: {str(e)}"}), 500
+
+@app.route('/', defaults={'path': ''})
+@app.route('/<path:path>')
+def frontend(path):
+    # Not admission controlled: page loads never wait behind LLM or build work.
+    # Under asgi.py this route is answered on the event loop and never gets here
+    planned = static_assets.respond(path, request.headers.get('Accept-Encoding', ''),
+                                    request.headers.get('If-None-Match', ''))
+    if planned is None:
+        return jsonify({"error": "Not found"}), 404
+
+    status, file_path, headers = planned
+    if file_path is None:
+        response = app.response_class(status=status)
+    else:
+        # A path, not an open file, so the server's file wrapper can sendfile it
+        response = send_file(file_path, conditional=False, etag=False)
+        # send_file names the download after the (content-hashed) variant on disk
+        response.headers.pop('Content-Disposition', None)
+    response.headers.update(headers)
+    return response
+
 @app.errorhandler(413)
 def too_large(e):
     return jsonify({"error": "File too large. Maximum size is 50MB."}), 413
@@ -228,4 +758,5 @@ def internal_error(e):
     return jsonify({"error": "Internal server error occurred."}), 500
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Local development only; the container runs asgi.py under granian
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1', host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,197 @@
+"""ASGI entry point: async views run on the event loop, everything else in a thread pool
+
+    PYTHONPATH=backend granian --interface asgi --host 0.0.0.0 --port 5000 asgi:application
+
+Under a WSGI server every request holds a thread, including async views
+waiting on an LLM provider. Here, views written as coroutines (analyze-text,
+speaker notes, slide regeneration) are awaited directly on the server's event
+loop, so thousands of requests waiting on providers cost no threads. Sync
+views (uploads, generation, previews) are CPU-bound and run in a bounded
+thread pool through a2wsgi. Page loads of the frontend build are answered on
+the event loop too, so they never queue behind API work for a thread: the
+file goes out through the server's http.response.pathsend (granian streams
+it from its own runtime), or, on servers without it, through reads run off
+the loop.
+
+Sessions live in process memory, so run a single worker process.
+"""
+
+import io
+import os
+import asyncio
+import inspect
+import logging
+
+from a2wsgi import WSGIMiddleware
+from a2wsgi.wsgi import build_environ
+from werkzeug.exceptions import HTTPException, RequestEntityTooLarge
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+import app as backend
+from services.deadline import CLIENT_GONE_ENVIRON_KEY
+
+logger = logging.getLogger('asgi')
+
+# Threads for sync views. Every build admission can hold may hold a thread,
+# running or waiting for a slot, so size the pool above that; the rest keep
+# template listing, selection and thumbnails answering while builds queue
+_build_queue = backend.admission.queues['build']
+WSGI_THREADS = int(os.environ.get('WSGI_THREADS') or
+                   _build_queue.max_in_flight + _build_queue.max_waiting + 16)
+STATIC_CHUNK_BYTES = 256 * 1024
+
+flask_app = backend.app
+wsgi = WSGIMiddleware(flask_app.wsgi_app, workers=WSGI_THREADS)
+
+# Native views never pass through wsgi_app, so the app's ProxyFix is applied to
+# their environ here; it rewrites the environ in place before calling through
+_proxy_fix = flask_app.wsgi_app if isinstance(flask_app.wsgi_app, ProxyFix) else None
+_forwarded = ProxyFix(lambda environ, start_response: None,
+                      x_for=_proxy_fix.x_for, x_proto=_proxy_fix.x_proto, x_host=_proxy_fix.x_host,
+                      x_port=_proxy_fix.x_port, x_prefix=_proxy_fix.x_prefix) if _proxy_fix else None
+
+
+def _route(scope):
+    """(endpoint, view args) a request routes to, or (None, None) for Flask to answer in a thread"""
+
+    if scope['method'] == 'OPTIONS':
+        # Flask answers CORS preflights itself
+        return None, None
+    adapter = flask_app.url_map.bind('localhost', script_name=scope.get('root_path') or None)
+    try:
+        return adapter.match(scope['path'], method=scope['method'])
+    except HTTPException:
+        # 404s, 405s and redirects are Flask's to answer
+        return None, None
+
+
+def _header(scope, name: bytes) -> str:
+    return b','.join(value for key, value in scope.get('headers', []) if key == name).decode('latin-1')
+
+
+async def _send_static(scope, send, path: str) -> bool:
+    """Answer a page load from the precompressed build; False if the path is not an asset"""
+
+    planned = backend.static_assets.respond(path, _header(scope, b'accept-encoding'),
+                                            _header(scope, b'if-none-match'))
+    if planned is None:
+        return False
+
+    status, file_path, headers = planned
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                    for name, value in headers.items()]
+    })
+    if file_path is None or scope['method'] == 'HEAD':
+        await send({'type': 'http.response.body', 'body': b''})
+    elif 'http.response.pathsend' in scope.get('extensions', {}):
+        # The server reads and sends the file itself
+        await send({'type': 'http.response.pathsend', 'path': file_path})
+    else:
+        # A cold page cache or slow disk would stall every other request on the loop
+        with open(file_path, 'rb') as f:
+            while True:
+                chunk = await asyncio.to_thread(f.read, STATIC_CHUNK_BYTES)
+                more = len(chunk) == STATIC_CHUNK_BYTES
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': more})
+                if not more:
+                    break
+    return True
+
+
+async def _read_body(scope, receive) -> bytes:
+    """The request body, refused with RequestEntityTooLarge once it passes MAX_CONTENT_LENGTH"""
+
+    limit = flask_app.config.get('MAX_CONTENT_LENGTH')
+    declared = _header(scope, b'content-length')
+    if limit is not None and declared.isdigit() and int(declared) > limit:
+        raise RequestEntityTooLarge()
+
+    chunks = []
+    received = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise ConnectionResetError("Client disconnected while sending the request")
+        chunk = message.get('body', b'')
+        received += len(chunk)
+        if limit is not None and received > limit:
+            # Chunked or understated bodies are cut off here, not after buffering
+            raise RequestEntityTooLarge()
+        chunks.append(chunk)
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def _watch_disconnect(receive, disconnected: asyncio.Event):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            disconnected.set()
+            return
+
+
+async def _send_response(send, response):
+    await send({
+        'type': 'http.response.start',
+        'status': response.status_code,
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                    for name, value in response.headers.items()]
+    })
+    await send({'type': 'http.response.body', 'body': b''.join(response.iter_encoded())})
+    response.close()
+
+
+async def _dispatch_async(view, view_args, scope, receive, send):
+    """Run an async Flask view inside a request context, without a thread"""
+
+    try:
+        body = await _read_body(scope, receive)
+    except ConnectionResetError:
+        return
+    except RequestEntityTooLarge as e:
+        # Answered through the app's own 413 handler, with nothing of the body read
+        with flask_app.request_context(build_environ(scope, io.BytesIO())):
+            response = flask_app.finalize_request(flask_app.handle_user_exception(e))
+            await _send_response(send, response)
+        return
+
+    environ = build_environ(scope, io.BytesIO(body))
+    if _forwarded is not None:
+        _forwarded(environ, None)
+    disconnected = asyncio.Event()
+    # Picked up by the request's deadline, which then cancels provider waits
+    environ[CLIENT_GONE_ENVIRON_KEY] = disconnected.is_set
+    watcher = asyncio.ensure_future(_watch_disconnect(receive, disconnected))
+
+    try:
+        # Mirrors Flask.full_dispatch_request, with the view awaited here
+        with flask_app.request_context(environ):
+            try:
+                try:
+                    rv = flask_app.preprocess_request()
+                    if rv is None:
+                        rv = await view(**view_args)
+                except Exception as e:
+                    rv = flask_app.handle_user_exception(e)
+                response = flask_app.finalize_request(rv)
+            except Exception as e:
+                response = flask_app.handle_exception(e)
+
+            if not disconnected.is_set():
+                await _send_response(send, response)
+    finally:
+        watcher.cancel()
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http':
+        endpoint, view_args = _route(scope)
+        if endpoint == 'frontend' and await _send_static(scope, send, view_args['path']):
+            return
+        view = flask_app.view_functions.get(endpoint)
+        if view is not None and inspect.iscoroutinefunction(view):
+            return await _dispatch_async(view, view_args, scope, receive, send)
+    return await wsgi(scope, receive, send)
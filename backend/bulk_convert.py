@@ -0,0 +1,263 @@
+"""Convert a directory of text documents into presentations, without the web app
+
+    python bulk_convert.py reports/ --template corporate.pptx --output decks/ \
+        --provider openai --api-key "$LLM_API_KEY" --workers 4 --llm-concurrency 8
+
+Documents go through a bounded number of concurrent LLM analyses, then the
+decks are built in a process pool. Every finished file is appended to a
+checkpoint in the output directory, so rerunning the same command after a
+crash picks up where it stopped.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional
+
+from services.llm_service import LLMService
+from services.pptx_analyzer import PPTXAnalyzer
+from services.pptx_generator import PPTXGenerator, parse_generation_options
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('bulk_convert')
+
+INPUT_EXTENSIONS = ('.txt', '.md')
+CHECKPOINT_NAME = '.bulk_checkpoint.jsonl'
+MAX_TEXT_CHARS = 50000
+
+# Per-process state of the generation workers, set up once by _init_worker
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(template_path: str, options: Dict):
+    logging.getLogger().setLevel(logging.WARNING)
+    _worker['template_path'] = template_path
+    _worker['template_data'] = PPTXAnalyzer().analyze_template(template_path)
+    _worker['options'] = options
+    _worker['generator'] = PPTXGenerator()
+
+
+def _build_deck(slides, output_path: str) -> float:
+    """Build one deck in a worker process; returns the seconds it took"""
+
+    started = time.monotonic()
+    # Written under a temporary name so a crash never leaves a deck that looks finished
+    partial_path = output_path + '.partial.pptx'
+    _worker['generator'].generate_presentation(
+        slides=slides,
+        template_data=_worker['template_data'],
+        template_path=_worker['template_path'],
+        options=_worker['options'],
+        output_path=partial_path
+    )
+    os.replace(partial_path, output_path)
+    return time.monotonic() - started
+
+
+class Checkpoint:
+    """Append-only record of converted files, keyed by source name and content digest"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Dict[str, str] = {}
+        torn = False
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    torn = not line.endswith('\n')
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A torn last line from a crash mid-write
+                        continue
+                    self.done[entry['source']] = entry['digest']
+        self._file = open(path, 'a', encoding='utf-8')
+        if torn:
+            # Keep the next entry off the torn line
+            self._file.write('\n')
+
+    def is_done(self, source: str, digest: str, output_path: str) -> bool:
+        return self.done.get(source) == digest and os.path.exists(output_path)
+
+    def record(self, entry: Dict[str, Any]):
+        self._file.write(json.dumps(entry) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+class Job:
+    __slots__ = ('source', 'path', 'output_path', 'digest')
+
+    def __init__(self, source: str, path: str, output_path: str, digest: str):
+        self.source = source
+        self.path = path
+        self.output_path = output_path
+        self.digest = digest
+
+
+class ThroughputReport:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.converted = 0
+        self.skipped = 0
+        self.slides = 0
+        self.llm_seconds = 0.0
+        self.build_seconds = 0.0
+        self.failed: List[str] = []
+
+    def render(self, usage: Dict[str, Any]) -> str:
+        elapsed = time.monotonic() - self.started
+        lines = [
+            f"Converted {self.converted} files ({self.slides} slides) in {elapsed:.1f}s: "
+            f"{self.converted * 60 / elapsed if elapsed else 0:.1f} files/min, "
+            f"{self.slides / elapsed if elapsed else 0:.1f} slides/s",
+            f"Time in LLM stage {self.llm_seconds:.1f}s, in generation {self.build_seconds:.1f}s (summed over workers)",
+            f"Skipped {self.skipped} already converted, {len(self.failed)} failed",
+            f"LLM calls {usage['calls']}, tokens {usage['input_tokens']} in / "
+            f"{usage['output_tokens']} out, estimated cost ${usage['cost']:.4f}"
+        ]
+        lines += [f"  failed: {name}" for name in self.failed]
+        return '\n'.join(lines)
+
+
+def _run_fingerprint(args, template_path: str, options: Dict) -> str:
+    """Everything besides the document that changes the output"""
+
+    with open(template_path, 'rb') as f:
+        template_hash = hashlib.sha256(f.read()).hexdigest()
+    return json.dumps([template_hash, options, args.provider, args.guidance,
+                       args.slide_count, args.notes], sort_keys=True)
+
+
+def _collect_jobs(args, fingerprint: str, checkpoint: Checkpoint, report: ThroughputReport) -> List[Job]:
+    jobs = []
+    for filename in sorted(os.listdir(args.input_dir)):
+        stem, extension = os.path.splitext(filename)
+        path = os.path.join(args.input_dir, filename)
+        if extension.lower() not in INPUT_EXTENSIONS or not os.path.isfile(path):
+            continue
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        digest.update(fingerprint.encode('utf-8'))
+
+        job = Job(filename, path, os.path.join(args.output, f"{stem}.pptx"), digest.hexdigest())
+        if checkpoint.is_done(job.source, job.digest, job.output_path):
+            report.skipped += 1
+        else:
+            jobs.append(job)
+    return jobs
+
+
+async def _convert_all(args, jobs: List[Job], options: Dict, checkpoint: Checkpoint,
+                       report: ThroughputReport) -> Dict[str, Any]:
+    service = LLMService(args.provider, args.api_key)
+    llm_slots = asyncio.Semaphore(args.llm_concurrency)
+    # Analyzed decks waiting for a worker are bounded too, so a slow pool cannot pile them up
+    in_flight = asyncio.Semaphore(args.llm_concurrency + 2 * args.workers)
+    loop = asyncio.get_running_loop()
+
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(args.template, options)) as pool:
+
+        async def convert(job: Job):
+            async with in_flight:
+                try:
+                    with open(job.path, encoding='utf-8', errors='replace') as f:
+                        text = f.read(MAX_TEXT_CHARS)
+                    if not text.strip():
+                        raise ValueError("document is empty")
+
+                    async with llm_slots:
+                        started = time.monotonic()
+                        # A provider failure fails this file, so the checkpoint never
+                        # records an extractive fallback deck and a rerun retries it
+                        slides = await service.analyze_text_for_slides_async(
+                            text, args.guidance, args.slide_count, fallback=False)
+                        if args.notes:
+                            # One call per slot, so --llm-concurrency bounds calls, not documents
+                            slides = await service.generate_speaker_notes_async(
+                                slides, args.guidance, concurrency=1, fallback=False)
+                        report.llm_seconds += time.monotonic() - started
+
+                    report.build_seconds += await loop.run_in_executor(
+                        pool, _build_deck, slides, job.output_path)
+
+                    checkpoint.record({'source': job.source, 'digest': job.digest,
+                                       'output': job.output_path, 'slides': len(slides)})
+                    report.converted += 1
+                    report.slides += len(slides)
+                    logger.info(f"Converted {job.source} ({len(slides)} slides)")
+
+                except Exception as e:
+                    logger.error(f"Failed to convert {job.source}: {e}")
+                    report.failed.append(job.source)
+
+        await asyncio.gather(*(convert(job) for job in jobs))
+
+    return service.usage.summary()
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Convert a directory of text documents into presentations")
+    parser.add_argument('input_dir', help="Directory of .txt/.md documents")
+    parser.add_argument('--template', required=True, help="Template .pptx/.potx to style every deck")
+    parser.add_argument('--output', required=True, help="Directory for the generated decks")
+    parser.add_argument('--provider', default='openai', choices=['openai', 'anthropic', 'gemini', 'local'])
+    parser.add_argument('--api-key', default=os.environ.get('LLM_API_KEY', ''),
+                        help="Provider API key (default: $LLM_API_KEY)")
+    parser.add_argument('--guidance', default='', help="Guidance passed to every analysis")
+    parser.add_argument('--slide-count', type=int, default=None)
+    parser.add_argument('--notes', action='store_true', help="Also write speaker notes")
+    parser.add_argument('--options', default='{}', help="Generation options as JSON, e.g. '{\"optimize\": true}'")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2,
+                        help="Generation processes")
+    parser.add_argument('--llm-concurrency', type=int, default=8,
+                        help="Provider calls in flight at the same time")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    if not args.api_key and args.provider != 'local':
+        logger.error("An API key is required (--api-key or $LLM_API_KEY)")
+        return 2
+    try:
+        options = parse_generation_options(json.loads(args.options))
+    except ValueError as e:
+        logger.error(f"Invalid --options: {e}")
+        return 2
+    args.workers = max(1, args.workers)
+    args.llm_concurrency = max(1, args.llm_concurrency)
+    if args.slide_count is not None:
+        args.slide_count = max(1, min(30, args.slide_count))
+
+    os.makedirs(args.output, exist_ok=True)
+    checkpoint = Checkpoint(os.path.join(args.output, CHECKPOINT_NAME))
+    report = ThroughputReport()
+
+    try:
+        jobs = _collect_jobs(args, _run_fingerprint(args, args.template, options), checkpoint, report)
+        logger.info(f"{len(jobs)} documents to convert, {report.skipped} already done")
+        usage = asyncio.run(_convert_all(args, jobs, options, checkpoint, report))
+    finally:
+        checkpoint.close()
+
+    print(report.render(usage))
+    return 1 if report.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
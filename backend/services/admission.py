@@ -0,0 +1,260 @@
+import math
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# How often an async waiter looks for a free slot; it holds no thread meanwhile
+ASYNC_POLL_SECONDS = 0.05
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed; retry_after is a hint in seconds"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class TokenBucket:
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def take(self, cost: float, now: float) -> float:
+        """Spend cost tokens; return 0 on success or the seconds until they would be available"""
+
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Token bucket per client key, with idle buckets swept once the table grows"""
+
+    def __init__(self, rate: float, capacity: float, max_keys: int = 10000):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def check(self, key: str, cost: float = 1.0) -> float:
+        # A single request costlier than the burst is allowed from a full bucket
+        cost = min(cost, self.capacity)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._sweep(now)
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.capacity, now)
+            return bucket.take(cost, now)
+
+    def _sweep(self, now: float):
+        # A bucket that would have refilled completely is indistinguishable from a new one
+        refill_time = self.capacity / self.rate
+        idle = [k for k, b in self._buckets.items() if now - b.updated >= refill_time]
+        for key in idle:
+            del self._buckets[key]
+        if len(self._buckets) >= self.max_keys:
+            # Still full of active clients: drop the longest-idle half
+            for key, _ in sorted(self._buckets.items(), key=lambda item: item[1].updated)[:self.max_keys // 2]:
+                del self._buckets[key]
+
+
+class WorkQueue:
+    """Caps in-flight work of one kind behind a bounded wait queue"""
+
+    def __init__(self, name: str, max_in_flight: int, max_waiting: int,
+                 max_wait_seconds: float = 10.0, per_client_limit: Optional[int] = None):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_waiting = max_waiting
+        self.max_wait_seconds = max_wait_seconds
+        self.per_client_limit = per_client_limit
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._per_client: Dict[str, int] = {}
+        # Exponentially weighted average service time, for Retry-After estimates
+        self._service_time = 1.0
+        self._cond = threading.Condition()
+
+    def _estimate_wait(self) -> float:
+        return self._service_time * (self.waiting + 1) / max(1, self.max_in_flight)
+
+    def _reject(self, message: str, retry_after: float):
+        self.rejected += 1
+        raise AdmissionRejected(message, retry_after)
+
+    def _take_or_queue(self, client: str) -> bool:
+        """Under the lock: take a slot (True), join the wait queue (False) or reject"""
+
+        if self.per_client_limit and self._per_client.get(client, 0) >= self.per_client_limit:
+            self._reject("Too many concurrent requests for this client", self._service_time)
+
+        if self.in_flight < self.max_in_flight and not self.waiting:
+            self._take(client)
+            return True
+        if self.waiting >= self.max_waiting:
+            self._reject("Server is busy, please retry shortly", self._estimate_wait())
+        self.waiting += 1
+        return False
+
+    def _take(self, client: str):
+        self.in_flight += 1
+        self._per_client[client] = self._per_client.get(client, 0) + 1
+
+    def _release(self, client: str, elapsed: float):
+        with self._cond:
+            self.in_flight -= 1
+            remaining = self._per_client.get(client, 1) - 1
+            if remaining:
+                self._per_client[client] = remaining
+            else:
+                self._per_client.pop(client, None)
+            self._service_time = 0.8 * self._service_time + 0.2 * elapsed
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self, client: str = ''):
+        with self._cond:
+            if not self._take_or_queue(client):
+                deadline = time.monotonic() + self.max_wait_seconds
+                try:
+                    while self.in_flight >= self.max_in_flight:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._reject("Server is busy, please retry shortly", self._estimate_wait())
+                        self._cond.wait(remaining)
+                finally:
+                    self.waiting -= 1
+                self._take(client)
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(client, time.monotonic() - started)
+
+    @asynccontextmanager
+    async def slot_async(self, client: str = ''):
+        """Async variant of slot; waiting for a slot holds no thread
+
+        Waiters poll instead of sharing the sync waiters' condition, which
+        would need a thread each. A waiter cancelled while queued just leaves
+        the queue; the slot is only taken with no await before it is released.
+        """
+
+        with self._cond:
+            queued = not self._take_or_queue(client)
+        deadline = time.monotonic() + self.max_wait_seconds
+        try:
+            while queued:
+                with self._cond:
+                    if self.in_flight < self.max_in_flight:
+                        self.waiting -= 1
+                        queued = False
+                        self._take(client)
+                        break
+                    if time.monotonic() >= deadline:
+                        self.waiting -= 1
+                        queued = False
+                        self._reject("Server is busy, please retry shortly", self._estimate_wait())
+                await asyncio.sleep(ASYNC_POLL_SECONDS)
+        finally:
+            if queued:
+                with self._cond:
+                    self.waiting -= 1
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(client, time.monotonic() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'in_flight': self.in_flight,
+                'waiting': self.waiting,
+                'max_in_flight': self.max_in_flight,
+                'max_waiting': self.max_waiting,
+                'rejected': self.rejected,
+                'avg_service_seconds': round(self._service_time, 3)
+            }
+
+
+class AdmissionController:
+    """Per-API-key and per-IP rate limits in front of global work queues
+
+    Rate limits are checked first, so an abusive client is shed before it can
+    occupy a queue position that a well-behaved client would otherwise get.
+    """
+
+    def __init__(self,
+                 key_rate: float = 1.0, key_burst: float = 20.0,
+                 ip_rate: float = 2.0, ip_burst: float = 40.0,
+                 queues: Optional[Dict[str, WorkQueue]] = None):
+        self.key_limiter = RateLimiter(key_rate, key_burst)
+        self.ip_limiter = RateLimiter(ip_rate, ip_burst)
+        self.queues = queues or {
+            # Provider calls mostly wait on the network; generation is CPU-bound
+            'llm': WorkQueue('llm', max_in_flight=32, max_waiting=64, per_client_limit=4),
+            'build': WorkQueue('build', max_in_flight=4, max_waiting=16, per_client_limit=2),
+        }
+        self.rate_limited = 0
+
+    @staticmethod
+    def client_id(ip: Optional[str], api_key: Optional[str] = None) -> str:
+        if api_key:
+            return 'key:' + hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:24]
+        return 'ip:' + (ip or 'unknown')
+
+    @contextmanager
+    def admit(self, kind: str, ip: Optional[str], api_key: Optional[str] = None, cost: float = 1.0):
+        """Hold a work slot for the duration of the block, or raise AdmissionRejected"""
+
+        self._check_rate(ip, api_key, cost)
+        with self.queues[kind].slot(self.client_id(ip, api_key)):
+            yield
+
+    @asynccontextmanager
+    async def admit_async(self, kind: str, ip: Optional[str], api_key: Optional[str] = None,
+                          cost: float = 1.0):
+        """Async variant of admit, for views awaited on the event loop"""
+
+        self._check_rate(ip, api_key, cost)
+        async with self.queues[kind].slot_async(self.client_id(ip, api_key)):
+            yield
+
+    def _check_rate(self, ip: Optional[str], api_key: Optional[str], cost: float):
+        retry_after = self.ip_limiter.check(ip or 'unknown', cost)
+        if api_key and not retry_after:
+            retry_after = self.key_limiter.check(self.client_id(ip, api_key), cost)
+        if retry_after:
+            self.rate_limited += 1
+            raise AdmissionRejected("Rate limit exceeded", retry_after)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'rate_limited': self.rate_limited,
+            'queues': {name: queue.stats() for name, queue in self.queues.items()}
+        }
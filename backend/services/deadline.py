@@ -0,0 +1,125 @@
+import time
+import socket
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# How often a long await looks at the client connection
+DISCONNECT_POLL_SECONDS = 0.5
+
+# Set by the ASGI entry point, which learns of disconnects from the server instead of a socket
+CLIENT_GONE_ENVIRON_KEY = 'backend.client_gone'
+
+
+class DeadlineExceeded(Exception):
+    """The request ran out of time or its client went away; the work is abandoned"""
+
+    def __init__(self, message: str, deadline: Optional['Deadline'] = None):
+        super().__init__(message)
+        self.deadline = deadline
+
+
+class Deadline:
+    """Time budget of one request, checked wherever work can be abandoned
+
+    A deadline without a timeout or disconnect probe never expires, so code
+    can always call check() and run() without testing for None first.
+    """
+
+    def __init__(self, seconds: Optional[float] = None,
+                 client_gone: Optional[Callable[[], bool]] = None):
+        self.expires_at = time.monotonic() + seconds if seconds is not None else None
+        self._client_gone = client_gone
+        self.reason: Optional[str] = None
+
+    def remaining(self) -> Optional[float]:
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        if self.reason is None:
+            if self.expires_at is not None and time.monotonic() >= self.expires_at:
+                self.reason = "deadline exceeded"
+            elif self._client_gone is not None and self._client_gone():
+                self.reason = "client disconnected"
+        return self.reason is not None
+
+    def allows(self, seconds: float) -> bool:
+        """Whether waiting this long still leaves time to do something afterwards"""
+        remaining = self.remaining()
+        return not self.expired() and (remaining is None or remaining > seconds)
+
+    def check(self, stage: str = ''):
+        if self.expired():
+            raise DeadlineExceeded(f"{self.reason}{' during ' + stage if stage else ''}", self)
+
+    async def run(self, awaitable: Awaitable[Any], stage: str = '') -> Any:
+        """Await something, cancelling it as soon as the deadline passes or the client leaves"""
+
+        if self.expired() and asyncio.iscoroutine(awaitable):
+            # Never started, so close it rather than leave it unawaited
+            awaitable.close()
+        self.check(stage)
+        task = asyncio.ensure_future(awaitable)
+        try:
+            while True:
+                done, _ = await asyncio.wait({task}, timeout=self._poll_interval())
+                if done:
+                    return task.result()
+                self.check(stage)
+        finally:
+            if not task.done():
+                task.cancel()
+                await asyncio.wait({task})
+
+    def _poll_interval(self) -> Optional[float]:
+        remaining = self.remaining()
+        if self._client_gone is None:
+            return remaining
+        return DISCONNECT_POLL_SECONDS if remaining is None else min(remaining, DISCONNECT_POLL_SECONDS)
+
+
+async def gather_until_abandoned(*awaitables: Awaitable[Any]) -> list:
+    """asyncio.gather that cancels the siblings once one of them fails or runs out of time"""
+
+    tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    try:
+        return await asyncio.gather(*tasks)
+    except Exception:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def client_disconnect_probe(environ: Dict[str, Any]) -> Optional[Callable[[], bool]]:
+    """A check for whether the client behind a WSGI request has closed its connection
+
+    Uses the socket the dev server and gunicorn expose in the environ; the
+    request body has been read by then, so a readable socket with nothing
+    to read means the peer hung up. None when the socket is not available.
+    """
+
+    if environ.get(CLIENT_GONE_ENVIRON_KEY) is not None:
+        return environ[CLIENT_GONE_ENVIRON_KEY]
+
+    sock = environ.get('werkzeug.socket') or environ.get('gunicorn.socket')
+    flags = socket.MSG_PEEK | getattr(socket, 'MSG_DONTWAIT', 0)
+    if sock is None or not hasattr(socket, 'MSG_DONTWAIT'):
+        return None
+
+    def client_gone() -> bool:
+        try:
+            return sock.recv(1, flags) == b''
+        except (BlockingIOError, InterruptedError):
+            return False
+        except ValueError:
+            # TLS sockets refuse flags; we cannot tell, so assume the client is still there
+            return False
+        except OSError:
+            return True
+
+    return client_gone
@@ -0,0 +1,105 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from .slide_model import Deck
+
+logger = logging.getLogger(__name__)
+
+
+class CachedDeck:
+    """A finished .pptx on disk and the response headers that described its build"""
+
+    __slots__ = ('path', 'headers', 'size_bytes')
+
+    def __init__(self, path: str, headers: Optional[Dict[str, str]] = None, size_bytes: int = 0):
+        self.path = path
+        self.headers = headers or {}
+        self.size_bytes = size_bytes
+
+    def read(self) -> bytes:
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+
+class GeneratedDeckCache:
+    """Byte-bounded LRU of generated decks keyed by slides, template and options
+
+    Generation is deterministic for a given key, so a hit can be served
+    without touching python-pptx. Decks are kept as files, not in memory, so
+    large decks cost no RSS and can be sent with sendfile.
+    """
+
+    def __init__(self, max_bytes: int = 128 * 1024 * 1024, directory: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.directory = directory or tempfile.mkdtemp(prefix='deckcache-')
+        os.makedirs(self.directory, exist_ok=True)
+        self._entries: 'OrderedDict[str, CachedDeck]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def deck_key(template_hash: str, options: Optional[Dict], slides: Any) -> str:
+        slides_hash = hashlib.sha256(Deck.from_raw(slides).to_json().encode('utf-8')).hexdigest()
+        options_hash = hashlib.sha256(
+            json.dumps(options or {}, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        return hashlib.sha256(f"{slides_hash}:{template_hash}:{options_hash}".encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[CachedDeck]:
+        with self._lock:
+            deck = self._entries.get(key)
+            if deck is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return deck
+
+    def put(self, key: str, source_path: str, headers: Optional[Dict[str, str]] = None):
+        """Keep a copy of a generated deck; the source stays owned by the caller"""
+
+        size = os.path.getsize(source_path)
+        if size > self.max_bytes:
+            return
+
+        # Copied, not linked: the source is rewritten in place by the next generation
+        path = os.path.join(self.directory, f"{key}.pptx")
+        partial = f"{path}.{threading.get_ident()}.tmp"
+        shutil.copyfile(source_path, partial)
+        os.replace(partial, path)
+
+        evicted = []
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous.size_bytes
+            self._entries[key] = CachedDeck(path, headers, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, deck = self._entries.popitem(last=False)
+                self._size -= deck.size_bytes
+                evicted.append(deck.path)
+
+        for evicted_path in evicted:
+            try:
+                os.remove(evicted_path)
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
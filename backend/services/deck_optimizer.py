@@ -0,0 +1,296 @@
+import io
+import os
+import hashlib
+import logging
+import posixpath
+import zipfile
+from collections import deque
+from typing import Dict, List, Any, Optional, Set
+
+from lxml import etree
+from PIL import Image
+
+from .template_inspector import rels_part_name, resolve_target
+
+logger = logging.getLogger(__name__)
+
+NS = {
+    'p': 'http://schemas.openxmlformats.org/presentationml/2006/main',
+    'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
+    'rel': 'http://schemas.openxmlformats.org/package/2006/relationships',
+    'ct': 'http://schemas.openxmlformats.org/package/2006/content-types',
+}
+R_ID = '{%s}id' % NS['r']
+
+RT_BASE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/'
+RT_SLIDE = RT_BASE + 'slide'
+RT_SLIDE_LAYOUT = RT_BASE + 'slideLayout'
+RT_SLIDE_MASTER = RT_BASE + 'slideMaster'
+
+PRESENTATION_PART = 'ppt/presentation.xml'
+CONTENT_TYPES_PART = '[Content_Types].xml'
+
+# Already-compressed formats are stored rather than deflated again
+STORED_EXTENSIONS = ('.jpg', '.jpeg', '.mp4', '.m4a', '.mp3', '.wmv')
+RECOMPRESSIBLE_EXTENSIONS = {'.png': 'PNG', '.jpg': 'JPEG', '.jpeg': 'JPEG'}
+
+
+class DeckOptimizer:
+    """Post-generation pass that shrinks a .pptx package
+
+    Prunes layouts, masters and parts no slide uses, dedupes media by content
+    hash, downsizes oversized images and rewrites the zip at the chosen
+    compression level.
+    """
+
+    def __init__(self,
+                 compression_level: int = 9,
+                 max_image_pixels: int = 2560,
+                 recompress_min_bytes: int = 512 * 1024,
+                 jpeg_quality: int = 85):
+        self.compression_level = compression_level
+        self.max_image_pixels = max_image_pixels
+        self.recompress_min_bytes = recompress_min_bytes
+        self.jpeg_quality = jpeg_quality
+
+    def optimize(self,
+                 input_path: str,
+                 output_path: Optional[str] = None,
+                 prune: bool = True,
+                 dedupe: bool = True,
+                 recompress: bool = True) -> Dict[str, Any]:
+        """Optimize a deck (in place unless output_path is given) and report before/after sizes"""
+
+        output_path = output_path or input_path
+        before = os.path.getsize(input_path)
+
+        with zipfile.ZipFile(input_path) as zf:
+            parts = {name: zf.read(name) for name in zf.namelist()}
+
+        report = {
+            'before_bytes': before,
+            'removed_parts': [],
+            'deduplicated_media': 0,
+            'recompressed_images': 0
+        }
+
+        try:
+            if prune:
+                self._prune_layouts_and_masters(parts)
+                report['removed_parts'] = self._drop_unreachable(parts)
+            if dedupe:
+                report['deduplicated_media'] = self._dedupe_media(parts)
+                report['removed_parts'] += self._drop_unreachable(parts)
+            if recompress:
+                report['recompressed_images'] = self._recompress_images(parts)
+        except Exception as e:
+            # A half-applied rewrite is worse than an unoptimized deck
+            logger.warning(f"Deck optimization skipped: {e}")
+            report.update({'after_bytes': before, 'saved_bytes': 0, 'saved_percent': 0.0,
+                           'error': str(e)})
+            return report
+
+        temp_path = self._write(parts, output_path)
+        after = os.path.getsize(temp_path)
+        if after >= before and output_path == input_path:
+            # Never hand back a bigger file than we were given
+            os.remove(temp_path)
+            after = before
+        else:
+            os.replace(temp_path, output_path)
+
+        report.update({
+            'after_bytes': after,
+            'saved_bytes': before - after,
+            'saved_percent': round(100.0 * (before - after) / before, 1) if before else 0.0
+        })
+        logger.info(f"Optimized deck: {before} -> {after} bytes")
+        return report
+
+    # -- relationships -----------------------------------------------------
+
+    def _rels(self, parts: Dict[str, bytes], part: str):
+        name = rels_part_name(part) if part else '_rels/.rels'
+        if name not in parts:
+            return None
+        return etree.fromstring(parts[name])
+
+    def _save_xml(self, parts: Dict[str, bytes], name: str, root):
+        parts[name] = etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+
+    def _targets(self, parts: Dict[str, bytes], part: str, rel_type: Optional[str] = None) -> Dict[str, str]:
+        rels = self._rels(parts, part)
+        if rels is None:
+            return {}
+        return {rel.get('Id'): resolve_target(part, rel.get('Target', ''))
+                for rel in rels.iterfind('rel:Relationship', NS)
+                if rel.get('TargetMode') != 'External'
+                and (rel_type is None or rel.get('Type') == rel_type)}
+
+    def _remove_rel(self, parts: Dict[str, bytes], part: str, r_id: str):
+        rels = self._rels(parts, part)
+        for rel in rels.iterfind('rel:Relationship', NS):
+            if rel.get('Id') == r_id:
+                rels.remove(rel)
+        self._save_xml(parts, rels_part_name(part), rels)
+
+    # -- passes ------------------------------------------------------------
+
+    def _prune_layouts_and_masters(self, parts: Dict[str, bytes]):
+        """Drop layouts no slide uses, and masters left without layouts"""
+
+        slides = self._targets(parts, PRESENTATION_PART, RT_SLIDE).values()
+        if not slides:
+            # An empty deck keeps its layouts so it remains usable as a template
+            return
+
+        used_layouts: Set[str] = set()
+        for slide in slides:
+            used_layouts.update(self._targets(parts, slide, RT_SLIDE_LAYOUT).values())
+
+        presentation = etree.fromstring(parts[PRESENTATION_PART])
+        masters = self._targets(parts, PRESENTATION_PART, RT_SLIDE_MASTER)
+        presentation_changed = False
+
+        for master_rid, master in masters.items():
+            master_xml = etree.fromstring(parts[master])
+            layouts = self._targets(parts, master, RT_SLIDE_LAYOUT)
+            id_list = master_xml.find('p:sldLayoutIdLst', NS)
+
+            for layout_rid, layout in layouts.items():
+                if layout in used_layouts:
+                    continue
+                if id_list is not None:
+                    for entry in id_list.findall('p:sldLayoutId', NS):
+                        if entry.get(R_ID) == layout_rid:
+                            id_list.remove(entry)
+                self._remove_rel(parts, master, layout_rid)
+
+            self._save_xml(parts, master, master_xml)
+
+            if not any(layout in used_layouts for layout in layouts.values()):
+                master_list = presentation.find('p:sldMasterIdLst', NS)
+                for entry in master_list.findall('p:sldMasterId', NS):
+                    if entry.get(R_ID) == master_rid:
+                        master_list.remove(entry)
+                self._remove_rel(parts, PRESENTATION_PART, master_rid)
+                presentation_changed = True
+
+        if presentation_changed:
+            self._save_xml(parts, PRESENTATION_PART, presentation)
+
+    def _drop_unreachable(self, parts: Dict[str, bytes]) -> List[str]:
+        """Remove parts no longer reachable from the package relationships"""
+
+        reachable = {''}
+        queue = deque([''])
+        while queue:
+            part = queue.popleft()
+            for target in self._targets(parts, part).values():
+                if target in parts and target not in reachable:
+                    reachable.add(target)
+                    queue.append(target)
+
+        removed = []
+        for name in list(parts):
+            if name == CONTENT_TYPES_PART or name.endswith('.rels'):
+                continue
+            if name not in reachable:
+                removed.append(name)
+                del parts[name]
+                parts.pop(rels_part_name(name), None)
+
+        if removed:
+            content_types = etree.fromstring(parts[CONTENT_TYPES_PART])
+            gone = {'/' + name for name in removed}
+            for override in content_types.findall('ct:Override', NS):
+                if override.get('PartName') in gone:
+                    content_types.remove(override)
+            self._save_xml(parts, CONTENT_TYPES_PART, content_types)
+
+        return removed
+
+    def _dedupe_media(self, parts: Dict[str, bytes]) -> int:
+        """Point every relationship at one copy of each distinct media blob"""
+
+        canonical: Dict[str, str] = {}
+        duplicates: Dict[str, str] = {}
+        for name in sorted(parts):
+            if not name.startswith('ppt/media/'):
+                continue
+            digest = hashlib.sha256(parts[name]).hexdigest()
+            if digest in canonical:
+                duplicates[name] = canonical[digest]
+            else:
+                canonical[digest] = name
+
+        if not duplicates:
+            return 0
+
+        for rels_name in [n for n in parts if n.endswith('.rels')]:
+            source = self._source_of_rels(rels_name)
+            rels = etree.fromstring(parts[rels_name])
+            changed = False
+            for rel in rels.iterfind('rel:Relationship', NS):
+                if rel.get('TargetMode') == 'External':
+                    continue
+                target = resolve_target(source, rel.get('Target', ''))
+                if target in duplicates:
+                    rel.set('Target', posixpath.relpath(duplicates[target], posixpath.dirname(source)))
+                    changed = True
+            if changed:
+                self._save_xml(parts, rels_name, rels)
+
+        return len(duplicates)
+
+    @staticmethod
+    def _source_of_rels(rels_name: str) -> str:
+        directory, filename = posixpath.split(rels_name)
+        return posixpath.join(posixpath.dirname(directory), filename[:-len('.rels')])
+
+    def _recompress_images(self, parts: Dict[str, bytes]) -> int:
+        """Downscale and re-encode oversized raster images, keeping their format"""
+
+        count = 0
+        for name, data in list(parts.items()):
+            image_format = RECOMPRESSIBLE_EXTENSIONS.get(posixpath.splitext(name)[1].lower())
+            if not name.startswith('ppt/media/') or not image_format:
+                continue
+            if len(data) < self.recompress_min_bytes:
+                continue
+
+            try:
+                with Image.open(io.BytesIO(data)) as image:
+                    image.load()
+                    if max(image.size) > self.max_image_pixels:
+                        image.thumbnail((self.max_image_pixels, self.max_image_pixels))
+
+                    buffer = io.BytesIO()
+                    if image_format == 'JPEG':
+                        if image.mode not in ('RGB', 'L'):
+                            image = image.convert('RGB')
+                        image.save(buffer, 'JPEG', quality=self.jpeg_quality,
+                                   optimize=True, progressive=True)
+                    else:
+                        image.save(buffer, 'PNG', optimize=True)
+
+                if buffer.tell() < len(data):
+                    parts[name] = buffer.getvalue()
+                    count += 1
+
+            except Exception as e:
+                logger.warning(f"Could not recompress {name}: {e}")
+
+        return count
+
+    def _write(self, parts: Dict[str, bytes], output_path: str) -> str:
+        temp_path = output_path + '.tmp'
+        with zipfile.ZipFile(temp_path, 'w') as zf:
+            # [Content_Types].xml conventionally comes first
+            for name in sorted(parts, key=lambda n: (n != CONTENT_TYPES_PART, n)):
+                if name.lower().endswith(STORED_EXTENSIONS):
+                    zf.writestr(name, parts[name], compress_type=zipfile.ZIP_STORED)
+                else:
+                    zf.writestr(name, parts[name], compress_type=zipfile.ZIP_DEFLATED,
+                                compresslevel=self.compression_level)
+        return temp_path
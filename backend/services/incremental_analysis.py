@@ -0,0 +1,242 @@
+import re
+import hashlib
+import logging
+from difflib import SequenceMatcher
+from typing import Dict, List, Any, Optional, Tuple
+
+from .deadline import gather_until_abandoned
+from .slide_model import Deck
+
+logger = logging.getLogger(__name__)
+
+# Sections are built from whole paragraphs up to roughly this many characters
+SECTION_TARGET_CHARS = 1500
+# Above this share of changed sections a full re-analysis is cheaper and more coherent
+MAX_CHANGED_RATIO = 0.6
+# Slide types that summarize the whole deck rather than one section
+GLOBAL_SLIDE_TYPES = ('title', 'conclusion')
+
+_HEADING = re.compile(r'^(#{1,6}\s+\S.*|[A-Z0-9][^.!?]{0,78}:?)$')
+_WORD = re.compile(r"[a-z0-9']{3,}|\d+")
+
+
+def hash_text(text: str) -> str:
+    """Whitespace-insensitive content hash"""
+    normalized = ' '.join(text.split())
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:16]
+
+
+def split_sections(text: str) -> List[str]:
+    """Split text into sections at headings, packing paragraphs up to a size budget"""
+
+    paragraphs = [p.strip() for p in re.split(r'\n\s*\n', text) if p.strip()]
+    sections: List[List[str]] = []
+    size = 0
+
+    for paragraph in paragraphs:
+        first_line = paragraph.splitlines()[0].strip()
+        starts_section = bool(_HEADING.match(first_line)) and len(first_line.split()) <= 10
+        if not sections or starts_section or size + len(paragraph) > SECTION_TARGET_CHARS:
+            sections.append([])
+            size = 0
+        sections[-1].append(paragraph)
+        size += len(paragraph)
+
+    return ['\n\n'.join(s) for s in sections]
+
+
+def build_section_index(text: str, slides: List[Dict]) -> List[Dict[str, Any]]:
+    """Attribute each slide to the section whose vocabulary it overlaps most"""
+
+    sections = split_sections(text)
+    section_words = [set(_WORD.findall(s.lower())) for s in sections]
+    # Words shared by many sections say little about where a slide came from
+    document_frequency: Dict[str, int] = {}
+    for words in section_words:
+        for word in words:
+            document_frequency[word] = document_frequency.get(word, 0) + 1
+    index = [{'hash': hash_text(s), 'slides': []} for s in sections]
+    global_slides: List[int] = []
+
+    last_section = 0
+    for i, slide in enumerate(slides):
+        if slide.get('slide_type') in GLOBAL_SLIDE_TYPES or not sections:
+            global_slides.append(i)
+            continue
+
+        slide_text = ' '.join([str(slide.get('title', ''))] + [str(c) for c in slide.get('content', [])])
+        words = set(_WORD.findall(slide_text.lower()))
+        best, best_score = last_section, 0.0
+        # Slides follow document order, so never attribute backwards
+        for j in range(last_section, len(sections)):
+            if not words:
+                break
+            score = sum(1.0 / document_frequency[w] for w in words & section_words[j])
+            if score > best_score:
+                best, best_score = j, score
+        index[best]['slides'].append(i)
+        last_section = best
+
+    return [{'hash': s['hash'], 'slide_count': len(s['slides']), 'slides': s['slides']}
+            for s in index] + [{'hash': None, 'slide_count': len(global_slides), 'slides': global_slides}]
+
+
+def source_excerpt(text: str, slides: List[Dict], slide_index: int,
+                   section_index: Optional[List[Dict[str, Any]]] = None) -> str:
+    """The part of the source text a slide was made from
+
+    Content slides map to their section; deck-wide slides (title, conclusion)
+    get the opening or closing section of the document instead.
+    """
+
+    sections = split_sections(text)
+    if not sections:
+        return text[:SECTION_TARGET_CHARS]
+
+    # The stored index is reused only if it still describes this text and slide count
+    entries = [entry for entry in (section_index or []) if entry['hash'] is not None]
+    if len(entries) != len(sections) or \
+            sum(entry['slide_count'] for entry in section_index or []) != len(slides) or \
+            any(entry['hash'] != hash_text(section) for entry, section in zip(entries, sections)):
+        entries = build_section_index(text, slides)[:-1]
+
+    for entry, section in zip(entries, sections):
+        if slide_index in entry['slides']:
+            return section
+
+    if slides[slide_index].get('slide_type') == 'conclusion':
+        return sections[-1]
+    return sections[0]
+
+
+class IncrementalAnalyzer:
+    """Re-analyzes only the sections of a document that changed since the last submission"""
+
+    def __init__(self, llm_service):
+        self.llm_service = llm_service
+
+    def reanalyze(self,
+                  previous_text: str,
+                  previous_slides: List[Dict],
+                  previous_index: Optional[List[Dict]],
+                  text: str,
+                  guidance: str = "") -> Tuple[Deck, List[Dict], Dict[str, Any]]:
+        """Return (slides, section_index, stats) for the edited text"""
+
+        plan = self._plan(previous_text, previous_slides, previous_index, text)
+        if plan['stats']['full_reanalysis']:
+            slides = self.llm_service.analyze_text_for_slides(text, guidance)
+            return slides, build_section_index(text, slides), plan['stats']
+
+        results = [self.llm_service.analyze_section_for_slides(section, guidance, plan['titles'], count)
+                   for section, count in plan['jobs']]
+        return self._assemble(plan, previous_slides, results)
+
+    async def reanalyze_async(self,
+                              previous_text: str,
+                              previous_slides: List[Dict],
+                              previous_index: Optional[List[Dict]],
+                              text: str,
+                              guidance: str = "") -> Tuple[Deck, List[Dict], Dict[str, Any]]:
+        """Async variant of reanalyze; changed sections are analyzed concurrently"""
+
+        plan = self._plan(previous_text, previous_slides, previous_index, text)
+        if plan['stats']['full_reanalysis']:
+            slides = await self.llm_service.analyze_text_for_slides_async(text, guidance)
+            return slides, build_section_index(text, slides), plan['stats']
+
+        results = await gather_until_abandoned(*(
+            self.llm_service.analyze_section_for_slides_async(section, guidance, plan['titles'], count)
+            for section, count in plan['jobs']))
+        return self._assemble(plan, previous_slides, list(results))
+
+    def _plan(self, previous_text: str, previous_slides: List[Dict],
+              previous_index: Optional[List[Dict]], text: str) -> Dict[str, Any]:
+        """Diff the sections and list which ones need a new analysis"""
+
+        if not previous_index:
+            previous_index = build_section_index(previous_text, previous_slides)
+
+        old_sections = [s for s in previous_index if s['hash'] is not None]
+        global_entry = next((s for s in previous_index if s['hash'] is None),
+                            {'slides': []})
+        new_sections = split_sections(text)
+        new_hashes = [hash_text(s) for s in new_sections]
+        old_hashes = [s['hash'] for s in old_sections]
+
+        matcher = SequenceMatcher(a=old_hashes, b=new_hashes, autojunk=False)
+        opcodes = matcher.get_opcodes()
+        changed = sum(j2 - j1 for tag, _, _, j1, j2 in opcodes if tag != 'equal')
+
+        stats = {
+            'sections_total': len(new_sections),
+            'sections_changed': changed,
+            'sections_removed': sum(i2 - i1 for tag, i1, i2, _, _ in opcodes
+                                    if tag in ('delete', 'replace')),
+            'full_reanalysis': False
+        }
+        plan = {'stats': stats, 'new_hashes': new_hashes, 'global_entry': global_entry,
+                'titles': [s.get('title', '') for s in previous_slides],
+                'groups': [], 'jobs': []}
+
+        if new_sections and changed / len(new_sections) > MAX_CHANGED_RATIO:
+            logger.info(f"{changed}/{len(new_sections)} sections changed, running full analysis")
+            stats['full_reanalysis'] = True
+            return plan
+
+        # Each group is either a list of kept slide indices or the position of a job
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag == 'equal':
+                for old in old_sections[i1:i2]:
+                    plan['groups'].append(('keep', old['slides']))
+                continue
+
+            # Keep the deck roughly the same length where sections were replaced
+            budget = sum(s['slide_count'] for s in old_sections[i1:i2])
+            for j in range(j1, j2):
+                count = None
+                if budget and tag == 'replace':
+                    count = max(1, round(budget / (j2 - j1)))
+                plan['groups'].append(('job', len(plan['jobs'])))
+                plan['jobs'].append((new_sections[j], count))
+
+        return plan
+
+    def _assemble(self, plan: Dict[str, Any], previous_slides: List[Dict],
+                  results: List[List[Dict]]) -> Tuple[Deck, List[Dict], Dict[str, Any]]:
+        section_slides: List[List[Dict]] = []
+        for kind, value in plan['groups']:
+            if kind == 'keep':
+                section_slides.append([previous_slides[k] for k in value
+                                       if k < len(previous_slides)])
+            else:
+                section_slides.append(results[value])
+
+        # Section results may carry their own title/conclusion slides; drop them
+        section_slides = [[s for s in group if s.get('slide_type') not in GLOBAL_SLIDE_TYPES]
+                          for group in section_slides]
+        global_slides = [previous_slides[k] for k in plan['global_entry']['slides']
+                         if k < len(previous_slides)]
+        slides = self._splice(global_slides, section_slides)
+
+        index = []
+        position = sum(1 for s in global_slides if s.get('slide_type') == 'title')
+        for section_hash, group in zip(plan['new_hashes'], section_slides):
+            index.append({'hash': section_hash, 'slide_count': len(group),
+                          'slides': list(range(position, position + len(group)))})
+            position += len(group)
+        index.append({'hash': None, 'slide_count': len(global_slides),
+                      'slides': [i for i, s in enumerate(slides)
+                                 if s.get('slide_type') in GLOBAL_SLIDE_TYPES]})
+
+        return slides, index, plan['stats']
+
+    def _splice(self, global_slides: List[Dict], section_slides: List[List[Dict]]) -> Deck:
+        """Put title slides first, section slides in order, conclusions last, then renumber"""
+
+        openers = [s for s in global_slides if s.get('slide_type') == 'title']
+        closers = [s for s in global_slides if s.get('slide_type') != 'title']
+        body = [slide for group in section_slides for slide in group]
+
+        # Kept slides are shared with the previous deck rather than copied
+        return Deck.from_raw(openers + body + closers).renumbered()
@@ -0,0 +1,107 @@
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pptx.enum.shapes import PP_PLACEHOLDER
+from pptx.util import Inches
+
+logger = logging.getLogger(__name__)
+
+# (left, top, width, height) in EMU
+Rect = Tuple[int, int, int, int]
+
+# Footer-type placeholders are not copied onto new slides, so they take no space
+NON_CLONED_PLACEHOLDERS = (PP_PLACEHOLDER.DATE, PP_PLACEHOLDER.FOOTER, PP_PLACEHOLDER.SLIDE_NUMBER)
+
+EDGE_MARGIN = Inches(0.3)
+SHAPE_GAP = Inches(0.15)
+MIN_IMAGE_WIDTH = Inches(1.5)
+MIN_IMAGE_HEIGHT = Inches(1)
+# Shapes covering most of the slide are backgrounds, not obstacles
+BACKGROUND_FRACTION = 0.85
+
+
+def _contains(outer: Rect, inner: Rect) -> bool:
+    return (outer[0] <= inner[0] and outer[1] <= inner[1]
+            and outer[0] + outer[2] >= inner[0] + inner[2]
+            and outer[1] + outer[3] >= inner[1] + inner[3])
+
+
+def _prune(rects: List[Rect]) -> List[Rect]:
+    """Drop rectangles that are too small for an image or inside another one"""
+
+    rects = sorted({r for r in rects if r[2] >= MIN_IMAGE_WIDTH and r[3] >= MIN_IMAGE_HEIGHT},
+                   key=lambda r: r[2] * r[3], reverse=True)
+    kept: List[Rect] = []
+    for rect in rects:
+        if not any(_contains(other, rect) for other in kept):
+            kept.append(rect)
+    return kept
+
+
+def free_rectangles(slide_width: int, slide_height: int, occupied: Sequence[Rect],
+                    margin: int = EDGE_MARGIN, gap: int = SHAPE_GAP) -> List[Rect]:
+    """Maximal empty rectangles left on a slide after the occupied boxes, largest first"""
+
+    free = [(margin, margin, slide_width - 2 * margin, slide_height - 2 * margin)]
+    slide_area = slide_width * slide_height
+
+    for left, top, width, height in occupied:
+        if width <= 0 or height <= 0 or width * height >= BACKGROUND_FRACTION * slide_area:
+            continue
+        o_left, o_top = left - gap, top - gap
+        o_right, o_bottom = left + width + gap, top + height + gap
+
+        split: List[Rect] = []
+        for rect in free:
+            f_left, f_top, f_width, f_height = rect
+            f_right, f_bottom = f_left + f_width, f_top + f_height
+            if o_left >= f_right or o_right <= f_left or o_top >= f_bottom or o_bottom <= f_top:
+                split.append(rect)
+                continue
+            # Keep the (overlapping) strips of the free rectangle on each side of the obstacle
+            if o_left > f_left:
+                split.append((f_left, f_top, o_left - f_left, f_height))
+            if o_right < f_right:
+                split.append((o_right, f_top, f_right - o_right, f_height))
+            if o_top > f_top:
+                split.append((f_left, f_top, f_width, o_top - f_top))
+            if o_bottom < f_bottom:
+                split.append((f_left, o_bottom, f_width, f_bottom - o_bottom))
+        free = _prune(split)
+
+    return free
+
+
+def image_aspect(image_data: Dict, default: float = 4 / 3) -> float:
+    """Width/height of an image as it was placed in the template"""
+
+    width, height = image_data.get('width') or 0, image_data.get('height') or 0
+    return width / height if width > 0 and height > 0 else default
+
+
+def best_fit(free: Sequence[Rect], aspect: float, max_width: int, max_height: int) -> Optional[Rect]:
+    """Largest box with the image's aspect ratio that fits a free rectangle, centered in it"""
+
+    best = None
+    best_area = 0
+    for left, top, width, height in free:
+        box_width = min(width, max_width)
+        box_height = int(box_width / aspect)
+        limit_height = min(height, max_height)
+        if box_height > limit_height:
+            box_height = limit_height
+            box_width = int(box_height * aspect)
+        if box_width < MIN_IMAGE_WIDTH or box_height < MIN_IMAGE_HEIGHT:
+            continue
+        if box_width * box_height > best_area:
+            best_area = box_width * box_height
+            best = (left + (width - box_width) // 2, top + (height - box_height) // 2,
+                    box_width, box_height)
+    return best
+
+
+def layout_obstacles(placeholders: Sequence[Tuple[object, Rect]], shapes: Sequence[Rect]) -> List[Rect]:
+    """Boxes a slide built from this layout will have filled: placeholders plus static shapes"""
+
+    return [geometry for ph_type, geometry in placeholders
+            if ph_type not in NON_CLONED_PLACEHOLDERS] + list(shapes)
@@ -1,66 +1,150 @@
-import openai
-import anthropic
-import google.generativeai as genai
 import json
 import re
 import time
+import asyncio
+import hashlib
 import logging
-from typing import List, Dict, Any
-import requests
+from typing import List, Dict, Any, Optional, Tuple
+
+from .deadline import Deadline, DeadlineExceeded, gather_until_abandoned
+from .single_flight import SingleFlight
+from .slide_model import MAX_BULLETS, Deck, Slide
+from .token_accounting import (MAX_BULLET_WORDS, MAX_NOTES_WORDS, MAX_SLIDES, MIN_SLIDES,
+                               TokenUsage, compact_prompt, estimate_tokens, max_tokens_for_slides)
 
 logger = logging.getLogger(__name__)
 
+MODELS = {
+    'openai': 'gpt-3.5-turbo',
+    'anthropic': 'claude-3-sonnet-20240229',
+    'gemini': 'gemini-pro',
+    'local': None
+}
+
+# Speaker notes are 2-3 sentences
+NOTES_MAX_TOKENS = 200
+# Speaker-notes calls in flight at once for a single deck
+NOTES_CONCURRENCY = 8
+
+SYSTEM_PROMPT = "You are a presentation expert. Always respond with valid JSON only."
+
+# Identical provider calls in flight at the same time are made only once
+llm_flights = SingleFlight()
+
+
+def _local_engine():
+    # numpy is only imported once the extractive engine is actually needed
+    from .local_engine import LocalSlideEngine
+    return LocalSlideEngine()
+
 
 class LLMService:
-    def __init__(self, provider: str, api_key: str):
+    def __init__(self, provider: str, api_key: str, deadline: Optional[Deadline] = None):
         self.provider = provider.lower()
         self.api_key = api_key
+        # Retries, backoff and provider timeouts all stay inside the request's budget
+        self.deadline = deadline or Deadline()
+        self.model = MODELS.get(self.provider)
+        self.usage = TokenUsage()
+        self._async_client = None
         self._setup_client()
 
     def _setup_client(self):
-        """Initialize the appropriate LLM client"""
+        """Initialize the appropriate LLM client
+
+        Provider SDKs are imported here rather than at module load, so a request
+        only pays for the one SDK it uses. The key always travels with this
+        service, never through SDK-global config, since services are cached
+        and shared across requests with different keys.
+        """
         try:
             if self.provider == 'openai':
-                openai.api_key = self.api_key
+                import openai
+                # Passed as api_key on every call instead of setting openai.api_key
                 self.client = openai
             elif self.provider == 'anthropic':
+                import anthropic
                 self.client = anthropic.Anthropic(api_key=self.api_key)
             elif self.provider == 'gemini':
-                genai.configure(api_key=self.api_key)
-                self.client = genai.GenerativeModel('gemini-pro')
+                from google.ai import generativelanguage as glm
+                # The service client takes the key itself; genai.GenerativeModel only
+                # reads the process-wide key from genai.configure()
+                self.client = glm.GenerativeServiceClient(client_options={'api_key': self.api_key})
+            elif self.provider == 'local':
+                self.client = _local_engine()
             else:
                 raise ValueError(f"Unsupported provider: {self.provider}")
         except Exception as e:
             logger.error(f"Failed to setup LLM client: {e}")
             raise
 
-    def analyze_text_for_slides(self, text: str, guidance: str = "") -> List[Dict]:
+    def analyze_text_for_slides(self, text: str, guidance: str = "",
+                                slide_count: Optional[int] = None) -> Deck:
         """Analyze text and break it down into slides"""
 
-        prompt = self._create_analysis_prompt(text, guidance)
+        if self.provider == 'local':
+            return self._validate_slides(
+                self.client.generate_slides(text, guidance, slide_count))
+
+        prompt = self._create_analysis_prompt(text, guidance, slide_count)
+        # Without a requested count the model may use the whole range the prompt allows
+        max_tokens = max_tokens_for_slides(slide_count or MAX_SLIDES)
 
         try:
-            response = self._make_llm_call(prompt)
-            slides = self._parse_slide_response(response)
+            response = self._make_llm_call(prompt, max_tokens=max_tokens)
 
             # Validate and clean slides
-            slides = self._validate_slides(slides)
-
-            return slides
+            return self._validate_slides(self._parse_slide_response(response))
 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error analyzing text: {e}")
             # Fallback to simple text splitting
             return self._fallback_text_analysis(text)
 
-    def _create_analysis_prompt(self, text: str, guidance: str) -> str:
+    async def analyze_text_for_slides_async(self, text: str, guidance: str = "",
+                                            slide_count: Optional[int] = None,
+                                            fallback: bool = True) -> Deck:
+        """Async variant of analyze_text_for_slides; fallback=False raises provider errors"""
+
+        if self.provider == 'local':
+            # CPU-bound; keep it off the event loop
+            return await asyncio.to_thread(self.analyze_text_for_slides, text, guidance, slide_count)
+
+        prompt = self._create_analysis_prompt(text, guidance, slide_count)
+        # Without a requested count the model may use the whole range the prompt allows
+        max_tokens = max_tokens_for_slides(slide_count or MAX_SLIDES)
+
+        try:
+            response = await self._make_llm_call_async(prompt, max_tokens=max_tokens)
+            return self._validate_slides(self._parse_slide_response(response))
+
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"Error analyzing text: {e}")
+            if not fallback:
+                raise
+            return self._fallback_text_analysis(text)
+
+    def _create_analysis_prompt(self, text: str, guidance: str,
+                                slide_count: Optional[int] = None) -> str:
         """Create the prompt for text analysis"""
 
+        if slide_count:
+            count_guideline = f"Create exactly {slide_count} slides"
+        else:
+            count_guideline = f"Create {MIN_SLIDES}-{MAX_SLIDES} slides depending on content length"
+
+        # Truncate very long texts for the prompt
+        truncated = text[:5000] + ("..." if len(text) > 5000 else "")
+
         base_prompt = f"""
         Analyze the following text and break it down into a PowerPoint presentation structure.
         
         Text to analyze:
-        {text[:5000]}...  # Truncate very long texts for the prompt
+        {truncated}
         
         {"Guidance: " + guidance if guidance else ""}
         
@@ -74,57 +158,442 @@ class LLMService:
         }}
         
         Guidelines:
-        - Create 5-15 slides depending on content length
+        - {count_guideline}
         - Use clear, concise titles
         - Break content into logical bullet points
         - Include a title slide and conclusion slide
         - Vary slide types for better flow
-        - Keep bullet points under 15 words each
+        - Use at most {MAX_BULLETS} bullet points per slide
+        - Keep bullet points under {MAX_BULLET_WORDS} words each
+        - Keep speaker notes under {MAX_NOTES_WORDS} words
+        
+        Return ONLY the JSON array, no additional text.
+        """
+
+        return compact_prompt(base_prompt)
+
+    def analyze_section_for_slides(self, section_text: str, guidance: str = "",
+                                   deck_titles: Optional[List[str]] = None,
+                                   slide_count: Optional[int] = None) -> List[Dict]:
+        """Create content slides for one section of a larger document"""
+
+        if self.provider == 'local':
+            slides = self.client.generate_slides(section_text, guidance, slide_count)
+            return [s for s in self._validate_slides(slides) if s['slide_type'] != 'title']
+
+        prompt = self._create_section_prompt(section_text, guidance, deck_titles or [], slide_count)
+        max_tokens = max_tokens_for_slides(slide_count or 3)
+
+        try:
+            response = self._make_llm_call(prompt, max_tokens=max_tokens)
+            return self._validate_slides(self._parse_slide_response(response))
+
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"Error analyzing section: {e}")
+            slides = _local_engine().generate_slides(section_text, slide_count=slide_count)
+            return [s for s in self._validate_slides(slides) if s['slide_type'] != 'title']
+
+    async def analyze_section_for_slides_async(self, section_text: str, guidance: str = "",
+                                               deck_titles: Optional[List[str]] = None,
+                                               slide_count: Optional[int] = None) -> List[Dict]:
+        """Async variant of analyze_section_for_slides"""
+
+        if self.provider == 'local':
+            return await asyncio.to_thread(self.analyze_section_for_slides, section_text,
+                                           guidance, deck_titles, slide_count)
+
+        prompt = self._create_section_prompt(section_text, guidance, deck_titles or [], slide_count)
+        max_tokens = max_tokens_for_slides(slide_count or 3)
+
+        try:
+            response = await self._make_llm_call_async(prompt, max_tokens=max_tokens)
+            return self._validate_slides(self._parse_slide_response(response))
+
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"Error analyzing section: {e}")
+            slides = _local_engine().generate_slides(section_text, slide_count=slide_count)
+            return [s for s in self._validate_slides(slides) if s['slide_type'] != 'title']
+
+    def _create_section_prompt(self, section_text: str, guidance: str,
+                               deck_titles: List[str], slide_count: Optional[int]) -> str:
+        """Create the prompt for re-analyzing a single section"""
+
+        if slide_count:
+            count_guideline = f"Create exactly {slide_count} slide{'s' if slide_count > 1 else ''}"
+        else:
+            count_guideline = "Create 1-3 slides"
+
+        prompt = f"""
+        The following excerpt is one section of a longer document that is being turned into a PowerPoint presentation.
+        
+        Existing slide titles in the deck: {"; ".join(deck_titles[:30])}
+        
+        Excerpt:
+        {section_text[:5000]}
+        
+        {"Guidance: " + guidance if guidance else ""}
+        
+        Return a JSON array of content slides for this excerpt only, each with this structure:
+        {{"slide_number": 1, "slide_type": "content", "title": "Slide title", "content": ["Bullet point 1", ...], "notes": ""}}
+        
+        Guidelines:
+        - {count_guideline}
+        - Do not add title, agenda or conclusion slides
+        - Match the tone of the existing titles and avoid repeating them
+        - Use at most {MAX_BULLETS} bullet points per slide
+        - Keep bullet points under {MAX_BULLET_WORDS} words each
         
         Return ONLY the JSON array, no additional text.
         """
 
-        return base_prompt
+        return compact_prompt(prompt)
+
+    def regenerate_slide(self, slide: Slide, source_excerpt: str, neighbor_titles: Tuple[str, str],
+                         guidance: str = "", instructions: str = "", fallback: bool = True) -> Slide:
+        """Rewrite one slide from its source excerpt, keeping its place in the deck
+
+        With fallback=False a provider failure raises instead of returning an
+        extractive rewrite from the local engine.
+        """
+
+        if self.provider == 'local':
+            return self._local_regenerated_slide(slide, source_excerpt)
+
+        prompt = self._create_slide_prompt(slide, source_excerpt, neighbor_titles, guidance, instructions)
+
+        try:
+            response = self._make_llm_call(prompt, max_tokens=max_tokens_for_slides(1))
+            return self._regenerated_slide(slide, response)
+
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"Error regenerating slide: {e}")
+            if not fallback:
+                raise
+            return self._local_regenerated_slide(slide, source_excerpt)
+
+    async def regenerate_slide_async(self, slide: Slide, source_excerpt: str,
+                                     neighbor_titles: Tuple[str, str],
+                                     guidance: str = "", instructions: str = "",
+                                     fallback: bool = True) -> Slide:
+        """Async variant of regenerate_slide"""
+
+        if self.provider == 'local':
+            return self._local_regenerated_slide(slide, source_excerpt)
+
+        prompt = self._create_slide_prompt(slide, source_excerpt, neighbor_titles, guidance, instructions)
 
-    def _make_llm_call(self, prompt: str, max_retries: int = 3) -> str:
+        try:
+            response = await self._make_llm_call_async(prompt, max_tokens=max_tokens_for_slides(1))
+            return self._regenerated_slide(slide, response)
+
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"Error regenerating slide: {e}")
+            if not fallback:
+                raise
+            return self._local_regenerated_slide(slide, source_excerpt)
+
+    def _create_slide_prompt(self, slide: Slide, source_excerpt: str, neighbor_titles: Tuple[str, str],
+                             guidance: str, instructions: str) -> str:
+        """Create the prompt for rewriting a single slide"""
+
+        previous_title, next_title = neighbor_titles
+        prompt = f"""
+        You are revising one slide of a PowerPoint presentation.
+        
+        Previous slide: {previous_title or "(none, this is the first slide)"}
+        Next slide: {next_title or "(none, this is the last slide)"}
+        
+        Current slide ({slide.slide_type}):
+        Title: {slide.title}
+        Content: {list(slide.content)}
+        
+        Source excerpt:
+        {source_excerpt[:3000]}
+        
+        {"Guidance: " + guidance if guidance else ""}
+        {"Requested change: " + instructions if instructions else ""}
+        
+        Return a JSON array containing exactly one slide with this structure:
+        {{"slide_number": {slide.slide_number}, "slide_type": "{slide.slide_type}", "title": "Slide title", "content": ["Bullet point 1", ...], "notes": ""}}
+        
+        Guidelines:
+        - Cover the same part of the source and fit between the neighboring slides
+        - Use 3-6 bullet points, each under {MAX_BULLET_WORDS} words
+        - Do not repeat the neighboring slide titles
+        
+        Return ONLY the JSON array, no additional text.
+        """
+
+        return compact_prompt(prompt)
+
+    def _regenerated_slide(self, original: Slide, response: str) -> Slide:
+        parsed = self._parse_slide_response(response)
+        candidates = Deck.from_raw(parsed if isinstance(parsed, list) else [parsed])
+        if not candidates:
+            raise ValueError("No slide in LLM response")
+        # Position and type stay; notes described the old content
+        return candidates[0].replace(slide_number=original.slide_number,
+                                     slide_type=original.slide_type, notes='')
+
+    def _local_regenerated_slide(self, original: Slide, source_excerpt: str) -> Slide:
+        engine = self.client if self.provider == 'local' else _local_engine()
+        slides = Deck.from_raw(engine.generate_slides(source_excerpt, slide_count=2))
+        candidate = next((s for s in slides if s.slide_type != 'title'), None) or \
+            (slides[0] if slides else original)
+        return candidate.replace(slide_number=original.slide_number,
+                                 slide_type=original.slide_type, notes='')
+
+    def _flight_key(self, prompt: str, max_tokens: int):
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        # Only callers with the same key share a call, so nobody rides on another's credentials
+        key_digest = hashlib.sha256(self.api_key.encode('utf-8')).hexdigest()
+        return (self.provider, self.model, max_tokens, key_digest, digest)
+
+    def _make_llm_call(self, prompt: str, max_retries: int = 3, max_tokens: int = 2000) -> str:
+        """Make API call to the LLM, sharing the result with identical calls already in flight"""
+
+        try:
+            text, shared = llm_flights.do(
+                self._flight_key(prompt, max_tokens),
+                lambda: self._call_with_retries(prompt, max_retries, max_tokens),
+                timeout=self.deadline.remaining())
+        except TimeoutError:
+            # Waited on the shared call for the rest of our budget
+            self.deadline.check(f"shared {self.provider} call")
+            raise DeadlineExceeded("deadline exceeded waiting for a shared call", self.deadline)
+        except DeadlineExceeded as e:
+            if e.deadline is self.deadline:
+                raise
+            # The call we joined was abandoned by its own request; ours still has time
+            return self._call_with_retries(prompt, max_retries, max_tokens)
+        if shared:
+            logger.info(f"Joined an identical in-flight {self.provider} call")
+        return text
+
+    async def _make_llm_call_async(self, prompt: str, max_retries: int = 3, max_tokens: int = 2000) -> str:
+        """Async variant of _make_llm_call; waiting on the provider does not hold a thread"""
+
+        try:
+            # Followers only wait on the leader, so they need their own deadline too.
+            # A leader cancelled by its deadline tells followers so with that deadline,
+            # which sends them down the retry path below
+            text, shared = await self.deadline.run(llm_flights.do_async(
+                self._flight_key(prompt, max_tokens),
+                lambda: self._call_with_retries_async(prompt, max_retries, max_tokens),
+                lambda: DeadlineExceeded(f"shared {self.provider} call abandoned: "
+                                         f"{self.deadline.reason or 'cancelled'}", self.deadline)),
+                f"shared {self.provider} call")
+        except DeadlineExceeded as e:
+            if e.deadline is self.deadline:
+                raise
+            # The call we joined was abandoned by its own request; ours still has time
+            return await self._call_with_retries_async(prompt, max_retries, max_tokens)
+        if shared:
+            logger.info(f"Joined an identical in-flight {self.provider} call")
+        return text
+
+    def _call_with_retries(self, prompt: str, max_retries: int, max_tokens: int) -> str:
         """Make API call to the LLM with retry logic"""
 
         for attempt in range(max_retries):
+            self.deadline.check(f"{self.provider} call")
             try:
                 if self.provider == 'openai':
                     response = self.client.ChatCompletion.create(
-                        model="gpt-3.5-turbo",
+                        model=self.model,
                         messages=[
-                            {"role": "system", "content": "You are a presentation expert. Always respond with valid JSON only."},
+                            {"role": "system", "content": SYSTEM_PROMPT},
                             {"role": "user", "content": prompt}
                         ],
-                        max_tokens=2000,
-                        temperature=0.7
+                        max_tokens=max_tokens,
+                        temperature=0.7,
+                        api_key=self.api_key,
+                        **self._provider_timeout()
                     )
-                    return response.choices[0].message.content
+                    text = response.choices[0].message.content
+                    self._record_usage(prompt, text, max_tokens,
+                                       getattr(response, 'usage', None),
+                                       'prompt_tokens', 'completion_tokens')
+                    return text
 
                 elif self.provider == 'anthropic':
                     response = self.client.messages.create(
-                        model="claude-3-sonnet-20240229",
-                        max_tokens=2000,
+                        model=self.model,
+                        max_tokens=max_tokens,
                         temperature=0.7,
                         messages=[
                             {"role": "user", "content": prompt}
-                        ]
+                        ],
+                        **self._provider_timeout()
                     )
-                    return response.content[0].text
+                    text = response.content[0].text
+                    self._record_usage(prompt, text, max_tokens,
+                                       getattr(response, 'usage', None),
+                                       'input_tokens', 'output_tokens')
+                    return text
 
                 elif self.provider == 'gemini':
-                    response = self.client.generate_content(prompt)
-                    return response.text
+                    response = self.client.generate_content(
+                        self._gemini_request(prompt, max_tokens),
+                        **self._provider_timeout()
+                    )
+                    text = self._gemini_text(response)
+                    self._record_usage(prompt, text, max_tokens,
+                                       getattr(response, 'usage_metadata', None),
+                                       'prompt_token_count', 'candidates_token_count')
+                    return text
 
             except Exception as e:
                 logger.warning(f"LLM call attempt {attempt + 1} failed: {e}")
                 if attempt < max_retries - 1:
+                    self._check_backoff(2 ** attempt)
                     time.sleep(2 ** attempt)  # Exponential backoff
                 else:
                     raise
 
+    def _get_async_client(self):
+        """Async-capable client for the provider, created on first use"""
+        if self._async_client is None:
+            if self.provider == 'anthropic':
+                import anthropic
+                self._async_client = anthropic.AsyncAnthropic(api_key=self.api_key)
+            elif self.provider == 'gemini':
+                from google.ai import generativelanguage as glm
+                self._async_client = glm.GenerativeServiceAsyncClient(
+                    client_options={'api_key': self.api_key})
+            else:
+                # openai takes the key per call and exposes async methods on the module
+                self._async_client = self.client
+        return self._async_client
+
+    async def _call_with_retries_async(self, prompt: str, max_retries: int, max_tokens: int) -> str:
+        client = self._get_async_client()
+        stage = f"{self.provider} call"
+        for attempt in range(max_retries):
+            try:
+                if self.provider == 'openai':
+                    response = await self.deadline.run(client.ChatCompletion.acreate(
+                        model=self.model,
+                        messages=[
+                            {"role": "system", "content": SYSTEM_PROMPT},
+                            {"role": "user", "content": prompt}
+                        ],
+                        max_tokens=max_tokens,
+                        temperature=0.7,
+                        api_key=self.api_key
+                    ), stage)
+                    text = response.choices[0].message.content
+                    self._record_usage(prompt, text, max_tokens,
+                                       getattr(response, 'usage', None),
+                                       'prompt_tokens', 'completion_tokens')
+                    return text
+
+                elif self.provider == 'anthropic':
+                    response = await self.deadline.run(client.messages.create(
+                        model=self.model,
+                        max_tokens=max_tokens,
+                        temperature=0.7,
+                        messages=[
+                            {"role": "user", "content": prompt}
+                        ]
+                    ), stage)
+                    text = response.content[0].text
+                    self._record_usage(prompt, text, max_tokens,
+                                       getattr(response, 'usage', None),
+                                       'input_tokens', 'output_tokens')
+                    return text
+
+                elif self.provider == 'gemini':
+                    response = await self.deadline.run(client.generate_content(
+                        self._gemini_request(prompt, max_tokens)
+                    ), stage)
+                    text = self._gemini_text(response)
+                    self._record_usage(prompt, text, max_tokens,
+                                       getattr(response, 'usage_metadata', None),
+                                       'prompt_token_count', 'candidates_token_count')
+                    return text
+
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                logger.warning(f"LLM call attempt {attempt + 1} failed: {e}")
+                if attempt < max_retries - 1:
+                    self._check_backoff(2 ** attempt)
+                    await self.deadline.run(asyncio.sleep(2 ** attempt), stage)  # Exponential backoff
+                else:
+                    raise
+
+    def _provider_timeout(self) -> Dict[str, Any]:
+        """SDK timeout argument for a blocking call, so it cannot outlive the request"""
+        remaining = self.deadline.remaining()
+        if remaining is None:
+            return {}
+        if self.provider == 'openai':
+            return {'request_timeout': remaining}
+        if self.provider == 'anthropic':
+            return {'timeout': remaining}
+        if self.provider == 'gemini':
+            return {'timeout': remaining}
+        return {}
+
+    def _gemini_request(self, prompt: str, max_tokens: int):
+        """A generate_content request for the service client, as GenerativeModel would build it"""
+        from google.ai import generativelanguage as glm
+        return glm.GenerateContentRequest(
+            model=f"models/{self.model}",
+            contents=[glm.Content(role='user', parts=[glm.Part(text=prompt)])],
+            generation_config=glm.GenerationConfig(max_output_tokens=max_tokens)
+        )
+
+    @staticmethod
+    def _gemini_text(response) -> str:
+        """The first candidate's text, or why there is none"""
+        if not response.candidates or not response.candidates[0].content.parts:
+            reason = (response.candidates[0].finish_reason.name if response.candidates
+                      else response.prompt_feedback.block_reason.name)
+            raise ValueError(f"Gemini returned no text ({reason})")
+        return ''.join(part.text for part in response.candidates[0].content.parts)
+
+    def _check_backoff(self, seconds: float):
+        # A retry that could only start after the deadline is not worth waiting for
+        if not self.deadline.allows(seconds):
+            self.deadline.check("retry backoff")
+            raise DeadlineExceeded("deadline exceeded before the next retry", self.deadline)
+
+    def _record_usage(self, prompt: str, response_text: str, max_tokens: int,
+                      usage, input_field: str, output_field: str):
+        """Record token usage, preferring provider-reported counts over local estimates"""
+        input_tokens = self._usage_value(usage, input_field)
+        output_tokens = self._usage_value(usage, output_field)
+        estimated = input_tokens is None or output_tokens is None
+
+        if input_tokens is None:
+            input_tokens = estimate_tokens(prompt)
+        if output_tokens is None:
+            output_tokens = estimate_tokens(response_text)
+
+        self.usage.record(self.provider, self.model, input_tokens,
+                          output_tokens, max_tokens, estimated)
+
+    @staticmethod
+    def _usage_value(usage, field: str) -> Optional[int]:
+        """Read a token count from a provider usage object or dict"""
+        if usage is None:
+            return None
+        if isinstance(usage, dict):
+            value = usage.get(field)
+        else:
+            value = getattr(usage, field, None)
+        return value if isinstance(value, int) else None
+
     def _parse_slide_response(self, response: str) -> List[Dict]:
         """Parse the LLM response into slide data"""
         try:
@@ -144,82 +613,22 @@ class LLMService:
                 f"Failed to parse LLM response as JSON: {response[:200]}...")
             raise ValueError("Invalid JSON response from LLM")
 
-    def _validate_slides(self, slides: List[Dict]) -> List[Dict]:
+    def _validate_slides(self, slides: List[Dict]) -> Deck:
         """Validate and clean slide data"""
-        validated_slides = []
-
-        for i, slide in enumerate(slides):
-            try:
-                validated_slide = {
-                    "slide_number": slide.get("slide_number", i + 1),
-                    "slide_type": slide.get("slide_type", "content"),
-                    "title": slide.get("title", f"Slide {i + 1}"),
-                    "content": slide.get("content", []),
-                    "notes": slide.get("notes", "")
-                }
-
-                # Ensure content is a list
-                if isinstance(validated_slide["content"], str):
-                    validated_slide["content"] = [validated_slide["content"]]
-                elif not isinstance(validated_slide["content"], list):
-                    validated_slide["content"] = []
-
-                # Limit bullet points
-                validated_slide["content"] = validated_slide["content"][:8]
-
-                # Clean up text
-                validated_slide["title"] = str(validated_slide["title"])[:100]
-                validated_slide["content"] = [
-                    str(item)[:200] for item in validated_slide["content"]]
-
-                validated_slides.append(validated_slide)
-
-            except Exception as e:
-                logger.warning(f"Error validating slide {i}: {e}")
-                continue
+        deck = Deck.from_raw(slides)
 
         # Ensure we have at least one slide
-        if not validated_slides:
-            return self._create_default_slide()
+        if not deck:
+            return Deck.from_raw(self._create_default_slide())
 
-        return validated_slides
+        return deck
 
-    def _fallback_text_analysis(self, text: str) -> List[Dict]:
-        """Simple fallback when LLM fails"""
+    def _fallback_text_analysis(self, text: str) -> Deck:
+        """Extractive fallback when LLM fails"""
         logger.info("Using fallback text analysis")
 
-        # Split text into paragraphs
-        paragraphs = [p.strip() for p in text.split('\n\n') if p.strip()]
-
-        slides = []
-
-        # Title slide
-        first_line = text.split('\n')[0][:100]
-        slides.append({
-            "slide_number": 1,
-            "slide_type": "title",
-            "title": first_line or "Presentation",
-            "content": [],
-            "notes": ""
-        })
-
-        # Content slides
-        slides_per_paragraph = max(
-            1, len(paragraphs) // 8)  # Aim for ~8 slides max
-
-        for i, paragraph in enumerate(paragraphs[::slides_per_paragraph]):
-            sentences = [s.strip()
-                         for s in paragraph.split('.') if s.strip()][:5]
-
-            slides.append({
-                "slide_number": len(slides) + 1,
-                "slide_type": "content",
-                "title": f"Key Point {i + 1}",
-                "content": sentences,
-                "notes": paragraph[:200] + "..."
-            })
-
-        return slides
+        engine = self.client if self.provider == 'local' else _local_engine()
+        return self._validate_slides(engine.generate_slides(text))
 
     def _create_default_slide(self) -> List[Dict]:
         """Create a default slide when everything fails"""
@@ -231,43 +640,92 @@ class LLMService:
             "notes": "Please review and edit this presentation manually."
         }]
 
-    def generate_speaker_notes(self, slides: List[Dict], guidance: str = "") -> List[Dict]:
+    def generate_speaker_notes(self, slides: List[Dict], guidance: str = "") -> Deck:
         """Generate speaker notes for each slide"""
 
-        for slide in slides:
-            if slide.get('notes'):
+        deck = Deck.from_raw(slides)
+        if self.provider == 'local':
+            return self._local_speaker_notes(deck)
+
+        notes = {}
+        for i, slide in enumerate(deck):
+            if slide.notes:
                 continue  # Skip if notes already exist
 
+            self.deadline.check("speaker notes")
             try:
-                notes_prompt = f"""
-                Generate speaker notes for this slide:
-                Title: {slide['title']}
-                Content: {slide['content']}
-                
-                {"Context: " + guidance if guidance else ""}
-                
-                Provide 2-3 sentences of speaker notes that expand on the slide content.
-                Make it natural and conversational. Return only the notes text.
-                """
-
-                notes = self._make_llm_call(notes_prompt)
-                slide['notes'] = notes.strip()
+                notes[i] = self._make_llm_call(
+                    self._notes_prompt(slide, guidance), max_tokens=NOTES_MAX_TOKENS).strip()
 
+            except DeadlineExceeded:
+                raise
             except Exception as e:
                 logger.warning(
-                    f"Failed to generate notes for slide {slide['slide_number']}: {e}")
-                slide['notes'] = f"Notes for: {slide['title']}"
+                    f"Failed to generate notes for slide {slide.slide_number}: {e}")
+                notes[i] = f"Notes for: {slide.title}"
+
+        return deck.with_notes(notes)
+
+    async def generate_speaker_notes_async(self, slides: List[Dict], guidance: str = "",
+                                           concurrency: int = NOTES_CONCURRENCY,
+                                           fallback: bool = True) -> Deck:
+        """Async variant of generate_speaker_notes; slides are written concurrently
+
+        With fallback=False a failed slide raises instead of getting placeholder notes.
+        """
 
-        return slides
+        deck = Deck.from_raw(slides)
+        if self.provider == 'local':
+            return self._local_speaker_notes(deck)
+
+        semaphore = asyncio.Semaphore(concurrency)
+        notes = {}
+
+        async def write_notes(i: int, slide):
+            async with semaphore:
+                try:
+                    notes[i] = (await self._make_llm_call_async(
+                        self._notes_prompt(slide, guidance), max_tokens=NOTES_MAX_TOKENS)).strip()
+
+                except DeadlineExceeded:
+                    raise
+                except Exception as e:
+                    logger.warning(
+                        f"Failed to generate notes for slide {slide.slide_number}: {e}")
+                    if not fallback:
+                        raise
+                    notes[i] = f"Notes for: {slide.title}"
+
+        await gather_until_abandoned(*(write_notes(i, slide) for i, slide in enumerate(deck) if not slide.notes))
+        return deck.with_notes(notes)
+
+    def _local_speaker_notes(self, deck: Deck) -> Deck:
+        # No model to write prose; fall back to the slide's own content
+        return deck.with_notes({
+            i: '. '.join(str(item).rstrip('.') for item in slide.content) or slide.title
+            for i, slide in enumerate(deck) if not slide.notes
+        })
+
+    def _notes_prompt(self, slide: Dict, guidance: str) -> str:
+        return compact_prompt(f"""
+        Generate speaker notes for this slide:
+        Title: {slide['title']}
+        Content: {list(slide['content'])}
+        
+        {"Context: " + guidance if guidance else ""}
+        
+        Provide 2-3 sentences of speaker notes that expand on the slide content.
+        Make it natural and conversational. Return only the notes text.
+        """)
 
     def suggest_presentation_improvements(self, slides: List[Dict]) -> Dict[str, Any]:
         """Suggest improvements to the presentation structure"""
 
         try:
-            improvement_prompt = f"""
+            improvement_prompt = compact_prompt(f"""
             Analyze this presentation structure and suggest improvements:
             
-            {json.dumps(slides, indent=2)}
+            {Deck.from_raw(slides).to_json()}
             
             Provide suggestions for:
             1. Better slide organization
@@ -276,7 +734,7 @@ class LLMService:
             4. Slides that could be merged or split
             
             Return as JSON with keys: organization, content, additions, modifications
-            """
+            """)
 
             response = self._make_llm_call(improvement_prompt)
             return json.loads(response)
@@ -0,0 +1,341 @@
+import re
+import logging
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further
+had has have having he her here hers herself him himself his how i if in into is it its itself
+just me more most my myself no nor not now of off on once only or other our ours ourselves out
+over own same she should so some such than that the their theirs them themselves then there
+these they this those through to too under until up very was we were what when where which
+while who whom why will with would you your yours yourself yourselves also may might must
+shall us via per within without however therefore thus
+""".split())
+
+ABBREVIATIONS = ('e.g.', 'i.e.', 'etc.', 'vs.', 'mr.', 'mrs.', 'ms.', 'dr.', 'prof.',
+                 'inc.', 'ltd.', 'no.', 'fig.', 'approx.')
+
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])["\')\]]*\s+(?=["\'(\[]?[A-Z0-9])')
+_WORD = re.compile(r"[a-z][a-z0-9'-]+")
+_MARKDOWN_HEADING = re.compile(r'^#{1,6}\s+(.+?)\s*#*$')
+_NUMBERED_HEADING = re.compile(r'^(?:\d+(?:\.\d+)*[.)]?|[IVX]+\.)\s+(\S.*)$')
+_BULLET = re.compile(r'^\s*(?:[-*•]|\d+[.)])\s+')
+
+MAX_HEADING_LENGTH = 80
+MAX_BULLETS = 5
+MAX_BULLET_WORDS = 20
+DAMPING = 0.85
+TEXTRANK_ITERATIONS = 30
+# Paragraphs longer than this are chunked before topic segmentation
+MAX_PARAGRAPH_SENTENCES = 8
+CHUNK_SENTENCES = 5
+
+
+class LocalSlideEngine:
+    """Extractive text-to-slides engine that runs without an LLM"""
+
+    def __init__(self, min_slides: int = 5, max_slides: int = 15):
+        self.min_slides = min_slides
+        self.max_slides = max_slides
+
+    def generate_slides(self, text: str, guidance: str = "",
+                        slide_count: Optional[int] = None) -> List[Dict]:
+        """Turn raw text into slide dicts matching the LLM output schema"""
+
+        blocks = self._split_blocks(text)
+        if not blocks:
+            return []
+
+        title, blocks = self._extract_title(blocks)
+        sections = self._group_sections(blocks, slide_count)
+
+        sentences, owners = [], []
+        for section_idx, (_, paragraphs) in enumerate(sections):
+            for paragraph in paragraphs:
+                for sentence in self.split_sentences(paragraph):
+                    sentences.append(sentence)
+                    owners.append(section_idx)
+
+        scores = self._textrank(sentences) if sentences else np.zeros(0)
+        owners_arr = np.asarray(owners, dtype=np.int32)
+
+        slides = [{
+            "slide_number": 1,
+            "slide_type": "title",
+            "title": title,
+            "content": [guidance[:200]] if guidance else [],
+            "notes": ""
+        }]
+
+        for section_idx, (heading, paragraphs) in enumerate(sections):
+            indices = np.flatnonzero(owners_arr == section_idx)
+            if indices.size == 0:
+                continue
+
+            ranked = indices[np.argsort(-scores[indices], kind='stable')]
+            chosen = np.sort(ranked[:MAX_BULLETS])
+            bullets = [self._shorten(sentences[i]) for i in chosen]
+
+            slides.append({
+                "slide_number": len(slides) + 1,
+                "slide_type": "content",
+                "title": heading or self._keyword_title(
+                    [sentences[i] for i in indices]),
+                "content": bullets,
+                "notes": ' '.join(sentences[i] for i in ranked[:3])[:500]
+            })
+
+        if len(sentences) > MAX_BULLETS and len(slides) > 2:
+            top = np.sort(np.argsort(-scores, kind='stable')[:4])
+            slides.append({
+                "slide_number": len(slides) + 1,
+                "slide_type": "conclusion",
+                "title": "Key Takeaways",
+                "content": [self._shorten(sentences[i]) for i in top],
+                "notes": ""
+            })
+
+        return slides
+
+    def split_sentences(self, paragraph: str) -> List[str]:
+        """Split a paragraph into sentences, keeping common abbreviations intact"""
+
+        paragraph = ' '.join(paragraph.split())
+        if not paragraph:
+            return []
+
+        pieces = _SENTENCE_BOUNDARY.split(paragraph)
+        sentences: List[str] = []
+        for piece in pieces:
+            if sentences and sentences[-1].lower().endswith(ABBREVIATIONS):
+                sentences[-1] = f"{sentences[-1]} {piece}"
+            else:
+                sentences.append(piece)
+
+        return [s.strip() for s in sentences if len(s.strip()) > 2]
+
+    def _split_blocks(self, text: str) -> List[Tuple[str, str]]:
+        """Split text into ('heading' | 'paragraph', text) blocks"""
+
+        blocks: List[Tuple[str, str]] = []
+        buffer: List[str] = []
+
+        def flush():
+            if buffer:
+                blocks.append(('paragraph', ' '.join(buffer)))
+                buffer.clear()
+
+        for raw_line in text.splitlines():
+            line = raw_line.strip()
+            if not line:
+                flush()
+                continue
+
+            heading = self._detect_heading(line)
+            if heading:
+                flush()
+                blocks.append(('heading', heading))
+            elif _BULLET.match(line):
+                # Each list item stands on its own as a sentence
+                flush()
+                item = _BULLET.sub('', line)
+                if item and item[-1] not in '.!?':
+                    item += '.'
+                blocks.append(('paragraph', item))
+            else:
+                buffer.append(line)
+        flush()
+
+        return blocks
+
+    def _detect_heading(self, line: str) -> Optional[str]:
+        """Return the heading text if a line looks like a heading"""
+
+        match = _MARKDOWN_HEADING.match(line)
+        if match:
+            return match.group(1)
+
+        if len(line) > MAX_HEADING_LENGTH or line[-1] in '.!?,;':
+            return None
+
+        match = _NUMBERED_HEADING.match(line)
+        if match and len(match.group(1).split()) <= 10:
+            return match.group(1).rstrip(':')
+
+        words = line.rstrip(':').split()
+        if not words or len(words) > 10:
+            return None
+
+        if line.endswith(':') or line.isupper():
+            return line.rstrip(':').title() if line.isupper() else line.rstrip(':')
+
+        significant = [w for w in words if w.lower() not in STOPWORDS]
+        if significant and all(w[0].isupper() or not w[0].isalpha() for w in significant):
+            return line
+
+        return None
+
+    def _extract_title(self, blocks: List[Tuple[str, str]]) -> Tuple[str, List[Tuple[str, str]]]:
+        """Use the leading heading as the deck title when there is one"""
+
+        kind, value = blocks[0]
+        if kind == 'heading':
+            return value[:100], blocks[1:]
+
+        first_sentence = self.split_sentences(value)
+        title = first_sentence[0] if first_sentence else value
+        return self._shorten(title, 12).rstrip('.')[:100] or "Presentation", blocks
+
+    def _group_sections(self, blocks: List[Tuple[str, str]],
+                        slide_count: Optional[int]) -> List[Tuple[Optional[str], List[str]]]:
+        """Group paragraphs under headings, falling back to topic segmentation"""
+
+        sections: List[Tuple[Optional[str], List[str]]] = []
+        for kind, value in blocks:
+            if kind == 'heading':
+                sections.append((value, []))
+            elif sections:
+                sections[-1][1].append(value)
+            else:
+                sections.append((None, [value]))
+
+        # Drop headings that had nothing under them
+        sections = [(h, self._chunk_paragraphs(p)) for h, p in sections if p]
+
+        # Leave room for the title and takeaway slides
+        target = (slide_count - 2) if slide_count else None
+        if target is None:
+            target = max(self.min_slides - 2, min(self.max_slides - 2, len(sections)))
+        target = max(1, target)
+
+        if len(sections) < target:
+            total = sum(len(p) for _, p in sections)
+            expanded: List[Tuple[Optional[str], List[str]]] = []
+            for heading, paragraphs in sections:
+                share = max(1, round(target * len(paragraphs) / total))
+                for i, group in enumerate(self._segment_topics(paragraphs, share)):
+                    expanded.append((heading if i == 0 else None, group))
+            sections = expanded
+
+        return self._merge_smallest(sections, target)
+
+    def _chunk_paragraphs(self, paragraphs: List[str]) -> List[str]:
+        """Break run-on paragraphs into a few sentences each so they can be segmented"""
+
+        chunked = []
+        for paragraph in paragraphs:
+            sentences = self.split_sentences(paragraph)
+            if len(sentences) <= MAX_PARAGRAPH_SENTENCES:
+                chunked.append(paragraph)
+                continue
+            for start in range(0, len(sentences), CHUNK_SENTENCES):
+                chunked.append(' '.join(sentences[start:start + CHUNK_SENTENCES]))
+        return chunked
+
+    def _segment_topics(self, paragraphs: List[str], groups: int) -> List[List[str]]:
+        """Split consecutive paragraphs at the weakest similarity boundaries"""
+
+        if groups <= 1 or len(paragraphs) <= 1:
+            return [paragraphs]
+
+        matrix = self._tfidf(paragraphs)
+        adjacent = np.einsum('ij,ij->i', matrix[:-1], matrix[1:])
+        cuts = np.argsort(adjacent, kind='stable')[:groups - 1]
+
+        result, start = [], 0
+        for cut in sorted(int(c) + 1 for c in cuts):
+            result.append(paragraphs[start:cut])
+            start = cut
+        result.append(paragraphs[start:])
+        return [r for r in result if r]
+
+    def _merge_smallest(self, sections, target: int):
+        """Merge untitled sections into their predecessor until within the slide budget"""
+
+        sections = [(h, list(p)) for h, p in sections]
+        while len(sections) > target and len(sections) > 1:
+            sizes = [sum(len(p) for p in paras) for _, paras in sections]
+            candidates = [i for i in range(1, len(sections)) if sections[i][0] is None]
+            if not candidates:
+                candidates = list(range(1, len(sections)))
+            idx = min(candidates, key=lambda i: sizes[i] + sizes[i - 1])
+            heading, paragraphs = sections.pop(idx)
+            prev_heading, prev_paragraphs = sections[idx - 1]
+            sections[idx - 1] = (prev_heading or heading, prev_paragraphs + paragraphs)
+        return sections
+
+    def _tokenize(self, text: str) -> List[str]:
+        return [w for w in _WORD.findall(text.lower()) if w not in STOPWORDS]
+
+    def _tfidf(self, documents: List[str]) -> np.ndarray:
+        """L2-normalized TF-IDF matrix (documents x vocabulary)"""
+
+        tokenized = [self._tokenize(d) for d in documents]
+        vocabulary: Dict[str, int] = {}
+        rows, cols, counts = [], [], []
+        for row, tokens in enumerate(tokenized):
+            for word, count in Counter(tokens).items():
+                rows.append(row)
+                cols.append(vocabulary.setdefault(word, len(vocabulary)))
+                counts.append(count)
+
+        matrix = np.zeros((len(documents), max(1, len(vocabulary))), dtype=np.float32)
+        if counts:
+            matrix[rows, cols] = counts
+
+        df = np.count_nonzero(matrix, axis=0)
+        idf = np.log((1 + len(documents)) / (1 + df)) + 1.0
+        matrix = np.log1p(matrix) * idf
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def _textrank(self, sentences: List[str]) -> np.ndarray:
+        """Score sentences with TextRank over a TF-IDF cosine similarity graph"""
+
+        n = len(sentences)
+        if n == 1:
+            return np.ones(1, dtype=np.float32)
+
+        matrix = self._tfidf(sentences)
+        similarity = matrix @ matrix.T
+        np.fill_diagonal(similarity, 0.0)
+
+        out_weight = similarity.sum(axis=1, keepdims=True)
+        out_weight[out_weight == 0] = 1.0
+        transition = similarity / out_weight
+
+        scores = np.full(n, 1.0 / n, dtype=np.float32)
+        teleport = (1.0 - DAMPING) / n
+        for _ in range(TEXTRANK_ITERATIONS):
+            updated = teleport + DAMPING * (transition.T @ scores)
+            if np.abs(updated - scores).sum() < 1e-6:
+                scores = updated
+                break
+            scores = updated
+
+        # Slight lead bias: opening sentences of a section tend to be topical
+        position = 1.0 / np.sqrt(np.arange(1, n + 1, dtype=np.float32))
+        return scores * (1.0 + 0.1 * position)
+
+    def _keyword_title(self, sentences: List[str]) -> str:
+        """Build a title from the most frequent keywords of a section"""
+
+        counts = Counter(w for s in sentences for w in self._tokenize(s) if len(w) > 3)
+        keywords = [w for w, _ in counts.most_common(3)]
+        if not keywords:
+            return "Key Points"
+        return ' '.join(keywords).title()
+
+    def _shorten(self, sentence: str, max_words: int = MAX_BULLET_WORDS) -> str:
+        words = sentence.split()
+        if len(words) <= max_words:
+            return sentence
+        return ' '.join(words[:max_words]).rstrip(',;:') + '...'
@@ -0,0 +1,186 @@
+import os
+import sys
+import glob
+import random
+import logging
+import resource
+import threading
+import tracemalloc
+from collections.abc import Mapping
+from typing import Dict, List, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process right now (peak RSS where /proc is unavailable)"""
+
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def approx_size(value: Any, _depth: int = 0) -> int:
+    """Approximate bytes of payload held by session data; lazy facets are not forced
+
+    An open template behind a lazy analysis is not sized here; session_store_stats
+    counts those separately.
+    """
+
+    if _depth > 8:
+        return 0
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    if hasattr(value, 'size_bytes'):
+        return value.size_bytes
+    if hasattr(value, 'computed_facets'):
+        # A lazy template analysis; only what has been computed is held
+        value = value.select(value.computed_facets())
+    if isinstance(value, Mapping):
+        return sum(approx_size(k, _depth + 1) + approx_size(v, _depth + 1) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sum(approx_size(item, _depth + 1) for item in value)
+    return sys.getsizeof(value)
+
+
+def session_store_stats(session_store: Dict[str, Dict]) -> Dict[str, Any]:
+    """Bytes held per session field; template data shared with the catalog is not counted
+
+    held_template_sources counts analyses still holding an opened template
+    (a whole Presentation or inspector), whose size approx_size cannot see.
+    """
+
+    by_field: Dict[str, int] = {}
+    largest = 0
+    held_sources = 0
+    for session_data in list(session_store.values()):
+        session_bytes = 0
+        for field, value in list(session_data.items()):
+            if getattr(value, 'holds_source', False):
+                held_sources += 1
+            if field == 'template_data' and 'template_id' in session_data:
+                continue
+            size = approx_size(value)
+            by_field[field] = by_field.get(field, 0) + size
+            session_bytes += size
+        largest = max(largest, session_bytes)
+
+    return {
+        'sessions': len(session_store),
+        'bytes': sum(by_field.values()),
+        'largest_session_bytes': largest,
+        'held_template_sources': held_sources,
+        'by_field': dict(sorted(by_field.items(), key=lambda item: -item[1]))
+    }
+
+
+class TempFileTracker:
+    """Counts what is left on disk in the scratch directories the app writes to
+
+    Directories are tracked by path; glob patterns catch per-instance scratch
+    directories (e.g. the generator's) that should not outlive their request.
+    """
+
+    def __init__(self):
+        self.directories: List[str] = []
+        self.patterns: List[str] = []
+
+    def track(self, directory: str):
+        self.directories.append(directory)
+
+    def track_pattern(self, pattern: str):
+        self.patterns.append(pattern)
+
+    def stats(self) -> Dict[str, Any]:
+        files = 0
+        total = 0
+        directories = list(self.directories)
+        for pattern in self.patterns:
+            directories += [path for path in glob.glob(pattern) if os.path.isdir(path)]
+
+        for directory in directories:
+            for root, _, names in os.walk(directory):
+                for name in names:
+                    try:
+                        total += os.path.getsize(os.path.join(root, name))
+                        files += 1
+                    except OSError:
+                        # Removed while we were looking
+                        pass
+
+        return {
+            'directories': len(directories),
+            'files': files,
+            'bytes': total
+        }
+
+
+class MemoryMonitor:
+    """Samples per-request peak memory with tracemalloc and keeps high-water marks
+
+    Tracing is expensive, so only a fraction of requests are sampled and at
+    most one at a time. tracemalloc sees Python allocations only (not lxml's
+    or Pillow's C buffers), so the RSS growth of each sampled request is
+    recorded too. Concurrent requests share the process, so per-request
+    numbers are upper bounds.
+    """
+
+    def __init__(self, sample_rate: float = 0.05):
+        self.sample_rate = sample_rate
+        self._sampling = threading.Lock()
+        self._lock = threading.Lock()
+        self.endpoints: Dict[str, Dict[str, Any]] = {}
+        self.sampled = 0
+
+    def begin(self) -> Optional[Dict[str, Any]]:
+        """Start sampling this request if it is picked; returns a token for end()"""
+
+        if random.random() >= self.sample_rate or not self._sampling.acquire(blocking=False):
+            return None
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        else:
+            tracemalloc.reset_peak()
+        return {'started_tracing': started_tracing,
+                'baseline': tracemalloc.get_traced_memory()[0],
+                'rss': current_rss_bytes()}
+
+    def end(self, endpoint: Optional[str], token: Optional[Dict[str, Any]]):
+        if token is None:
+            return
+        try:
+            peak = tracemalloc.get_traced_memory()[1] - token['baseline']
+            rss_growth = current_rss_bytes() - token['rss']
+            if token['started_tracing']:
+                tracemalloc.stop()
+        finally:
+            self._sampling.release()
+
+        with self._lock:
+            self.sampled += 1
+            entry = self.endpoints.setdefault(endpoint or 'unknown', {
+                'samples': 0, 'max_peak_bytes': 0, 'last_peak_bytes': 0, 'max_rss_growth_bytes': 0})
+            entry['samples'] += 1
+            entry['last_peak_bytes'] = peak
+            entry['max_peak_bytes'] = max(entry['max_peak_bytes'], peak)
+            entry['max_rss_growth_bytes'] = max(entry['max_rss_growth_bytes'], rss_growth)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints = {name: dict(entry) for name, entry in self.endpoints.items()}
+        return {
+            'rss_bytes': current_rss_bytes(),
+            'peak_rss_bytes': peak_rss_bytes(),
+            'sample_rate': self.sample_rate,
+            'sampled_requests': self.sampled,
+            'endpoints': endpoints
+        }
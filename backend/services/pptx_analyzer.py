@@ -1,49 +1,183 @@
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.dml.color import RGBColor
+from pptx.enum.shapes import MSO_SHAPE_TYPE, PP_PLACEHOLDER
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
 import os
 import tempfile
 import logging
-from typing import Dict, List, Any, Optional
+import threading
+from collections.abc import Mapping
+from typing import Callable, Dict, List, Any, Iterable, Optional
 import base64
 from PIL import Image
 import io
 
+from .layout_space import free_rectangles, layout_obstacles
+from .template_inspector import (StreamingTemplateInspector, fonts_from_theme,
+                                 palette_from_theme, parse_theme_xml, presentation_source)
+
 logger = logging.getLogger(__name__)
 
+TITLE_PLACEHOLDERS = (PP_PLACEHOLDER.TITLE, PP_PLACEHOLDER.CENTER_TITLE)
+BODY_PLACEHOLDERS = (PP_PLACEHOLDER.BODY, PP_PLACEHOLDER.OBJECT)
+# Date, footer and slide number placeholders carry no slide content
+CHROME_PLACEHOLDERS = (PP_PLACEHOLDER.DATE, PP_PLACEHOLDER.FOOTER, PP_PLACEHOLDER.SLIDE_NUMBER)
+
+# Templates larger than this are inspected straight from the zip instead of
+# being loaded into the python-pptx object model
+STREAMING_THRESHOLD_BYTES = 5 * 1024 * 1024
+
+
+class TemplateAnalysis(Mapping):
+    """Template analysis result whose facets are computed on first access and memoized
+
+    The source the facets are read from is held only until release(); a facet
+    first asked for after that reopens the template and drops it again, so a
+    stored analysis keeps extracted values, never a parsed package.
+    """
+
+    def __init__(self, opener: Callable[[], Any], facets: Dict[str, Callable[[Any], Any]],
+                 source: Any = None):
+        # The source is whatever the facet extractors read from: a Presentation
+        # or a StreamingTemplateInspector, as returned by opener
+        self._opener = opener
+        self._source = source
+        self._facets = facets
+        self._values: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._values:
+            return self._values[key]
+        if key not in self._facets:
+            raise KeyError(key)
+
+        self._compute([key])
+        return self._values[key]
+
+    def __contains__(self, key) -> bool:
+        # Membership must not trigger extraction
+        return key in self._facets
+
+    def __iter__(self):
+        return iter(self._facets)
+
+    def __len__(self) -> int:
+        return len(self._facets)
+
+    def __repr__(self) -> str:
+        return f"TemplateAnalysis(computed={self.computed_facets()})"
+
+    def computed_facets(self) -> List[str]:
+        return [name for name in self._facets if name in self._values]
+
+    @property
+    def holds_source(self) -> bool:
+        return self._source is not None
+
+    def release(self):
+        """Drop the opened template; facets not computed yet reopen it when asked for"""
+        with self._lock:
+            self._source = None
+
+    def select(self, facets: Iterable[str]) -> Dict[str, Any]:
+        """Plain dict containing only the requested facets"""
+        wanted = [name for name in facets if name in self._facets]
+        self._compute(wanted)
+        return {name: self._values[name] for name in wanted}
+
+    def _compute(self, names: List[str]):
+        with self._lock:
+            missing = [name for name in names if name not in self._values]
+            if not missing:
+                return
+            # Reopened once for all the missing facets, and not kept
+            source = self._source if self._source is not None else self._opener()
+            for name in missing:
+                self._values[name] = self._facets[name](source)
+            if len(self._values) == len(self._facets):
+                # Everything is materialized; the source is no longer needed
+                self._source = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.select(self._facets)
+
 
 class PPTXAnalyzer:
     def __init__(self):
         self.supported_formats = ['.pptx', '.potx']
 
-    def analyze_template(self, template_path: str) -> Dict[str, Any]:
-        """Analyze a PowerPoint template and extract styling information"""
+    def analyze_template(self, template_path: str, streaming: Optional[bool] = None) -> TemplateAnalysis:
+        """Analyze a PowerPoint template and extract styling information
+
+        Opening the package validates it; the individual facets (layouts, colors,
+        images, ...) are only extracted when first read. Large templates (or
+        streaming=True) are read part by part from the zip instead of through
+        python-pptx.
+        """
 
         if not os.path.exists(template_path):
             raise FileNotFoundError(
                 f"Template file not found: {template_path}")
 
+        if streaming is None:
+            streaming = os.path.getsize(template_path) > STREAMING_THRESHOLD_BYTES
+
         try:
-            prs = Presentation(template_path)
-
-            analysis_data = {
-                'layouts': self._extract_layouts(prs),
-                'theme': self._extract_theme(prs),
-                'colors': self._extract_colors(prs),
-                'fonts': self._extract_fonts(prs),
-                'images': self._extract_images(prs),
-                'slide_size': self._get_slide_size(prs),
-                'master_slides': self._analyze_master_slides(prs)
-            }
+            if streaming:
+                return self._analyze_template_streaming(template_path)
+
+            prs = Presentation(presentation_source(template_path))
+
+            analysis_data = TemplateAnalysis(lambda: Presentation(presentation_source(template_path)), {
+                'layouts': self._extract_layouts,
+                'theme': self._extract_theme,
+                'colors': self._extract_colors,
+                'fonts': self._extract_fonts,
+                'images': self._extract_images,
+                'image_count': self._count_images,
+                'slide_size': self._get_slide_size,
+                'master_slides': self._analyze_master_slides,
+                'layout_free_space': self._extract_layout_free_space
+            }, source=prs)
 
             logger.info(
-                f"Template analysis completed: {len(analysis_data['layouts'])} layouts found")
+                f"Template opened: {len(prs.slide_layouts)} layouts found")
             return analysis_data
 
         except Exception as e:
             logger.error(f"Error analyzing template: {e}")
             raise
 
+    def _analyze_template_streaming(self, template_path: str) -> TemplateAnalysis:
+        """Template analysis backed by the streaming zip/XML inspector"""
+
+        inspector = StreamingTemplateInspector(template_path)
+
+        analysis_data = TemplateAnalysis(lambda: StreamingTemplateInspector(template_path), {
+            'layouts': self._extract_layouts_streaming,
+            'theme': StreamingTemplateInspector.theme,
+            'colors': StreamingTemplateInspector.colors,
+            'fonts': StreamingTemplateInspector.fonts,
+            'images': StreamingTemplateInspector.images,
+            'image_count': StreamingTemplateInspector.image_count,
+            'media': StreamingTemplateInspector.media,
+            'slide_size': StreamingTemplateInspector.slide_size,
+            'master_slides': StreamingTemplateInspector.master_slides,
+            'layout_free_space': StreamingTemplateInspector.layout_free_space
+        }, source=inspector)
+
+        logger.info(f"Template opened for streaming inspection: {template_path}")
+        return analysis_data
+
+    def _extract_layouts_streaming(self, inspector: StreamingTemplateInspector) -> List[Dict]:
+        layouts = inspector.layouts()
+        for layout in layouts:
+            layout['used_for'] = self._classify_layout(
+                [p['type'] for p in layout['placeholders']])
+        return layouts
+
     def _extract_layouts(self, prs: Presentation) -> List[Dict]:
         """Extract layout information from slide master"""
         layouts = []
@@ -76,18 +210,44 @@ class PPTXAnalyzer:
 
         return layouts
 
+    def _extract_layout_free_space(self, prs: Presentation) -> List[List[tuple]]:
+        """Free rectangles on each layout (same order as layouts) for floating images"""
+
+        def box(shape):
+            return (shape.left or 0, shape.top or 0, shape.width or 0, shape.height or 0)
+
+        master_shapes = [box(s) for s in prs.slide_master.shapes if not s.is_placeholder]
+        free_space = []
+        for slide_layout in prs.slide_layouts:
+            placeholders = [(p.placeholder_format.type, box(p)) for p in slide_layout.placeholders]
+            shapes = [box(s) for s in slide_layout.shapes if not s.is_placeholder]
+            if slide_layout._element.get('showMasterSp') != '0':
+                shapes += master_shapes
+            free_space.append(free_rectangles(prs.slide_width, prs.slide_height,
+                                              layout_obstacles(placeholders, shapes)))
+        return free_space
+
     def _determine_layout_usage(self, slide_layout) -> str:
         """Determine the best usage for a layout based on placeholders"""
+        return self._classify_layout(
+            [p.placeholder_format.type for p in slide_layout.placeholders])
+
+    def _classify_layout(self, all_placeholder_types: List[Any]) -> str:
+        """Classify a layout from its placeholder types"""
         placeholder_types = [
-            p.placeholder_format.type for p in slide_layout.placeholders]
+            t for t in all_placeholder_types if t not in CHROME_PLACEHOLDERS]
+        has_title = any(t in TITLE_PLACEHOLDERS for t in placeholder_types)
 
         # Common layout patterns
-        if 1 in placeholder_types and 0 in placeholder_types:  # Title and content
+        if PP_PLACEHOLDER.CENTER_TITLE in placeholder_types or PP_PLACEHOLDER.SUBTITLE in placeholder_types:
+            return 'title'
+        elif has_title and any(t in BODY_PLACEHOLDERS for t in placeholder_types) \
+                and len(placeholder_types) == 2:  # Title and content
             return 'content'
         # Title only
-        elif 0 in placeholder_types and len(placeholder_types) == 1:
+        elif has_title and len(placeholder_types) == 1:
             return 'title'
-        elif 13 in placeholder_types:  # Picture placeholder
+        elif PP_PLACEHOLDER.PICTURE in placeholder_types:  # Picture placeholder
             return 'image'
         elif len(placeholder_types) > 3:
             return 'complex'
@@ -95,95 +255,22 @@ class PPTXAnalyzer:
             return 'basic'
 
     def _extract_theme(self, prs: Presentation) -> Dict:
-        """Extract theme information"""
-        theme_data = {
-            'name': 'Default',
-            'color_scheme': [],
-            'font_scheme': {}
-        }
+        """Extract theme name, color scheme and font scheme from the master's theme part"""
 
         try:
-            # Get theme from slide master
-            if prs.slide_master and hasattr(prs.slide_master, 'theme'):
-                theme = prs.slide_master.theme
-                theme_data['name'] = getattr(theme, 'name', 'Default')
+            theme_part = prs.slide_master.part.part_related_by(RT.THEME)
+            return parse_theme_xml(io.BytesIO(theme_part.blob))
         except Exception as e:
             logger.warning(f"Error extracting theme: {e}")
-
-        return theme_data
+            return {'name': 'Default', 'color_scheme': [], 'colors_by_role': {}, 'font_scheme': {}}
 
     def _extract_colors(self, prs: Presentation) -> List[str]:
-        """Extract color palette from the presentation"""
-        colors = set()
-
-        try:
-            # Extract colors from slide master
-            for slide in prs.slides:
-                for shape in slide.shapes:
-                    # Get fill colors
-                    if hasattr(shape, 'fill') and shape.fill.type is not None:
-                        try:
-                            if hasattr(shape.fill, 'fore_color') and hasattr(shape.fill.fore_color, 'rgb'):
-                                rgb = shape.fill.fore_color.rgb
-                                if rgb is not None:
-                                    colors.add(f"#{rgb:06X}")
-                        except:
-                            pass
-
-                    # Get text colors
-                    if hasattr(shape, 'text_frame'):
-                        for paragraph in shape.text_frame.paragraphs:
-                            for run in paragraph.runs:
-                                try:
-                                    if hasattr(run.font, 'color') and hasattr(run.font.color, 'rgb'):
-                                        rgb = run.font.color.rgb
-                                        if rgb is not None:
-                                            colors.add(f"#{rgb:06X}")
-                                except:
-                                    pass
-
-            # Add default colors if none found
-            if not colors:
-                colors = {'#000000', '#FFFFFF',
-                          '#1F497D', '#4F81BD', '#9CBB58'}
-
-        except Exception as e:
-            logger.warning(f"Error extracting colors: {e}")
-            colors = {'#000000', '#FFFFFF', '#1F497D', '#4F81BD', '#9CBB58'}
-
-        return list(colors)[:10]  # Limit to 10 colors
+        """Color palette from the theme's color scheme; works on slide-less templates"""
+        return palette_from_theme(self._extract_theme(prs))
 
     def _extract_fonts(self, prs: Presentation) -> Dict:
-        """Extract font information"""
-        fonts = {
-            'title_font': 'Calibri',
-            'body_font': 'Calibri',
-            'fonts_used': set()
-        }
-
-        try:
-            for slide in prs.slides:
-                for shape in slide.shapes:
-                    if hasattr(shape, 'text_frame'):
-                        for paragraph in shape.text_frame.paragraphs:
-                            for run in paragraph.runs:
-                                if run.font.name:
-                                    fonts['fonts_used'].add(run.font.name)
-
-            fonts['fonts_used'] = list(fonts['fonts_used'])
-
-            # Set primary fonts
-            if fonts['fonts_used']:
-                fonts['body_font'] = fonts['fonts_used'][0]
-                if len(fonts['fonts_used']) > 1:
-                    fonts['title_font'] = fonts['fonts_used'][1]
-                else:
-                    fonts['title_font'] = fonts['fonts_used'][0]
-
-        except Exception as e:
-            logger.warning(f"Error extracting fonts: {e}")
-
-        return fonts
+        """Title (major) and body (minor) fonts from the theme's font scheme"""
+        return fonts_from_theme(self._extract_theme(prs))
 
     def _extract_images(self, prs: Presentation) -> List[Dict]:
         """Extract and encode images from the presentation"""
@@ -225,6 +312,11 @@ class PPTXAnalyzer:
 
         return images
 
+    def _count_images(self, prs: Presentation) -> int:
+        """Count picture shapes without reading or encoding their blobs"""
+        return sum(1 for slide in prs.slides for shape in slide.shapes
+                   if shape.shape_type == MSO_SHAPE_TYPE.PICTURE)
+
     def _get_image_content_type(self, image_data: bytes) -> str:
         """Determine image content type from data"""
         if image_data.startswith(b'\x89PNG'):
@@ -304,7 +396,7 @@ class PPTXAnalyzer:
     def extract_slide_structure(self, template_path: str) -> Dict:
         """Extract structural information for slide generation"""
         try:
-            prs = Presentation(template_path)
+            prs = Presentation(presentation_source(template_path))
 
             structure = {
                 'slide_count': len(prs.slides),
@@ -357,7 +449,7 @@ class PPTXAnalyzer:
                 return validation_result
 
             # Try to open presentation
-            prs = Presentation(template_path)
+            prs = Presentation(presentation_source(template_path))
             validation_result['valid'] = True
 
             # Check layouts
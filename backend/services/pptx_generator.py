@@ -2,8 +2,11 @@ from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.dml.color import RGBColor
 from pptx.enum.text import MSO_ANCHOR, MSO_AUTO_SIZE, PP_ALIGN
-from pptx.enum.shapes import MSO_SHAPE_TYPE
+from pptx.enum.shapes import MSO_SHAPE_TYPE, PP_PLACEHOLDER
+from pptx.oxml.ns import qn
+from pptx.oxml.xmlchemy import OxmlElement
 import os
+import shutil
 import tempfile
 import logging
 import base64
@@ -11,12 +14,69 @@ import io
 from typing import Dict, List, Any, Optional
 import uuid
 
+from .deadline import Deadline, DeadlineExceeded
+from .deck_optimizer import DeckOptimizer
+from .slide_cache import SlidePartCache, DeckAssembler, DeckWriter, harvest_slide_parts
+from .slide_model import Deck
+from .layout_space import SHAPE_GAP, best_fit, image_aspect
+from .template_inspector import presentation_source
+
 logger = logging.getLogger(__name__)
 
+TITLE_PLACEHOLDERS = (PP_PLACEHOLDER.TITLE, PP_PLACEHOLDER.CENTER_TITLE)
+SUBTITLE_PLACEHOLDERS = (PP_PLACEHOLDER.SUBTITLE, PP_PLACEHOLDER.BODY)
+CONTENT_PLACEHOLDERS = (PP_PLACEHOLDER.BODY, PP_PLACEHOLDER.OBJECT)
+
+# Enhancements that can be requested as generation options
+ENHANCEMENT_OPTIONS = ('improve_typography', 'add_transitions', 'optimize_layouts')
+
+# Share of a full-width body given up to a floating image when the layout has no free space
+IMAGE_COLUMN_FRACTION = 0.38
+
+# Per-generator scratch directories; none should outlive a generate_presentation call
+SCRATCH_PREFIX = 'pptxgen-'
+
+# Decks this long are written slide by slide unless options say otherwise
+STREAMING_MIN_SLIDES = 150
+STREAM_BATCH_SIZE = 20
+
+
+def parse_generation_options(options) -> Dict:
+    """Generation options with numeric values checked and clamped, before anything is built
+
+    Raises ValueError, with a message fit for the client, for values that are
+    not numbers; out-of-range numbers are clamped.
+    """
+    if options is None:
+        return {}
+    if not isinstance(options, dict):
+        raise ValueError("options must be an object")
+
+    parsed = dict(options)
+    for name, low, high in (('compression_level', 0, 9), ('stream_batch_size', 1, None)):
+        if name not in parsed:
+            continue
+        try:
+            value = int(parsed[name])
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be a number") from None
+        parsed[name] = max(low, value if high is None else min(high, value))
+    return parsed
+
+
+class _NotStreamable(Exception):
+    """A built slide contains parts the streaming writer cannot replay"""
+
 
 class PPTXGenerator:
-    def __init__(self):
-        self.temp_dir = tempfile.mkdtemp()
+    def __init__(self, slide_cache: Optional[SlidePartCache] = None):
+        # Scratch space for intermediate packages, created on first use
+        self.temp_dir = None
+        self.slide_cache = slide_cache
+        self.last_optimization_report = None
+        self.last_build_stats = None
+        # Budget of the request being served, checked between slides
+        self.deadline = Deadline()
 
    #  def generate_presentation(self,
    #                            slides: List[Dict],
@@ -58,9 +118,75 @@ class PPTXGenerator:
    #          logger.error(f"Error generating presentation: {e}")
    #          raise
 
-    def generate_presentation(self, slides, template_data, template_path, options={}):
+    def generate_presentation(self, slides, template_data, template_path, options=None,
+                              template_hash: Optional[str] = None,
+                              base_deck: Optional[bytes] = None,
+                              output_path: Optional[str] = None,
+                              deadline: Optional[Deadline] = None):
+        options = parse_generation_options(options)
+        self.deadline = deadline or Deadline()
+
+        # Only materialize the template facets these options actually use
+        template_data = self._resolve_template_data(template_data, options)
+        slides = Deck.from_raw(slides)
+
+        # Save final presentation
+        if output_path is None:
+            output_path = os.path.splitext(template_path)[0] + "_generated.pptx" \
+                if template_path else "generated_presentation.pptx"
+
+        # A precompiled base deck (template with slides already removed) skips the clearing pass
+        if base_deck:
+            template_source = io.BytesIO(base_deck)
+        else:
+            template_source = presentation_source(template_path) if template_path else None
+
+        try:
+            # Long decks are written slide by slide so memory does not grow with them
+            streamed = (options.get('streaming', len(slides) >= STREAMING_MIN_SLIDES)
+                        and self._generate_streaming(slides, template_data, template_source, options,
+                                                     template_hash, output_path))
+
+            if not streamed:
+                if self.slide_cache is not None and template_hash and options.get('incremental', True):
+                    self._generate_incremental(slides, template_data, template_source, options,
+                                               template_hash, output_path)
+                else:
+                    prs = self._build_presentation(slides, template_data, template_source, options)
+                    prs.save(output_path)
+                    self.last_build_stats = {'slides': len(slides), 'rebuilt': len(slides), 'reused': 0}
+        except DeadlineExceeded:
+            # A streamed deck may be half written; never leave it looking finished
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            raise
+        finally:
+            self._remove_scratch()
+
+        if options.get('optimize', False):
+            self.deadline.check("deck optimization")
+            optimizer = DeckOptimizer(
+                compression_level=options.get('compression_level', 9))
+            self.last_optimization_report = optimizer.optimize(output_path)
+
+        return output_path
+
+    def _scratch_path(self, prefix: str) -> str:
+        if self.temp_dir is None:
+            self.temp_dir = tempfile.mkdtemp(prefix=SCRATCH_PREFIX)
+        return os.path.join(self.temp_dir, f"{prefix}_{uuid.uuid4().hex}.pptx")
+
+    def _remove_scratch(self):
+        if self.temp_dir is not None:
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+            self.temp_dir = None
+
+    def _build_presentation(self, slides, template_data, template_source, options: Dict,
+                            with_notes_master: bool = False) -> Presentation:
         # Load template if provided, otherwise start fresh
-        prs = Presentation(template_path) if template_path else Presentation()
+        if hasattr(template_source, 'seek'):
+            template_source.seek(0)
+        prs = Presentation(template_source) if template_source else Presentation()
 
         # Remove existing empty slides (optional)
         while prs.slides:
@@ -70,39 +196,141 @@ class PPTXGenerator:
 
         # Loop through AI-generated slide data
         for slide in slides:
-            # Pick first available layout from template
-            layout = prs.slide_layouts[0] if prs.slide_layouts else prs.slide_layouts[0]
-            slide_obj = prs.slides.add_slide(layout)
-
-            # Title
-            if "title" in slide and slide["title"]:
-                if slide_obj.shapes.title:
-                    slide_obj.shapes.title.text = slide["title"]
-
-            # Content (bullet points or text)
-            if "content" in slide and slide["content"]:
-                # Use first placeholder for body text
-                body_shapes = [
-                    s for s in slide_obj.placeholders if s.is_placeholder and s.placeholder_format.type == 1]
-                if body_shapes:
-                    tf = body_shapes[0].text_frame
-                    tf.clear()
-                    for line in slide["content"].split("\n"):
-                        p = tf.add_paragraph()
-                        p.text = line.strip()
-                        p.font.size = Pt(18)
-
-            # Speaker Notes
-            if "notes" in slide and slide["notes"]:
-                notes_slide = slide_obj.notes_slide
-                text_frame = notes_slide.notes_text_frame
-                text_frame.text = slide["notes"]
+            self.deadline.check("generation")
+            self._create_slide(prs, slide, template_data, options)
+
+        if with_notes_master:
+            # Created on first access; cached notes slides need it to exist
+            prs.notes_master
+
+        return prs
+
+    def _generate_incremental(self, slides, template_data, template_source, options: Dict,
+                              template_hash: str, output_path: str):
+        """Rebuild only slides whose content changed and splice cached parts around them"""
+
+        keys = [SlidePartCache.slide_key(template_hash, options, slide) for slide in slides]
+        parts = [self.slide_cache.get(key) for key in keys]
+
+        # Identical slides within one deck are built once
+        missing = {}
+        for index, key in enumerate(keys):
+            if parts[index] is None and key not in missing:
+                missing[key] = index
+        rebuilt = [slides[index] for index in missing.values()]
+
+        if len(rebuilt) == len(slides):
+            # Nothing to reuse: build straight to the output and just harvest
+            prs = self._build_presentation(slides, template_data, template_source, options)
+            prs.save(output_path)
+            for key, harvested in zip(keys, harvest_slide_parts(output_path)):
+                if harvested is not None:
+                    self.slide_cache.put(key, harvested)
+            self.last_build_stats = {'slides': len(slides), 'rebuilt': len(slides), 'reused': 0}
+            return
+
+        needs_notes = any(slide.get('notes') for slide in slides)
+        prs = self._build_presentation(rebuilt, template_data, template_source, options,
+                                       with_notes_master=needs_notes)
+        base_path = self._scratch_path("base")
+        prs.save(base_path)
 
-        # Save final presentation
-        output_path = template_path.replace(
-            ".pptx", "_generated.pptx") if template_path else "generated_presentation.pptx"
-        prs.save(output_path)
-        return output_path
+        try:
+            built = dict(zip(missing.keys(), harvest_slide_parts(base_path)))
+            if any(built[key] is None for key in missing):
+                # Something in a rebuilt slide cannot be replayed; fall back to a full build
+                logger.info("Incremental build not possible, rebuilding every slide")
+                prs = self._build_presentation(slides, template_data, template_source, options)
+                prs.save(output_path)
+                self.last_build_stats = {'slides': len(slides), 'rebuilt': len(slides), 'reused': 0}
+                return
+
+            for key, harvested in built.items():
+                self.slide_cache.put(key, harvested)
+            ordered = [part if part is not None else built[key] for key, part in zip(keys, parts)]
+            DeckAssembler(base_path).assemble(ordered, output_path)
+        finally:
+            os.remove(base_path)
+
+        self.last_build_stats = {'slides': len(slides), 'rebuilt': len(rebuilt),
+                                 'reused': len(slides) - len(rebuilt)}
+        logger.info(f"Incremental build: rebuilt {len(rebuilt)} of {len(slides)} slides")
+
+    def _generate_streaming(self, slides, template_data, template_source, options: Dict,
+                            template_hash: Optional[str], output_path: str) -> bool:
+        """Build the deck in small batches and write each batch straight into the output
+
+        Only one batch of slides is ever held as a python-pptx object, so peak
+        memory stays flat as the deck grows. Returns False if some slide cannot
+        be written this way, in which case nothing usable was produced.
+        """
+
+        batch_size = options.get('stream_batch_size', STREAM_BATCH_SIZE)
+        use_cache = bool(self.slide_cache is not None and template_hash
+                         and options.get('incremental', True))
+        needs_notes = any(slide.get('notes') for slide in slides)
+
+        base_path = self._scratch_path("base")
+        batch_path = self._scratch_path("batch")
+        self._build_presentation([], template_data, template_source, options,
+                                 with_notes_master=needs_notes).save(base_path)
+        rebuilt = 0
+
+        try:
+            with DeckWriter(base_path, output_path) as writer:
+                for start in range(0, len(slides), batch_size):
+                    self.deadline.check("generation")
+                    batch = slides[start:start + batch_size]
+                    keys = [SlidePartCache.slide_key(template_hash, options, slide) if use_cache else None
+                            for slide in batch]
+                    parts = [self.slide_cache.get(key) if use_cache else None for key in keys]
+                    missing = [i for i, found in enumerate(parts) if found is None]
+
+                    if missing:
+                        prs = self._build_presentation([batch[i] for i in missing], template_data,
+                                                       template_source, options,
+                                                       with_notes_master=needs_notes)
+                        prs.save(batch_path)
+                        del prs
+                        for i, harvested in zip(missing, harvest_slide_parts(batch_path)):
+                            if harvested is None:
+                                raise _NotStreamable(f"slide {start + i + 1}")
+                            parts[i] = harvested
+                            if use_cache:
+                                self.slide_cache.put(keys[i], harvested)
+                        rebuilt += len(missing)
+
+                    for slide_parts in parts:
+                        writer.add_slide(slide_parts)
+        except _NotStreamable as e:
+            logger.info(f"Streaming build not possible ({e}), building in memory")
+            return False
+        finally:
+            for path in (base_path, batch_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        self.last_build_stats = {'slides': len(slides), 'rebuilt': rebuilt,
+                                 'reused': len(slides) - rebuilt}
+        logger.info(f"Streaming build: {len(slides)} slides in batches of {batch_size}")
+        return True
+
+    def required_template_facets(self, options: Dict) -> List[str]:
+        """Template analysis facets needed for the given generation options"""
+
+        facets = ['layouts', 'fonts', 'colors']
+        if options.get('include_images', True):
+            facets += ['images', 'layout_free_space']
+        return facets
+
+    def _resolve_template_data(self, template_data, options: Dict) -> Dict:
+        """Pull just the required facets out of a lazy template analysis"""
+
+        if template_data is None:
+            return {}
+        if hasattr(template_data, 'select'):
+            return template_data.select(self.required_template_facets(options))
+        return template_data
 
     def _create_slide(self, prs: Presentation, slide_data: Dict, template_data: Dict, options: Dict):
         """Create a single slide"""
@@ -129,6 +357,11 @@ class PPTXGenerator:
         if slide_data.get('notes'):
             self._add_speaker_notes(slide, slide_data['notes'])
 
+        # Enhancements run on the slide while it is still in memory
+        enhancements = self._requested_enhancements(options)
+        if any(enhancements.values()):
+            self._enhance_slide(slide, template_data, enhancements)
+
     def _get_layout_for_slide_type(self, prs: Presentation, template_data: Dict, slide_type: str):
         """Get the most appropriate layout for the slide type"""
 
@@ -160,7 +393,7 @@ class PPTXGenerator:
         """Populate a title slide"""
 
         title = slide_data.get('title', 'Presentation Title')
-        subtitle_content = slide_data.get('content', [])
+        subtitle_content = self._content_items(slide_data)
         subtitle = subtitle_content[0] if subtitle_content else ''
 
         # Find title and subtitle placeholders
@@ -168,9 +401,9 @@ class PPTXGenerator:
         subtitle_placeholder = None
 
         for placeholder in slide.placeholders:
-            if placeholder.placeholder_format.type == 0:  # Title
+            if placeholder.placeholder_format.type in TITLE_PLACEHOLDERS:
                 title_placeholder = placeholder
-            elif placeholder.placeholder_format.type == 1:  # Subtitle
+            elif placeholder.placeholder_format.type in SUBTITLE_PLACEHOLDERS:
                 subtitle_placeholder = placeholder
 
         # Set title
@@ -194,17 +427,17 @@ class PPTXGenerator:
         """Populate a content slide with title and bullet points"""
 
         title = slide_data.get('title', '')
-        content_items = slide_data.get('content', [])
+        content_items = self._content_items(slide_data)
 
         # Find title placeholder
         title_placeholder = None
         content_placeholder = None
 
         for placeholder in slide.placeholders:
-            if placeholder.placeholder_format.type == 0:  # Title
+            if placeholder.placeholder_format.type in TITLE_PLACEHOLDERS:
                 title_placeholder = placeholder
             # Content placeholders
-            elif placeholder.placeholder_format.type in [1, 2, 7]:
+            elif placeholder.placeholder_format.type in CONTENT_PLACEHOLDERS:
                 content_placeholder = placeholder
 
         # Set title
@@ -222,6 +455,14 @@ class PPTXGenerator:
         if options.get('include_images', True):
             self._try_add_image_to_slide(slide, slide_data, template_data)
 
+    def _content_items(self, slide_data: Dict) -> List[str]:
+        """Slide content as a list of lines, accepting newline-separated strings"""
+
+        content = slide_data.get('content', [])
+        if isinstance(content, str):
+            return [line.strip() for line in content.split("\n") if line.strip()]
+        return content or []
+
     def _populate_text_placeholder(self, placeholder, content_items: List[str], template_data: Dict):
         """Populate a text placeholder with bullet points"""
 
@@ -316,7 +557,7 @@ class PPTXGenerator:
             # Check if slide has image placeholder
             image_placeholder = None
             for placeholder in slide.placeholders:
-                if placeholder.placeholder_format.type == 8:  # Picture placeholder
+                if placeholder.placeholder_format.type == PP_PLACEHOLDER.PICTURE:
                     image_placeholder = placeholder
                     break
 
@@ -325,67 +566,89 @@ class PPTXGenerator:
                 self._insert_image_in_placeholder(
                     image_placeholder, image_data)
             else:
-                # Add as free-floating image in available space
-                self._add_floating_image(slide, image_data)
+                # Add as free-floating image in the layout's free space
+                self._add_floating_image(slide, image_data,
+                                         self._layout_free_space(slide, template_data))
 
         except Exception as e:
             logger.warning(f"Error adding image to slide: {e}")
 
+    def _image_stream(self, image_data: Dict) -> io.BytesIO:
+        """Image bytes as a stream; catalog templates carry them pre-decoded"""
+        image_bytes = image_data.get('blob')
+        if image_bytes is None:
+            image_bytes = base64.b64decode(image_data['data'])
+        return io.BytesIO(image_bytes)
+
     def _insert_image_in_placeholder(self, placeholder, image_data: Dict):
         """Insert image into a placeholder"""
 
         try:
-            # Decode base64 image
-            image_bytes = base64.b64decode(image_data['data'])
-
-            # Create temporary file
-            temp_image_path = os.path.join(
-                self.temp_dir, f"temp_image_{uuid.uuid4().hex}.png")
-            with open(temp_image_path, 'wb') as f:
-                f.write(image_bytes)
-
-            # Insert image
-            placeholder.insert_picture(temp_image_path)
-
-            # Clean up
-            os.remove(temp_image_path)
+            placeholder.insert_picture(self._image_stream(image_data))
 
         except Exception as e:
             logger.warning(f"Error inserting image in placeholder: {e}")
 
-    def _add_floating_image(self, slide, image_data: Dict):
-        """Add image as floating element"""
-
-        try:
-            # Decode base64 image
-            image_bytes = base64.b64decode(image_data['data'])
+    def _layout_free_space(self, slide, template_data: Dict) -> Optional[List]:
+        """Precomputed free rectangles of the slide's layout, if the analysis has them"""
 
-            # Create temporary file
-            temp_image_path = os.path.join(
-                self.temp_dir, f"temp_image_{uuid.uuid4().hex}.png")
-            with open(temp_image_path, 'wb') as f:
-                f.write(image_bytes)
+        free_space = template_data.get('layout_free_space')
+        if not free_space:
+            return None
+        layouts = slide.part.package.presentation_part.presentation.slide_layouts
+        index = layouts.index(slide.slide_layout)
+        return free_space[index] if index < len(free_space) else None
 
-            # Calculate position (right side of slide)
-            slide_width = slide.slide_layout.slide_master.slide_width
-            slide_height = slide.slide_layout.slide_master.slide_height
+    def _add_floating_image(self, slide, image_data: Dict, free_space: Optional[List] = None):
+        """Add image as floating element"""
 
-            img_width = min(Inches(3), slide_width * 0.3)
-            img_height = min(Inches(2), slide_height * 0.3)
+        try:
+            presentation = slide.part.package.presentation_part.presentation
+            slide_width = presentation.slide_width
+            slide_height = presentation.slide_height
+
+            if free_space is not None:
+                # Best fit for the image's shape in space no placeholder or master shape uses
+                aspect = image_aspect(image_data)
+                max_width, max_height = int(slide_width * 0.4), int(slide_height * 0.5)
+                box = best_fit(free_space, aspect, max_width, max_height)
+                if box is None:
+                    column = self._make_room_for_image(slide)
+                    box = best_fit([column], aspect, max_width, max_height) if column else None
+                if box is None:
+                    logger.debug("No free space for a floating image on this layout")
+                    return
+                left, top, img_width, img_height = box
+            else:
+                # Calculate position (right side of slide)
+                img_width = min(Inches(3), slide_width * 0.3)
+                img_height = min(Inches(2), slide_height * 0.3)
 
-            left = slide_width - img_width - Inches(0.5)
-            top = Inches(1)
+                left = slide_width - img_width - Inches(0.5)
+                top = Inches(1)
 
             # Add image
             slide.shapes.add_picture(
-                temp_image_path, left, top, img_width, img_height)
-
-            # Clean up
-            os.remove(temp_image_path)
+                self._image_stream(image_data), left, top, img_width, img_height)
 
         except Exception as e:
             logger.warning(f"Error adding floating image: {e}")
 
+    def _make_room_for_image(self, slide):
+        """Narrow a full-width body placeholder to open a right-hand column for an image"""
+
+        presentation = slide.part.package.presentation_part.presentation
+        body = next((p for p in slide.placeholders
+                     if p.placeholder_format.type in CONTENT_PLACEHOLDERS), None)
+        if body is None or body.width < presentation.slide_width * 0.6:
+            return None
+
+        left, top, width, height = body.left, body.top, body.width, body.height
+        column = int(width * IMAGE_COLUMN_FRACTION)
+        # Set all four so the inherited position is written out with the new width
+        body.left, body.top, body.width, body.height = left, top, width - column, height
+        return (left + width - column + SHAPE_GAP, top, column - SHAPE_GAP, height)
+
     def _add_speaker_notes(self, slide, notes_text: str):
         """Add speaker notes to slide"""
 
@@ -401,20 +664,17 @@ class PPTXGenerator:
                              presentation_path: str,
                              template_data: Dict,
                              enhancements: Dict) -> str:
-        """Apply enhancements to existing presentation"""
+        """Apply enhancements to an existing presentation
+
+        Decks built by generate_presentation should request enhancements as
+        generation options instead, which applies them in the same pass.
+        """
 
         try:
             prs = Presentation(presentation_path)
 
-            # Apply enhancements
-            if enhancements.get('improve_typography', False):
-                self._improve_typography(prs, template_data)
-
-            if enhancements.get('add_transitions', False):
-                self._add_slide_transitions(prs)
-
-            if enhancements.get('optimize_layouts', False):
-                self._optimize_slide_layouts(prs, template_data)
+            for slide in prs.slides:
+                self._enhance_slide(slide, template_data, enhancements)
 
             # Save enhanced version
             enhanced_path = presentation_path.replace(
@@ -427,53 +687,81 @@ class PPTXGenerator:
             logger.error(f"Error enhancing presentation: {e}")
             return presentation_path  # Return original on failure
 
-    def _improve_typography(self, prs: Presentation, template_data: Dict):
-        """Improve typography throughout presentation"""
+    def _requested_enhancements(self, options: Dict) -> Dict[str, bool]:
+        """Enhancement flags from generation options, top-level or under 'enhancements'"""
+
+        nested = options.get('enhancements') or {}
+        return {name: bool(options.get(name, nested.get(name, False)))
+                for name in ENHANCEMENT_OPTIONS}
+
+    def _enhance_slide(self, slide, template_data: Dict, enhancements: Dict):
+        """Apply the requested enhancements to one freshly built slide"""
+
+        if enhancements.get('improve_typography', False):
+            self._improve_typography(slide, template_data)
+
+        if enhancements.get('add_transitions', False):
+            self._add_slide_transition(slide)
+
+        if enhancements.get('optimize_layouts', False):
+            self._optimize_slide_layout(slide)
+
+    def _improve_typography(self, slide, template_data: Dict):
+        """Improve typography on a slide"""
 
         fonts = template_data.get('fonts', {})
 
-        for slide in prs.slides:
-            for shape in slide.shapes:
-                if hasattr(shape, 'text_frame'):
-                    for paragraph in shape.text_frame.paragraphs:
-                        for run in paragraph.runs:
-                            # Ensure consistent font sizing
-                            if run.font.size and run.font.size < Pt(14):
-                                run.font.size = Pt(16)
-
-                            # Apply template fonts
-                            if not run.font.name or run.font.name == 'Calibri':
-                                run.font.name = fonts.get(
-                                    'body_font', 'Calibri')
-
-    def _add_slide_transitions(self, prs: Presentation):
-        """Add subtle slide transitions"""
-
-        # This is a placeholder - python-pptx has limited transition support
-        # In a full implementation, you'd need to work with the underlying XML
-        logger.info("Slide transitions would be added here")
-
-    def _optimize_slide_layouts(self, prs: Presentation, template_data: Dict):
-        """Optimize slide layouts for better visual balance"""
-
-        for slide in prs.slides:
-            # Adjust text box sizes and positions for better readability
-            text_shapes = [s for s in slide.shapes if hasattr(s, 'text_frame')]
-
-            for shape in text_shapes:
-                # Ensure minimum margins
-                if shape.left < Inches(0.5):
-                    shape.left = Inches(0.5)
-
-                if shape.top < Inches(0.5):
-                    shape.top = Inches(0.5)
-
-                # Adjust text frame properties
-                text_frame = shape.text_frame
-                text_frame.margin_left = Inches(0.1)
-                text_frame.margin_right = Inches(0.1)
-                text_frame.margin_top = Inches(0.1)
-                text_frame.margin_bottom = Inches(0.1)
+        for shape in slide.shapes:
+            if hasattr(shape, 'text_frame'):
+                for paragraph in shape.text_frame.paragraphs:
+                    for run in paragraph.runs:
+                        # Ensure consistent font sizing
+                        if run.font.size and run.font.size < Pt(14):
+                            run.font.size = Pt(16)
+
+                        # Apply template fonts
+                        if not run.font.name or run.font.name == 'Calibri':
+                            run.font.name = fonts.get(
+                                'body_font', 'Calibri')
+
+    def _add_slide_transition(self, slide):
+        """Add a subtle fade transition"""
+
+        sld = slide._element
+        if sld.find(qn('p:transition')) is not None:
+            return
+
+        transition = OxmlElement('p:transition')
+        transition.set('spd', 'med')
+        transition.append(OxmlElement('p:fade'))
+
+        # <p:transition> follows <p:clrMapOvr> (or <p:cSld>) in the slide schema
+        anchor = sld.find(qn('p:clrMapOvr'))
+        if anchor is None:
+            anchor = sld.find(qn('p:cSld'))
+        anchor.addnext(transition)
+
+    def _optimize_slide_layout(self, slide):
+        """Optimize a slide's layout for better visual balance"""
+
+        # Adjust text box sizes and positions for better readability
+        text_shapes = [s for s in slide.shapes if hasattr(s, 'text_frame')]
+
+        for shape in text_shapes:
+            # Ensure minimum margins; read all four first, since setting one on a
+            # placeholder materializes an xfrm that drops the inherited others
+            left, top, width, height = shape.left, shape.top, shape.width, shape.height
+            positioned = None not in (left, top, width, height)
+            if positioned and (left < Inches(0.5) or top < Inches(0.5)):
+                shape.left, shape.top = max(left, Inches(0.5)), max(top, Inches(0.5))
+                shape.width, shape.height = width, height
+
+            # Adjust text frame properties
+            text_frame = shape.text_frame
+            text_frame.margin_left = Inches(0.1)
+            text_frame.margin_right = Inches(0.1)
+            text_frame.margin_top = Inches(0.1)
+            text_frame.margin_bottom = Inches(0.1)
 
     def create_presentation_preview(self, slides: List[Dict], template_data: Dict) -> List[Dict]:
         """Create preview data for slides without generating full presentation"""
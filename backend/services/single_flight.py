@@ -0,0 +1,125 @@
+import asyncio
+import threading
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        # (event loop, future) for async followers, which may live on other loops
+        self.waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution
+
+    The first caller (the leader) runs the function; everyone who arrives with
+    the same key while it is running waits for and shares its result or
+    exception. Works across threads and across event loops.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def _join(self, key: Hashable) -> Tuple[_Call, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            return call, True
+
+    def _finish(self, key: Hashable, call: _Call):
+        with self._lock:
+            del self._calls[key]
+            # Set under the lock so a follower cannot register after the hand-off
+            call.done.set()
+            waiters, call.waiters = call.waiters, []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(self._resolve, future, call)
+            except RuntimeError:
+                # The follower's loop already closed; nobody is waiting any more
+                pass
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, call: _Call):
+        if future.done():
+            return
+        if call.error is not None:
+            future.set_exception(call.error)
+        else:
+            future.set_result(call.result)
+
+    def do(self, key: Hashable, fn: Callable[[], Any],
+           timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """Return (result, shared); shared is True if another caller did the work
+
+        A follower gives up with TimeoutError after timeout seconds; the leader
+        keeps running for anyone else waiting on it.
+        """
+
+        call, leader = self._join(key)
+        if not leader:
+            if not call.done.wait(timeout):
+                raise TimeoutError("Timed out waiting for a shared call")
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e if isinstance(e, Exception) else RuntimeError("Shared LLM call was interrupted")
+            raise
+        finally:
+            self._finish(key, call)
+        return call.result, False
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]],
+                       cancelled_error: Optional[Callable[[], Exception]] = None) -> Tuple[Any, bool]:
+        """Async variant of do; followers wait without blocking their event loop
+
+        If the leader is cancelled, followers get cancelled_error() (a generic
+        RuntimeError by default), so they can tell an abandoned call from a
+        failed one and redo the work themselves.
+        """
+
+        call, leader = self._join(key)
+        if not leader:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            with self._lock:
+                if not call.done.is_set():
+                    call.waiters.append((loop, future))
+                    pending = True
+                else:
+                    pending = False
+            if not pending:
+                self._resolve(future, call)
+            return await future, True
+
+        try:
+            call.result = await fn()
+        except BaseException as e:
+            # Cancellation of the leader must not leave followers hanging
+            if isinstance(e, Exception):
+                call.error = e
+            elif cancelled_error is not None:
+                call.error = cancelled_error()
+            else:
+                call.error = RuntimeError("Shared LLM call was cancelled")
+            raise
+        finally:
+            self._finish(key, call)
+        return call.result, False
@@ -0,0 +1,396 @@
+import json
+import hashlib
+import logging
+import posixpath
+import threading
+import zipfile
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+
+from lxml import etree
+
+from .template_inspector import MEDIA_CONTENT_TYPES, rels_part_name, resolve_target
+
+logger = logging.getLogger(__name__)
+
+NS = {
+    'p': 'http://schemas.openxmlformats.org/presentationml/2006/main',
+    'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
+    'rel': 'http://schemas.openxmlformats.org/package/2006/relationships',
+    'ct': 'http://schemas.openxmlformats.org/package/2006/content-types',
+}
+R_ID = '{%s}id' % NS['r']
+REL = '{%s}Relationship' % NS['rel']
+
+RT_BASE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/'
+RT_SLIDE = RT_BASE + 'slide'
+RT_SLIDE_LAYOUT = RT_BASE + 'slideLayout'
+RT_NOTES_SLIDE = RT_BASE + 'notesSlide'
+RT_NOTES_MASTER = RT_BASE + 'notesMaster'
+RT_IMAGE = RT_BASE + 'image'
+
+CT_SLIDE = 'application/vnd.openxmlformats-officedocument.presentationml.slide+xml'
+CT_NOTES_SLIDE = 'application/vnd.openxmlformats-officedocument.presentationml.notesSlide+xml'
+
+PRESENTATION_PART = 'ppt/presentation.xml'
+CONTENT_TYPES_PART = '[Content_Types].xml'
+
+# Generation options that only affect how the package is produced, not slide XML
+POST_PROCESSING_OPTIONS = ('optimize', 'compression_level', 'incremental',
+                           'streaming', 'stream_batch_size')
+
+
+class SlideParts:
+    """Serialized parts of one built slide, with relationships stored position-independently
+
+    Each relationship is (rId, kind, value): kind is 'layout' (layout part name),
+    'media' (content hash), 'notes_master', 'slide' or 'external' (URL).
+    """
+
+    __slots__ = ('slide_xml', 'slide_rels', 'notes_xml', 'notes_rels', 'media', 'external_types')
+
+    def __init__(self, slide_xml: bytes, slide_rels: List[Tuple[str, str, str]],
+                 notes_xml: Optional[bytes], notes_rels: List[Tuple[str, str, str]],
+                 media: Dict[str, Tuple[str, bytes]], external_types: Dict[str, str]):
+        self.slide_xml = slide_xml
+        self.slide_rels = slide_rels
+        self.notes_xml = notes_xml
+        self.notes_rels = notes_rels
+        # content hash -> (extension, bytes)
+        self.media = media
+        # rId -> relationship type for external relationships
+        self.external_types = external_types
+
+    @property
+    def size_bytes(self) -> int:
+        return (len(self.slide_xml) + len(self.notes_xml or b'')
+                + sum(len(data) for _, data in self.media.values()))
+
+
+class SlidePartCache:
+    """Byte-bounded LRU of built slide parts keyed by template, options and slide content"""
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, SlideParts]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def slide_key(template_hash: str, options: Dict, slide: Dict) -> str:
+        relevant_options = {k: v for k, v in (options or {}).items()
+                            if k not in POST_PROCESSING_OPTIONS}
+        if hasattr(slide, 'content_key'):
+            slide_material = slide.content_key
+        else:
+            slide_material = {k: v for k, v in slide.items() if k != 'slide_number'}
+        material = json.dumps({
+            'template': template_hash,
+            'options': relevant_options,
+            'slide': slide_material
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[SlideParts]:
+        with self._lock:
+            parts = self._entries.get(key)
+            if parts is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return parts
+
+    def put(self, key: str, parts: SlideParts):
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = parts
+            self._size += parts.size_bytes
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size_bytes
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+
+def _read_rels(zf: zipfile.ZipFile, part: str) -> List[Any]:
+    name = rels_part_name(part)
+    if name not in zf.namelist():
+        return []
+    return list(etree.fromstring(zf.read(name)).iterfind('rel:Relationship', NS))
+
+
+def _media_entry(zf: zipfile.ZipFile, part: str, media: Dict[str, Tuple[str, bytes]]) -> str:
+    data = zf.read(part)
+    digest = hashlib.sha1(data).hexdigest()
+    media[digest] = (posixpath.splitext(part)[1].lower(), data)
+    return digest
+
+
+def _canonical_rels(zf: zipfile.ZipFile, part: str, media: Dict[str, Tuple[str, bytes]],
+                    external_types: Dict[str, str]) -> Optional[List[Tuple[str, str, str]]]:
+    """Relationships of a part in position-independent form, or None if not cacheable"""
+
+    canonical = []
+    for rel in _read_rels(zf, part):
+        r_id, rel_type = rel.get('Id'), rel.get('Type')
+        if rel.get('TargetMode') == 'External':
+            canonical.append((r_id, 'external', rel.get('Target')))
+            external_types[r_id] = rel_type
+            continue
+
+        target = resolve_target(part, rel.get('Target', ''))
+        if rel_type == RT_SLIDE_LAYOUT:
+            canonical.append((r_id, 'layout', target))
+        elif rel_type == RT_IMAGE:
+            canonical.append((r_id, 'media', _media_entry(zf, target, media)))
+        elif rel_type == RT_NOTES_MASTER:
+            canonical.append((r_id, 'notes_master', ''))
+        elif rel_type == RT_SLIDE:
+            canonical.append((r_id, 'slide', ''))
+        elif rel_type == RT_NOTES_SLIDE:
+            canonical.append((r_id, 'notes', ''))
+        else:
+            # Charts, embedded objects and the like are not worth replaying
+            return None
+    return canonical
+
+
+def _slide_part_names(zf: zipfile.ZipFile) -> List[str]:
+    """Slide part names in presentation order"""
+    presentation = etree.fromstring(zf.read(PRESENTATION_PART))
+    rels = {rel.get('Id'): resolve_target(PRESENTATION_PART, rel.get('Target'))
+            for rel in _read_rels(zf, PRESENTATION_PART)}
+    return [rels[sld.get(R_ID)] for sld in presentation.iterfind('p:sldIdLst/p:sldId', NS)]
+
+
+def harvest_slide_parts(path: str) -> List[Optional[SlideParts]]:
+    """Extract the cacheable parts of every slide in a saved deck"""
+
+    harvested = []
+    with zipfile.ZipFile(path) as zf:
+        for slide_part in _slide_part_names(zf):
+            media: Dict[str, Tuple[str, bytes]] = {}
+            external_types: Dict[str, str] = {}
+            slide_rels = _canonical_rels(zf, slide_part, media, external_types)
+            notes_xml, notes_rels = None, []
+
+            if slide_rels is not None:
+                for rel in _read_rels(zf, slide_part):
+                    if rel.get('Type') == RT_NOTES_SLIDE:
+                        notes_part = resolve_target(slide_part, rel.get('Target'))
+                        notes_xml = zf.read(notes_part)
+                        notes_rels = _canonical_rels(zf, notes_part, media, external_types)
+
+            if slide_rels is None or notes_rels is None:
+                harvested.append(None)
+                continue
+
+            harvested.append(SlideParts(zf.read(slide_part), slide_rels, notes_xml,
+                                        notes_rels, media, external_types))
+    return harvested
+
+
+def _rels_xml(rels: List[Tuple[str, str, str]]) -> bytes:
+    root = etree.Element('{%s}Relationships' % NS['rel'], nsmap={None: NS['rel']})
+    for r_id, rel_type, target, external in rels:
+        attributes = {'Id': r_id, 'Type': rel_type, 'Target': target}
+        if external:
+            attributes['TargetMode'] = 'External'
+        etree.SubElement(root, REL, attributes)
+    return etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+
+
+def _relative(source: str, target: str) -> str:
+    return posixpath.relpath(target, posixpath.dirname(source))
+
+
+class DeckWriter:
+    """Streams slide parts into a new package built on a base deck
+
+    Each slide (and any media it brings) goes into the output zip as soon as
+    it is added, so nothing accumulates as the deck grows. close() finishes
+    the package with the base parts, presentation.xml, its relationships and
+    the content types.
+    """
+
+    def __init__(self, base_path: str, output_path: str):
+        self._base = zipfile.ZipFile(base_path)
+        try:
+            self._names = self._base.namelist()
+            self._skipped = self._slide_owned_parts(self._base, self._names)
+            self._presentation_rels = _read_rels(self._base, PRESENTATION_PART)
+            self._out = zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED)
+        except Exception:
+            self._base.close()
+            raise
+        self._notes_master = next((resolve_target(PRESENTATION_PART, rel.get('Target'))
+                                   for rel in self._presentation_rels
+                                   if rel.get('Type') == RT_NOTES_MASTER), None)
+        # content hash -> part name, so media shared between slides is stored once
+        self._written_media: Dict[str, str] = {}
+        self._slide_names: List[str] = []
+        self._notes_names: List[str] = []
+
+    def __enter__(self) -> 'DeckWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    @property
+    def slide_count(self) -> int:
+        return len(self._slide_names)
+
+    def add_slide(self, parts: SlideParts):
+        number = len(self._slide_names) + 1
+        slide_name = f'ppt/slides/slide{number}.xml'
+        notes_name = f'ppt/notesSlides/notesSlide{number}.xml' if parts.notes_xml else None
+        out = self._out
+
+        out.writestr(slide_name, parts.slide_xml)
+        out.writestr(rels_part_name(slide_name), _rels_xml(self._resolve(
+            parts, parts.slide_rels, slide_name, slide_name, notes_name)))
+        self._slide_names.append(slide_name)
+
+        if notes_name:
+            if not self._notes_master:
+                raise ValueError("Base deck has no notes master for cached notes")
+            out.writestr(notes_name, parts.notes_xml)
+            out.writestr(rels_part_name(notes_name), _rels_xml(self._resolve(
+                parts, parts.notes_rels, notes_name, slide_name, notes_name)))
+            self._notes_names.append(notes_name)
+
+    def close(self):
+        base, out = self._base, self._out
+        try:
+            for name in self._names:
+                if name in self._skipped or name in (CONTENT_TYPES_PART, PRESENTATION_PART,
+                                                     rels_part_name(PRESENTATION_PART)):
+                    continue
+                out.writestr(base.getinfo(name), base.read(name))
+
+            out.writestr(PRESENTATION_PART, self._presentation_xml(base, self._slide_names))
+            out.writestr(rels_part_name(PRESENTATION_PART),
+                         self._presentation_rels_xml(self._presentation_rels, self._slide_names))
+            out.writestr(CONTENT_TYPES_PART, self._content_types(
+                base, self._skipped, self._slide_names, self._notes_names,
+                self._written_media.values()))
+        finally:
+            self.abort()
+
+    def abort(self):
+        """Release both packages; an unfinished output is left incomplete"""
+        self._out.close()
+        self._base.close()
+
+    def _slide_owned_parts(self, base: zipfile.ZipFile, names: List[str]) -> set:
+        """Slides, notes slides and media only they reference; all are rewritten from parts"""
+
+        owned = {n for n in names if n.startswith(('ppt/slides/', 'ppt/notesSlides/'))}
+        referenced_elsewhere = set()
+        for name in names:
+            if not name.endswith('.rels') or name in owned:
+                continue
+            source = posixpath.join(posixpath.dirname(posixpath.dirname(name)),
+                                    posixpath.basename(name)[:-len('.rels')])
+            for rel in etree.fromstring(base.read(name)).iterfind('rel:Relationship', NS):
+                if rel.get('TargetMode') != 'External':
+                    referenced_elsewhere.add(resolve_target(source, rel.get('Target', '')))
+        owned.update(n for n in names if n.startswith('ppt/media/') and n not in referenced_elsewhere)
+        return owned
+
+    def _resolve(self, parts: SlideParts, rels, source: str, slide_name: str,
+                 notes_name: Optional[str]):
+        notes_master, written_media, out = self._notes_master, self._written_media, self._out
+        resolved = []
+        for r_id, kind, value in rels:
+            if kind == 'external':
+                resolved.append((r_id, parts.external_types[r_id], value, True))
+            elif kind == 'layout':
+                resolved.append((r_id, RT_SLIDE_LAYOUT, _relative(source, value), False))
+            elif kind == 'media':
+                if value not in written_media:
+                    extension, data = parts.media[value]
+                    written_media[value] = f'ppt/media/image-{value[:16]}{extension}'
+                    out.writestr(written_media[value], data, compress_type=zipfile.ZIP_STORED)
+                resolved.append((r_id, RT_IMAGE, _relative(source, written_media[value]), False))
+            elif kind == 'notes_master':
+                resolved.append((r_id, RT_NOTES_MASTER, _relative(source, notes_master), False))
+            elif kind == 'slide':
+                resolved.append((r_id, RT_SLIDE, _relative(source, slide_name), False))
+            elif kind == 'notes':
+                resolved.append((r_id, RT_NOTES_SLIDE, _relative(source, notes_name), False))
+        return resolved
+
+    def _presentation_xml(self, base: zipfile.ZipFile, slide_names: List[str]) -> bytes:
+        presentation = etree.fromstring(base.read(PRESENTATION_PART))
+        id_list = presentation.find('p:sldIdLst', NS)
+        if id_list is None:
+            id_list = etree.Element('{%s}sldIdLst' % NS['p'])
+            # sldIdLst follows sldMasterIdLst and the optional notes/handout master lists
+            anchor = None
+            for tag in ('sldMasterIdLst', 'notesMasterIdLst', 'handoutMasterIdLst'):
+                found = presentation.find(f'p:{tag}', NS)
+                if found is not None:
+                    anchor = found
+            anchor.addnext(id_list)
+        for entry in list(id_list):
+            id_list.remove(entry)
+        for number, _ in enumerate(slide_names, start=1):
+            etree.SubElement(id_list, '{%s}sldId' % NS['p'],
+                             {'id': str(255 + number), R_ID: f'rIdSlide{number}'})
+        return etree.tostring(presentation, xml_declaration=True, encoding='UTF-8', standalone=True)
+
+    def _presentation_rels_xml(self, rels, slide_names: List[str]) -> bytes:
+        kept = [(rel.get('Id'), rel.get('Type'), rel.get('Target'), rel.get('TargetMode') == 'External')
+                for rel in rels if rel.get('Type') != RT_SLIDE]
+        kept += [(f'rIdSlide{number}', RT_SLIDE, _relative(PRESENTATION_PART, name), False)
+                 for number, name in enumerate(slide_names, start=1)]
+        return _rels_xml(kept)
+
+    def _content_types(self, base: zipfile.ZipFile, skipped: set, slide_names: List[str],
+                       notes_names: List[str], media_names) -> bytes:
+        types = etree.fromstring(base.read(CONTENT_TYPES_PART))
+        gone = {'/' + name for name in skipped}
+        for override in types.findall('ct:Override', NS):
+            if override.get('PartName') in gone:
+                types.remove(override)
+
+        defaults = {d.get('Extension').lower() for d in types.findall('ct:Default', NS)}
+        for name in media_names:
+            extension = posixpath.splitext(name)[1]
+            if extension[1:] not in defaults:
+                etree.SubElement(types, '{%s}Default' % NS['ct'], {
+                    'Extension': extension[1:],
+                    'ContentType': MEDIA_CONTENT_TYPES.get(extension, 'application/octet-stream')
+                })
+                defaults.add(extension[1:])
+
+        for name in slide_names:
+            etree.SubElement(types, '{%s}Override' % NS['ct'],
+                             {'PartName': '/' + name, 'ContentType': CT_SLIDE})
+        for name in notes_names:
+            etree.SubElement(types, '{%s}Override' % NS['ct'],
+                             {'PartName': '/' + name, 'ContentType': CT_NOTES_SLIDE})
+        return etree.tostring(types, xml_declaration=True, encoding='UTF-8', standalone=True)
+
+
+class DeckAssembler:
+    """Writes a deck from a base package plus an ordered list of slide parts"""
+
+    def __init__(self, base_path: str):
+        self.base_path = base_path
+
+    def assemble(self, slides: List[SlideParts], output_path: str):
+        with DeckWriter(self.base_path, output_path) as writer:
+            for parts in slides:
+                writer.add_slide(parts)
@@ -0,0 +1,195 @@
+import json
+import hashlib
+import logging
+from collections.abc import Mapping, Sequence
+from typing import Dict, List, Any, Iterable
+
+logger = logging.getLogger(__name__)
+
+MAX_BULLETS = 8
+MAX_TITLE_CHARS = 100
+MAX_BULLET_CHARS = 200
+
+SLIDE_FIELDS = ('slide_number', 'slide_type', 'title', 'content', 'notes')
+
+
+class Slide(Mapping):
+    """Immutable, validated slide
+
+    Reads like the dicts it replaces (slide['title'], slide.get('notes')), so
+    the generator, renderer and caches accept either. Changes go through
+    replace(), which shares the unchanged fields with the original.
+    """
+
+    __slots__ = SLIDE_FIELDS + ('_json', '_content_key')
+
+    def __init__(self, slide_number: int, slide_type: str, title: str,
+                 content: tuple, notes: str = ''):
+        set_field = object.__setattr__
+        set_field(self, 'slide_number', slide_number)
+        set_field(self, 'slide_type', slide_type)
+        set_field(self, 'title', title)
+        set_field(self, 'content', content)
+        set_field(self, 'notes', notes)
+        set_field(self, '_json', None)
+        set_field(self, '_content_key', None)
+
+    @classmethod
+    def from_raw(cls, raw: Any, index: int = 0) -> 'Slide':
+        """Validate and clean a slide dict (e.g. from an LLM response); Slides pass through"""
+
+        if isinstance(raw, Slide):
+            return raw
+
+        content = raw.get('content', [])
+        # Ensure content is a list
+        if isinstance(content, str):
+            content = [content]
+        elif not isinstance(content, (list, tuple)):
+            content = []
+
+        slide_number = raw.get('slide_number', index + 1)
+        if not isinstance(slide_number, int) or isinstance(slide_number, bool):
+            try:
+                slide_number = int(slide_number)
+            except (TypeError, ValueError):
+                slide_number = index + 1
+
+        notes = raw.get('notes') or ''
+        return cls(
+            slide_number,
+            str(raw.get('slide_type') or 'content'),
+            str(raw.get('title', f"Slide {index + 1}"))[:MAX_TITLE_CHARS],
+            tuple(str(item)[:MAX_BULLET_CHARS] for item in content[:MAX_BULLETS]),
+            notes if isinstance(notes, str) else str(notes)
+        )
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Slide is immutable; use replace()")
+
+    def __reduce__(self):
+        return (Slide, (self.slide_number, self.slide_type, self.title, self.content, self.notes))
+
+    # -- mapping protocol ------------------------------------------------
+
+    def __getitem__(self, key: str):
+        if key in SLIDE_FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(SLIDE_FIELDS)
+
+    def __len__(self) -> int:
+        return len(SLIDE_FIELDS)
+
+    def __repr__(self) -> str:
+        return f"Slide({self.slide_number}, {self.slide_type!r}, {self.title!r})"
+
+    # -- snapshots and serialization --------------------------------------
+
+    def replace(self, **changes) -> 'Slide':
+        if all(getattr(self, k) == v for k, v in changes.items()):
+            return self
+        fields = {k: getattr(self, k) for k in SLIDE_FIELDS}
+        fields.update(changes)
+        if 'content' in changes:
+            fields['content'] = tuple(fields['content'])
+        return Slide(**fields)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'slide_number': self.slide_number,
+            'slide_type': self.slide_type,
+            'title': self.title,
+            'content': list(self.content),
+            'notes': self.notes
+        }
+
+    def to_json(self) -> str:
+        """JSON for this slide, serialized once"""
+        if self._json is None:
+            object.__setattr__(self, '_json', json.dumps(self.to_dict(), ensure_ascii=False,
+                                                         separators=(',', ':')))
+        return self._json
+
+    @property
+    def content_key(self) -> str:
+        """Hash of everything that affects the built slide (not its position)"""
+        if self._content_key is None:
+            material = json.dumps([self.slide_type, self.title, self.content, self.notes],
+                                  ensure_ascii=False)
+            object.__setattr__(self, '_content_key',
+                               hashlib.sha256(material.encode('utf-8')).hexdigest())
+        return self._content_key
+
+
+class Deck(Sequence):
+    """Immutable, ordered collection of slides with a cached serialization"""
+
+    __slots__ = ('slides', '_json')
+
+    def __init__(self, slides: Iterable[Slide] = ()):
+        object.__setattr__(self, 'slides', tuple(slides))
+        object.__setattr__(self, '_json', None)
+
+    @classmethod
+    def from_raw(cls, raw_slides: Any) -> 'Deck':
+        """Validate a list of slide dicts once; slides that cannot be salvaged are dropped"""
+
+        if isinstance(raw_slides, Deck):
+            return raw_slides
+
+        slides = []
+        for i, raw in enumerate(raw_slides or []):
+            try:
+                slides.append(Slide.from_raw(raw, i))
+            except Exception as e:
+                logger.warning(f"Error validating slide {i}: {e}")
+        return cls(slides)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Deck is immutable")
+
+    def __reduce__(self):
+        return (Deck, (self.slides,))
+
+    def __getitem__(self, index):
+        return self.slides[index]
+
+    def __len__(self) -> int:
+        return len(self.slides)
+
+    def __repr__(self) -> str:
+        return f"Deck({len(self.slides)} slides)"
+
+    def with_notes(self, notes: Dict[int, str]) -> 'Deck':
+        """New deck with notes set on the given slide indices; other slides are shared"""
+        if not notes:
+            return self
+        return Deck(slide.replace(notes=notes[i]) if i in notes else slide
+                    for i, slide in enumerate(self.slides))
+
+    def with_slide(self, index: int, slide: Slide) -> 'Deck':
+        """New deck with one slide replaced; the others are shared"""
+        slides = list(self.slides)
+        slides[index] = slide
+        return Deck(slides)
+
+    def renumbered(self) -> 'Deck':
+        return Deck(slide.replace(slide_number=number)
+                    for number, slide in enumerate(self.slides, start=1))
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return [slide.to_dict() for slide in self.slides]
+
+    def to_json(self) -> str:
+        """JSON array of the slides; each slide is serialized at most once"""
+        if self._json is None:
+            object.__setattr__(self, '_json', '[' + ','.join(s.to_json() for s in self.slides) + ']')
+        return self._json
+
+    @property
+    def size_bytes(self) -> int:
+        """Approximate memory held by this deck's content"""
+        return len(self.to_json().encode('utf-8'))
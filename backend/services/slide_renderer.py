@@ -0,0 +1,259 @@
+import io
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+from pptx.enum.shapes import PP_PLACEHOLDER
+
+from .pptx_analyzer import PPTXAnalyzer, TITLE_PLACEHOLDERS, BODY_PLACEHOLDERS
+from .layout_space import best_fit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLIDE_SIZE = (9144000, 6858000)
+FORMATS = {'png': ('PNG', 'image/png'), 'webp': ('WEBP', 'image/webp')}
+FONT_CANDIDATES = ('DejaVuSans.ttf', 'Arial.ttf', 'LiberationSans-Regular.ttf')
+BOLD_FONT_CANDIDATES = ('DejaVuSans-Bold.ttf', 'Arial Bold.ttf', 'LiberationSans-Bold.ttf')
+
+
+def _hex_to_rgb(value: str, fallback: Tuple[int, int, int]) -> Tuple[int, int, int]:
+    try:
+        value = value.lstrip('#')
+        return int(value[0:2], 16), int(value[2:4], 16), int(value[4:6], 16)
+    except (ValueError, AttributeError, IndexError):
+        return fallback
+
+
+class ThumbnailCache:
+    """Byte-bounded LRU of rendered thumbnails keyed by content hash"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, Tuple[bytes, str]]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, data: bytes, mimetype: str):
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = (data, mimetype)
+            self._size += len(data)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+
+class SlideThumbnailRenderer:
+    """Draws approximate slide thumbnails from template layout geometry and slide text"""
+
+    def __init__(self, cache: Optional[ThumbnailCache] = None, width: int = 320):
+        self.cache = cache or ThumbnailCache()
+        self.width = width
+        self.analyzer = PPTXAnalyzer()
+        self._fonts: Dict[Tuple[int, bool], Any] = {}
+
+    def thumbnail_key(self, slide: Dict, template_data: Dict, fmt: str = 'png',
+                      include_images: bool = True) -> str:
+        """Content hash of everything that affects how a slide thumbnail looks"""
+
+        layout = self.analyzer.get_best_layout_for_slide_type(
+            template_data, slide.get('slide_type', 'content'))
+        material = {
+            'slide': {k: slide.get(k) for k in ('slide_type', 'title', 'content')},
+            'layout': [(str(p['type']), p['left'], p['top'], p['width'], p['height'])
+                       for p in (layout or {}).get('placeholders', [])],
+            'size': self._slide_size(template_data),
+            'palette': self._palette(template_data),
+            'images': include_images and bool(template_data.get('image_count', 0)),
+            'image_box': self._floating_image_box(layout or {}, template_data) if include_images else None,
+            'width': self.width,
+            'format': fmt
+        }
+        encoded = json.dumps(material, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()[:32]
+
+    def render(self, slide: Dict, template_data: Dict, fmt: str = 'png',
+               include_images: bool = True) -> Tuple[str, bytes, str]:
+        """Return (cache key, image bytes, mimetype), rendering only on a cache miss"""
+
+        fmt = fmt if fmt in FORMATS else 'png'
+        key = self.thumbnail_key(slide, template_data, fmt, include_images)
+        cached = self.cache.get(key)
+        if cached:
+            return key, cached[0], cached[1]
+
+        image = self._draw(slide, template_data, include_images)
+        pil_format, mimetype = FORMATS[fmt]
+        buffer = io.BytesIO()
+        if pil_format == 'WEBP':
+            image.save(buffer, pil_format, quality=80, method=4)
+        else:
+            image.save(buffer, pil_format, optimize=True)
+
+        data = buffer.getvalue()
+        self.cache.put(key, data, mimetype)
+        return key, data, mimetype
+
+    def render_deck(self, slides: List[Dict], template_data: Dict, fmt: str = 'png',
+                    include_images: bool = True) -> List[str]:
+        return [self.render(slide, template_data, fmt, include_images)[0] for slide in slides]
+
+    # -- drawing ---------------------------------------------------------
+
+    def _slide_size(self, template_data: Dict) -> Tuple[int, int]:
+        size = template_data.get('slide_size') or {}
+        return int(size.get('width') or DEFAULT_SLIDE_SIZE[0]), int(size.get('height') or DEFAULT_SLIDE_SIZE[1])
+
+    def _palette(self, template_data: Dict) -> Dict[str, str]:
+        theme = template_data.get('theme') or {}
+        roles = theme.get('colors_by_role') or {}
+        colors = template_data.get('colors') or []
+        return {
+            'background': roles.get('lt1', '#FFFFFF'),
+            'title': roles.get('dk2') or roles.get('dk1') or (colors[0] if colors else '#1F1F1F'),
+            'body': roles.get('dk1') or (colors[1] if len(colors) > 1 else '#333333'),
+            'accent': roles.get('accent1', '#4F81BD')
+        }
+
+    def _font(self, size: int, bold: bool = False):
+        key = (size, bold)
+        if key not in self._fonts:
+            font = None
+            for name in (BOLD_FONT_CANDIDATES if bold else FONT_CANDIDATES):
+                try:
+                    font = ImageFont.truetype(name, size)
+                    break
+                except OSError:
+                    continue
+            if font is None:
+                try:
+                    font = ImageFont.load_default(size=size)
+                except TypeError:
+                    # Pillow < 10.1 only ships the fixed-size bitmap font
+                    font = ImageFont.load_default()
+            self._fonts[key] = font
+        return self._fonts[key]
+
+    def _draw(self, slide: Dict, template_data: Dict, include_images: bool) -> Image.Image:
+        slide_width, slide_height = self._slide_size(template_data)
+        scale = self.width / slide_width
+        height = max(1, round(slide_height * scale))
+        palette = self._palette(template_data)
+
+        image = Image.new('RGB', (self.width, height), _hex_to_rgb(palette['background'], (255, 255, 255)))
+        draw = ImageDraw.Draw(image)
+
+        layout = self.analyzer.get_best_layout_for_slide_type(
+            template_data, slide.get('slide_type', 'content')) or {}
+        boxes = self._boxes(layout, slide_width, slide_height, scale)
+
+        content = slide.get('content') or []
+        if isinstance(content, str):
+            content = [line for line in content.split('\n') if line.strip()]
+
+        title_size = max(8, round(height * 0.07))
+        body_size = max(6, round(height * 0.04))
+
+        if 'title' in boxes:
+            self._draw_text(draw, boxes['title'], [str(slide.get('title', ''))],
+                            self._font(title_size, True), _hex_to_rgb(palette['title'], (31, 31, 31)),
+                            bullets=False)
+
+        if content and 'body' in boxes:
+            self._draw_text(draw, boxes['body'], [str(c) for c in content[:8]],
+                            self._font(body_size), _hex_to_rgb(palette['body'], (51, 51, 51)),
+                            bullets=slide.get('slide_type') != 'title')
+
+        if include_images and template_data.get('image_count', 0) and slide.get('slide_type') != 'title':
+            floating = self._floating_image_box(layout, template_data)
+            if 'picture' in boxes:
+                box = boxes['picture']
+            elif floating:
+                left, top, width, box_height = floating
+                box = (round(left * scale), round(top * scale),
+                       round((left + width) * scale), round((top + box_height) * scale))
+            else:
+                box = (round(self.width * 0.66), round(height * 0.15),
+                       round(self.width * 0.95), round(height * 0.45))
+            draw.rectangle(box, fill=_hex_to_rgb(palette['accent'], (79, 129, 189)))
+
+        return image
+
+    def _floating_image_box(self, layout: Dict, template_data: Dict) -> Optional[Tuple[int, int, int, int]]:
+        """Where the generator puts a floating image on this layout, in EMU"""
+
+        free_space = template_data.get('layout_free_space') or []
+        index = layout.get('index', 0)
+        if index >= len(free_space):
+            return None
+        slide_width, slide_height = self._slide_size(template_data)
+        # The preview does not load the template's images, so assume a 4:3 picture
+        return best_fit(free_space[index], 4 / 3, int(slide_width * 0.4), int(slide_height * 0.5))
+
+    def _boxes(self, layout: Dict, slide_width: int, slide_height: int, scale: float) -> Dict[str, Tuple[int, int, int, int]]:
+        """Pixel boxes for the title, body and picture placeholders of a layout"""
+
+        boxes = {}
+        for placeholder in layout.get('placeholders', []):
+            box = (round(placeholder['left'] * scale), round(placeholder['top'] * scale),
+                   round((placeholder['left'] + placeholder['width']) * scale),
+                   round((placeholder['top'] + placeholder['height']) * scale))
+            if placeholder['type'] in TITLE_PLACEHOLDERS:
+                boxes.setdefault('title', box)
+            elif placeholder['type'] in BODY_PLACEHOLDERS or placeholder['type'] == PP_PLACEHOLDER.SUBTITLE:
+                boxes.setdefault('body', box)
+            elif placeholder['type'] == PP_PLACEHOLDER.PICTURE:
+                boxes.setdefault('picture', box)
+
+        # Layouts without placeholders still get a readable default arrangement
+        width, height = round(slide_width * scale), round(slide_height * scale)
+        boxes.setdefault('title', (round(width * 0.05), round(height * 0.04),
+                                   round(width * 0.95), round(height * 0.2)))
+        boxes.setdefault('body', (round(width * 0.05), round(height * 0.24),
+                                  round(width * 0.95), round(height * 0.92)))
+        return boxes
+
+    def _draw_text(self, draw, box, lines: List[str], font, color, bullets: bool):
+        left, top, right, bottom = box
+        max_width = max(1, right - left)
+        line_height = round(font.size * 1.25) if hasattr(font, 'size') else 12
+        y = top
+
+        for line in lines:
+            prefix = '• ' if bullets else ''
+            for wrapped in self._wrap(draw, prefix + line, font, max_width):
+                if y + line_height > bottom:
+                    return
+                draw.text((left, y), wrapped, font=font, fill=color)
+                y += line_height
+                prefix = ''
+
+    def _wrap(self, draw, text: str, font, max_width: int) -> List[str]:
+        words = text.split()
+        lines, current = [], ''
+        for word in words:
+            candidate = f"{current} {word}".strip()
+            if current and draw.textlength(candidate, font=font) > max_width:
+                lines.append(current)
+                current = word
+            else:
+                current = candidate
+        if current:
+            lines.append(current)
+        return lines
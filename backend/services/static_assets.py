@@ -0,0 +1,179 @@
+import os
+import re
+import gzip
+import hashlib
+import logging
+import mimetypes
+import tempfile
+import threading
+from typing import Dict, Optional, Tuple
+
+from werkzeug.http import parse_accept_header, parse_etags, quote_etag
+from werkzeug.utils import get_content_type
+
+try:
+    import brotli
+except ImportError:
+    # gzip variants only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Text assets worth compressing; images and fonts already are
+COMPRESSIBLE_EXTENSIONS = ('.html', '.js', '.css', '.json', '.map', '.svg', '.txt', '.ico', '.xml')
+MIN_COMPRESS_BYTES = 1024
+# A variant has to save at least this share of the bytes to be served
+MIN_COMPRESSION_SAVING = 0.1
+
+# Preferred first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# Build output named by content hash, e.g. static/js/main.1a2b3c4d.js or static/media/logo.5d5d9eef.svg
+HASHED_ASSET = re.compile(r'(^|/)static/.+\.[0-9a-f]{8,}(\.chunk)?\.[A-Za-z0-9]+$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# index.html, manifest and friends keep their names, so browsers revalidate them by ETag
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+
+class StaticAsset:
+    """One file of the frontend build and its precompressed variants on disk"""
+
+    __slots__ = ('path', 'size', 'etag', 'mimetype', 'cache_control', 'variants')
+
+    def __init__(self, path: str, size: int, etag: str, mimetype: str, cache_control: str):
+        self.path = path
+        self.size = size
+        self.etag = etag
+        self.mimetype = mimetype
+        self.cache_control = cache_control
+        # encoding -> (path, size)
+        self.variants: Dict[str, Tuple[str, int]] = {}
+
+    def select(self, accept_encodings) -> Tuple[str, Optional[str], str]:
+        """(path, content encoding, etag) of the best variant the client accepts"""
+
+        for encoding, _ in ENCODINGS:
+            if encoding in self.variants and accept_encodings.quality(encoding) > 0:
+                # Each representation needs its own strong ETag
+                return self.variants[encoding][0], encoding, f"{self.etag}-{encoding}"
+        return self.path, None, self.etag
+
+
+class StaticAssets:
+    """The React build, indexed and precompressed once at startup
+
+    Responses are sent from disk by path: through the server's pathsend or
+    chunked reads in a thread under asgi.py, through the file wrapper under
+    WSGI.
+    Variants are named by content hash, so restarts reuse them and several
+    workers can share one cache directory.
+    """
+
+    def __init__(self, build_dir: Optional[str], cache_dir: Optional[str] = None):
+        self.build_dir = os.path.abspath(build_dir) if build_dir else None
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), 'frontend-precompressed')
+        self._assets: Dict[str, StaticAsset] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> int:
+        """(Re)index the build directory; returns how many files are served"""
+
+        if not self.build_dir or not os.path.isdir(self.build_dir):
+            logger.info("No frontend build directory; static assets are not served")
+            return 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        assets = {}
+        for root, _, names in os.walk(self.build_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                relative = os.path.relpath(path, self.build_dir).replace(os.sep, '/')
+                try:
+                    assets[relative] = self._index(relative, path)
+                except OSError as e:
+                    logger.error(f"Skipping static asset {relative}: {e}")
+
+        with self._lock:
+            self._assets = assets
+        logger.info(f"Static assets loaded: {len(assets)} files, "
+                    f"{sum(1 for asset in assets.values() if asset.variants)} precompressed"
+                    f"{'' if brotli else ' (gzip only, brotli is not installed)'}")
+        return len(assets)
+
+    def lookup(self, path: str) -> Optional[StaticAsset]:
+        """The asset for a URL path; client-side routes get index.html"""
+
+        with self._lock:
+            asset = self._assets.get(path.strip('/'))
+            if asset is None and '.' not in path.rsplit('/', 1)[-1]:
+                asset = self._assets.get('index.html')
+            return asset
+
+    def respond(self, path: str, accept_encoding: str = '',
+                if_none_match: str = '') -> Optional[Tuple[int, Optional[str], Dict[str, str]]]:
+        """(status, file to send or None for a 304, headers) for a GET; None if not an asset
+
+        Kept free of any framework so the Flask route and the ASGI entry
+        point answer page loads identically.
+        """
+
+        # API paths are never the frontend's, even unknown ones
+        asset = None if path.lstrip('/').startswith('api/') else self.lookup(path)
+        if asset is None:
+            return None
+
+        file_path, encoding, etag = asset.select(parse_accept_header(accept_encoding))
+        headers = {
+            'ETag': quote_etag(etag),
+            'Cache-Control': asset.cache_control,
+            'Vary': 'Accept-Encoding'
+        }
+        if parse_etags(if_none_match).contains_weak(etag):
+            return 304, None, headers
+
+        headers['Content-Type'] = get_content_type(asset.mimetype, 'utf-8')
+        headers['Content-Length'] = str(asset.variants[encoding][1] if encoding else asset.size)
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        return 200, file_path, headers
+
+    def _index(self, relative: str, path: str) -> StaticAsset:
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+
+        asset = StaticAsset(
+            path=path,
+            size=len(data),
+            etag=digest[:32],
+            mimetype=mimetypes.guess_type(path)[0] or 'application/octet-stream',
+            cache_control=IMMUTABLE_CACHE_CONTROL if HASHED_ASSET.search(relative) else REVALIDATE_CACHE_CONTROL
+        )
+
+        if len(data) >= MIN_COMPRESS_BYTES and os.path.splitext(path)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+            for encoding, suffix in ENCODINGS:
+                variant = self._variant(data, digest, encoding, suffix)
+                if variant is not None:
+                    asset.variants[encoding] = variant
+        return asset
+
+    def _variant(self, data: bytes, digest: str, encoding: str, suffix: str) -> Optional[Tuple[str, int]]:
+        if encoding == 'br' and brotli is None:
+            return None
+
+        path = os.path.join(self.cache_dir, digest + suffix)
+        if not os.path.exists(path):
+            if encoding == 'br':
+                compressed = brotli.compress(data, quality=11)
+            else:
+                compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            # Written aside and renamed, so another worker never serves half a file
+            partial = f"{path}.{os.getpid()}.tmp"
+            with open(partial, 'wb') as f:
+                f.write(compressed)
+            os.replace(partial, path)
+
+        size = os.path.getsize(path)
+        if size > len(data) * (1 - MIN_COMPRESSION_SAVING):
+            return None
+        return path, size
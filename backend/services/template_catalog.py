@@ -0,0 +1,120 @@
+import io
+import os
+import base64
+import logging
+import threading
+from typing import Dict, List, Any, Optional
+
+from pptx import Presentation
+
+from .pptx_analyzer import PPTXAnalyzer
+from .template_inspector import presentation_source
+from .upload_validator import validate_package
+
+logger = logging.getLogger(__name__)
+
+CATALOG_EXTENSIONS = ('.pptx', '.potx')
+
+
+class CatalogTemplate:
+    """An approved template with its analysis, base deck and images held in memory"""
+
+    def __init__(self, template_id: str, name: str, path: str, template_hash: str,
+                 template_data, base_deck: bytes):
+        self.template_id = template_id
+        self.name = name
+        self.path = path
+        self.template_hash = template_hash
+        self.template_data = template_data
+        # The template with its example slides already removed, ready to load
+        self.base_deck = base_deck
+
+    @property
+    def memory_bytes(self) -> int:
+        images = self.template_data.get('images', [])
+        return len(self.base_deck) + sum(len(image.get('blob', b'')) + len(image.get('data', ''))
+                                         for image in images)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "template_id": self.template_id,
+            "name": self.name,
+            "template_hash": self.template_hash,
+            "layouts_found": len(self.template_data.get('layouts', [])),
+            "images_found": self.template_data.get('image_count', 0),
+            "theme_colors": len(self.template_data.get('colors', [])),
+            "theme": self.template_data.get('theme', {}).get('name')
+        }
+
+
+class TemplateCatalog:
+    """Registry of server-side templates, analyzed and compiled once at startup"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self._templates: Dict[str, CatalogTemplate] = {}
+        self._lock = threading.Lock()
+        self.analyzer = PPTXAnalyzer()
+
+    def load(self) -> int:
+        """(Re)load every template in the catalog directory; returns how many loaded"""
+
+        if not self.directory or not os.path.isdir(self.directory):
+            logger.info("No template catalog directory configured")
+            return 0
+
+        templates = {}
+        for filename in sorted(os.listdir(self.directory)):
+            stem, extension = os.path.splitext(filename)
+            if extension.lower() not in CATALOG_EXTENSIONS:
+                continue
+            try:
+                entry = self._compile(stem, os.path.join(self.directory, filename))
+                templates[entry.template_id] = entry
+            except Exception as e:
+                logger.error(f"Skipping catalog template {filename}: {e}")
+
+        with self._lock:
+            self._templates = templates
+        logger.info(f"Template catalog loaded: {len(templates)} templates")
+        return len(templates)
+
+    def _compile(self, template_id: str, path: str) -> CatalogTemplate:
+        package_info = validate_package(path)
+
+        # Force every facet now so no request pays for analysis
+        template_data = self.analyzer.analyze_template(path, streaming=False)
+        template_data.to_dict()
+        for image in template_data.get('images', []):
+            # Decoded once here instead of per generated slide
+            image['blob'] = base64.b64decode(image['data'])
+
+        prs = Presentation(presentation_source(path))
+        while prs.slides:
+            r_id = prs.slides._sldIdLst[0].rId
+            prs.part.drop_rel(r_id)
+            del prs.slides._sldIdLst[0]
+        buffer = io.BytesIO()
+        prs.save(buffer)
+
+        return CatalogTemplate(
+            template_id=template_id,
+            name=template_id.replace('_', ' ').replace('-', ' ').title(),
+            path=path,
+            template_hash=package_info['sha256'],
+            template_data=template_data,
+            base_deck=buffer.getvalue()
+        )
+
+    def get(self, template_id: str) -> Optional[CatalogTemplate]:
+        with self._lock:
+            return self._templates.get(template_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [entry.summary() for entry in self._templates.values()]
+
+    @property
+    def memory_bytes(self) -> int:
+        with self._lock:
+            return sum(entry.memory_bytes for entry in self._templates.values())
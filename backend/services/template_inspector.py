@@ -0,0 +1,498 @@
+import io
+import base64
+import logging
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import IO, Dict, List, Any, Iterator, Optional, Tuple, Union
+
+from pptx.enum.shapes import MSO_SHAPE_TYPE, PP_PLACEHOLDER
+
+from .layout_space import free_rectangles, layout_obstacles
+
+logger = logging.getLogger(__name__)
+
+NS = {
+    'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
+    'p': 'http://schemas.openxmlformats.org/presentationml/2006/main',
+    'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
+    'rel': 'http://schemas.openxmlformats.org/package/2006/relationships',
+}
+
+A = '{%s}' % NS['a']
+P = '{%s}' % NS['p']
+R = '{%s}' % NS['r']
+
+RT_THEME = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/theme'
+
+EMU_PER_INCH = 914400
+
+# Order of the color slots inside <a:clrScheme>
+COLOR_SCHEME_SLOTS = ('dk1', 'lt1', 'dk2', 'lt2', 'accent1', 'accent2', 'accent3',
+                      'accent4', 'accent5', 'accent6', 'hlink', 'folHlink')
+
+# Palette order: text colors first, then accents, then backgrounds, so that
+# colors[0] and colors[1] are safe title/body text colors
+PALETTE_ORDER = ('dk1', 'dk2', 'accent1', 'accent2', 'accent3', 'accent4',
+                 'accent5', 'accent6', 'lt1', 'lt2')
+
+DEFAULT_COLORS = ['#000000', '#1F497D', '#4F81BD', '#9CBB58', '#FFFFFF']
+DEFAULT_FONT = 'Calibri'
+
+MEDIA_CONTENT_TYPES = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif',
+    '.bmp': 'image/bmp',
+    '.tif': 'image/tiff',
+    '.tiff': 'image/tiff',
+    '.emf': 'image/x-emf',
+    '.wmf': 'image/x-wmf',
+    '.svg': 'image/svg+xml',
+}
+
+# A layout placeholder without its own geometry inherits it from the master
+# placeholder of this type (mirrors python-pptx's LayoutPlaceholder)
+_MASTER_PLACEHOLDER_FOR = {
+    PP_PLACEHOLDER.CENTER_TITLE: PP_PLACEHOLDER.TITLE,
+    PP_PLACEHOLDER.TITLE: PP_PLACEHOLDER.TITLE,
+    PP_PLACEHOLDER.DATE: PP_PLACEHOLDER.DATE,
+    PP_PLACEHOLDER.FOOTER: PP_PLACEHOLDER.FOOTER,
+    PP_PLACEHOLDER.SLIDE_NUMBER: PP_PLACEHOLDER.SLIDE_NUMBER,
+}
+
+_SHAPE_TYPES = {
+    P + 'pic': MSO_SHAPE_TYPE.PICTURE,
+    P + 'grpSp': MSO_SHAPE_TYPE.GROUP,
+    P + 'cxnSp': MSO_SHAPE_TYPE.LINE,
+}
+
+
+# python-pptx only opens packages whose main part is a presentation; a
+# template's main part is otherwise identical
+TEMPLATE_MAIN_CONTENT_TYPES = {
+    b'application/vnd.openxmlformats-officedocument.presentationml.template.main+xml':
+        b'application/vnd.openxmlformats-officedocument.presentationml.presentation.main+xml',
+    b'application/vnd.ms-powerpoint.template.macroEnabled.main+xml':
+        b'application/vnd.ms-powerpoint.presentation.macroEnabled.main+xml',
+}
+
+
+def presentation_source(path: str) -> Union[str, IO[bytes]]:
+    """What to hand Presentation() for a .pptx or .potx
+
+    A presentation is opened from its path as usual. For a template, an
+    in-memory copy of the package is returned with the main part's content
+    type changed to the presentation one; no other part is touched.
+    """
+
+    with zipfile.ZipFile(path) as zf:
+        content_types = zf.read('[Content_Types].xml')
+        replaced = content_types
+        for template_type, presentation_type in TEMPLATE_MAIN_CONTENT_TYPES.items():
+            replaced = replaced.replace(template_type, presentation_type)
+        if replaced == content_types:
+            return path
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as out:
+            for info in zf.infolist():
+                data = replaced if info.filename == '[Content_Types].xml' else zf.read(info)
+                out.writestr(info, data)
+    buffer.seek(0)
+    return buffer
+
+
+def rels_part_name(part: str) -> str:
+    """Name of the relationships part belonging to a package part"""
+    directory, filename = posixpath.split(part)
+    return posixpath.join(directory, '_rels', filename + '.rels')
+
+
+def resolve_target(part: str, target: str) -> str:
+    """Absolute part name of a relationship target relative to its source part"""
+    if target.startswith('/'):
+        return target.lstrip('/')
+    return posixpath.normpath(posixpath.join(posixpath.dirname(part), target))
+
+
+def parse_theme_xml(stream) -> Dict[str, Any]:
+    """Read name, color scheme and font scheme from a theme part"""
+
+    theme = {'name': 'Default', 'color_scheme': [], 'colors_by_role': {}, 'font_scheme': {}}
+    in_scheme = None
+
+    for event, elem in ET.iterparse(stream, events=('start', 'end')):
+        tag = elem.tag
+        if event == 'start':
+            if tag == A + 'theme':
+                theme['name'] = elem.get('name') or 'Default'
+            elif tag in (A + 'majorFont', A + 'minorFont'):
+                in_scheme = 'major' if tag == A + 'majorFont' else 'minor'
+            elif tag == A + 'fmtScheme':
+                # Nothing we need lives past the color and font schemes
+                break
+            continue
+
+        if tag.startswith(A) and tag[len(A):] in COLOR_SCHEME_SLOTS:
+            color = _element_color(elem)
+            if color:
+                theme['colors_by_role'][tag[len(A):]] = color
+        elif tag == A + 'latin' and in_scheme and in_scheme not in theme['font_scheme']:
+            typeface = elem.get('typeface')
+            if typeface:
+                theme['font_scheme'][in_scheme] = typeface
+        elif tag in (A + 'majorFont', A + 'minorFont'):
+            in_scheme = None
+        elif tag == A + 'clrScheme':
+            theme['color_scheme'] = [theme['colors_by_role'][slot] for slot in COLOR_SCHEME_SLOTS
+                                     if slot in theme['colors_by_role']]
+
+    return theme
+
+
+def palette_from_theme(theme: Dict[str, Any]) -> List[str]:
+    """Template palette from a parsed theme's color scheme"""
+    roles = theme.get('colors_by_role') or {}
+    palette = [roles[slot] for slot in PALETTE_ORDER if slot in roles]
+    return palette or list(DEFAULT_COLORS)
+
+
+def fonts_from_theme(theme: Dict[str, Any]) -> Dict[str, Any]:
+    """Title/body fonts from a parsed theme's major/minor font scheme"""
+    scheme = theme.get('font_scheme') or {}
+    title_font = scheme.get('major') or scheme.get('minor') or DEFAULT_FONT
+    body_font = scheme.get('minor') or scheme.get('major') or DEFAULT_FONT
+    return {
+        'title_font': title_font,
+        'body_font': body_font,
+        'fonts_used': list(dict.fromkeys(f for f in (scheme.get('major'), scheme.get('minor')) if f))
+    }
+
+
+def _element_color(elem) -> Optional[str]:
+    """Hex color from a color-slot element holding <a:srgbClr> or <a:sysClr>"""
+    srgb = elem.find(A + 'srgbClr')
+    if srgb is not None and srgb.get('val'):
+        return '#' + srgb.get('val').upper()
+    sys_color = elem.find(A + 'sysClr')
+    if sys_color is not None and sys_color.get('lastClr'):
+        return '#' + sys_color.get('lastClr').upper()
+    return None
+
+
+class StreamingTemplateInspector:
+    """Reads template facets straight from the OOXML zip without building the python-pptx object model
+
+    Parts are parsed with iterparse as they are decompressed; media is listed from
+    the central directory and only decompressed when the images facet is read.
+    """
+
+    def __init__(self, template_path: str):
+        self.path = template_path
+
+        with zipfile.ZipFile(template_path) as zf:
+            self._names = set(zf.namelist())
+            if 'ppt/presentation.xml' not in self._names:
+                raise ValueError("Not a PowerPoint package: ppt/presentation.xml missing")
+
+            presentation = self._parse(zf, 'ppt/presentation.xml')
+            presentation_rels = self._rels(zf, 'ppt/presentation.xml')
+
+        size = presentation.find('p:sldSz', NS)
+        self._slide_size = (int(size.get('cx')), int(size.get('cy'))) if size is not None \
+            else (9144000, 6858000)
+
+        self._slide_parts = [presentation_rels[sld.get(R + 'id')]
+                             for sld in presentation.iterfind('p:sldIdLst/p:sldId', NS)
+                             if sld.get(R + 'id') in presentation_rels]
+        self._master_parts = [presentation_rels[m.get(R + 'id')]
+                              for m in presentation.iterfind('p:sldMasterIdLst/p:sldMasterId', NS)
+                              if m.get(R + 'id') in presentation_rels]
+        self._master_info: Optional[Dict[str, Any]] = None
+
+    # -- package helpers --------------------------------------------------
+
+    def _open(self) -> zipfile.ZipFile:
+        return zipfile.ZipFile(self.path)
+
+    def _parse(self, zf: zipfile.ZipFile, part: str):
+        with zf.open(part) as stream:
+            return ET.parse(stream).getroot()
+
+    def _rels(self, zf: zipfile.ZipFile, part: str, rel_type: Optional[str] = None) -> Dict[str, str]:
+        """Map relationship ids of a part to absolute part names"""
+        rels_part = rels_part_name(part)
+        if rels_part not in self._names:
+            return {}
+
+        rels = {}
+        for rel in self._parse(zf, rels_part).iterfind('rel:Relationship', NS):
+            if rel.get('TargetMode') == 'External':
+                continue
+            if rel_type and rel.get('Type') != rel_type:
+                continue
+            rels[rel.get('Id')] = resolve_target(part, rel.get('Target', ''))
+        return rels
+
+    def _top_level_shapes(self, zf: zipfile.ZipFile, part: str) -> Iterator[Any]:
+        """Stream the direct children of <p:spTree>, clearing each after it is consumed"""
+
+        depth = 0
+        tree_depth = None
+        with zf.open(part) as stream:
+            for event, elem in ET.iterparse(stream, events=('start', 'end')):
+                if event == 'start':
+                    depth += 1
+                    if elem.tag == P + 'spTree' and tree_depth is None:
+                        tree_depth = depth
+                    continue
+
+                if tree_depth is not None and depth == tree_depth + 1 \
+                        and elem.tag not in (P + 'nvGrpSpPr', P + 'grpSpPr'):
+                    yield elem
+                    elem.clear()
+                elif elem.tag == P + 'spTree' and depth == tree_depth:
+                    tree_depth = None
+                depth -= 1
+
+    @staticmethod
+    def _placeholder_type(shape) -> Optional[Any]:
+        ph = shape.find('p:nvSpPr/p:nvPr/p:ph', NS)
+        if ph is None:
+            ph = shape.find('p:nvPicPr/p:nvPr/p:ph', NS)
+        if ph is None:
+            return None
+        return PP_PLACEHOLDER.from_xml(ph.get('type', 'obj')), int(ph.get('idx', 0))
+
+    @staticmethod
+    def _geometry(shape) -> Optional[Tuple[int, int, int, int]]:
+        xfrm = shape.find('p:spPr/a:xfrm', NS)
+        if xfrm is None:
+            xfrm = shape.find('p:grpSpPr/a:xfrm', NS)
+        if xfrm is None:
+            # Tables and charts
+            xfrm = shape.find('p:xfrm', NS)
+        if xfrm is None:
+            return None
+        off = xfrm.find('a:off', NS)
+        ext = xfrm.find('a:ext', NS)
+        if off is None or ext is None:
+            return None
+        return (int(off.get('x')), int(off.get('y')), int(ext.get('cx')), int(ext.get('cy')))
+
+    @staticmethod
+    def _shape_text(shape) -> str:
+        paragraphs = []
+        for paragraph in shape.iterfind('p:txBody/a:p', NS):
+            paragraphs.append(''.join(t.text or '' for t in paragraph.iter(A + 't')))
+        return '\n'.join(paragraphs)
+
+    def _master(self) -> Dict[str, Any]:
+        """Layouts, theme part and placeholder geometry of the first slide master"""
+
+        if self._master_info is not None:
+            return self._master_info
+
+        info = {'part': None, 'layouts': [], 'theme': None, 'placeholders': {}, 'shapes': []}
+        if self._master_parts:
+            master = self._master_parts[0]
+            info['part'] = master
+            with self._open() as zf:
+                rels = self._rels(zf, master)
+                theme_rels = self._rels(zf, master, RT_THEME)
+                info['theme'] = next(iter(theme_rels.values()), None)
+
+                # Layout order is the master's sldLayoutIdLst, as in prs.slide_layouts
+                with zf.open(master) as stream:
+                    for _, elem in ET.iterparse(stream):
+                        if elem.tag == P + 'sldLayoutId' and elem.get(R + 'id') in rels:
+                            info['layouts'].append(rels[elem.get(R + 'id')])
+                        elif elem.tag == P + 'cSld':
+                            # Shapes are handled by _top_level_shapes below
+                            elem.clear()
+
+                for shape in self._top_level_shapes(zf, master):
+                    placeholder = self._placeholder_type(shape)
+                    geometry = self._geometry(shape)
+                    if placeholder and geometry and placeholder[0] not in info['placeholders']:
+                        info['placeholders'][placeholder[0]] = geometry
+
+                    text = self._shape_text(shape) if shape.tag == P + 'sp' else ''
+                    shape_info = {'tag': shape.tag, 'placeholder': placeholder is not None,
+                                  'text_box': shape.find('p:nvSpPr/p:cNvSpPr[@txBox="1"]', NS) is not None,
+                                  'geometry': geometry or (0, 0, 0, 0)}
+                    if text:
+                        shape_info['text'] = text
+                    info['shapes'].append(shape_info)
+
+        self._master_info = info
+        return info
+
+    def _media_content_type(self, name: str) -> str:
+        return MEDIA_CONTENT_TYPES.get(posixpath.splitext(name)[1].lower(), 'image/unknown')
+
+    # -- facets -----------------------------------------------------------
+
+    def layouts(self) -> List[Dict]:
+        """Layouts with placeholder geometry; used_for is filled in by the analyzer"""
+
+        master = self._master()
+        layouts = []
+        with self._open() as zf:
+            for index, part in enumerate(master['layouts']):
+                name = ''
+                placeholders = []
+                with zf.open(part) as stream:
+                    for event, elem in ET.iterparse(stream, events=('start', 'end')):
+                        if event == 'start':
+                            if elem.tag == P + 'cSld':
+                                name = elem.get('name', '')
+                            continue
+                        if elem.tag not in (P + 'sp', P + 'pic'):
+                            continue
+                        placeholder = self._placeholder_type(elem)
+                        if placeholder is not None:
+                            ph_type, idx = placeholder
+                            geometry = self._geometry(elem) or master['placeholders'].get(
+                                _MASTER_PLACEHOLDER_FOR.get(ph_type, PP_PLACEHOLDER.BODY),
+                                (0, 0, 0, 0))
+                            left, top, width, height = geometry
+                            placeholders.append({
+                                'type': ph_type,
+                                'idx': idx,
+                                'left': left,
+                                'top': top,
+                                'width': width,
+                                'height': height
+                            })
+                        elem.clear()
+
+                layouts.append({'index': index, 'name': name, 'placeholders': placeholders})
+        return layouts
+
+    def layout_free_space(self) -> List[List[Tuple[int, int, int, int]]]:
+        """Free rectangles on each layout (same order as layouts) for floating images"""
+
+        master = self._master()
+        master_shapes = [shape['geometry'] for shape in master['shapes'] if not shape['placeholder']]
+        slide_width, slide_height = self._slide_size
+
+        free_space = []
+        with self._open() as zf:
+            for part in master['layouts']:
+                root = self._parse(zf, part)
+                placeholders, shapes = [], []
+                tree = root.find('p:cSld/p:spTree', NS)
+                for shape in (tree if tree is not None else []):
+                    if shape.tag in (P + 'nvGrpSpPr', P + 'grpSpPr'):
+                        continue
+                    placeholder = self._placeholder_type(shape)
+                    geometry = self._geometry(shape)
+                    if placeholder is not None:
+                        placeholders.append((placeholder[0], geometry or master['placeholders'].get(
+                            _MASTER_PLACEHOLDER_FOR.get(placeholder[0], PP_PLACEHOLDER.BODY),
+                            (0, 0, 0, 0))))
+                    elif geometry:
+                        shapes.append(geometry)
+                if root.get('showMasterSp') != '0':
+                    shapes += master_shapes
+                free_space.append(free_rectangles(slide_width, slide_height,
+                                                  layout_obstacles(placeholders, shapes)))
+        return free_space
+
+    def theme(self) -> Dict:
+        theme_part = self._master()['theme']
+        if not theme_part or theme_part not in self._names:
+            return {'name': 'Default', 'color_scheme': [], 'colors_by_role': {}, 'font_scheme': {}}
+        with self._open() as zf, zf.open(theme_part) as stream:
+            return parse_theme_xml(stream)
+
+    def colors(self) -> List[str]:
+        """Palette from the theme's color scheme"""
+        return palette_from_theme(self.theme())
+
+    def fonts(self) -> Dict:
+        """Title (major) and body (minor) fonts from the theme's font scheme"""
+        return fonts_from_theme(self.theme())
+
+    def images(self) -> List[Dict]:
+        """Pictures on the example slides; this is the only facet that decompresses media"""
+
+        images = []
+        with self._open() as zf:
+            for slide_idx, part in enumerate(self._slide_parts):
+                rels = self._rels(zf, part)
+                for shape_idx, shape in enumerate(self._top_level_shapes(zf, part)):
+                    if shape.tag != P + 'pic':
+                        continue
+                    blip = shape.find('p:blipFill/a:blip', NS)
+                    media = rels.get(blip.get(R + 'embed')) if blip is not None else None
+                    if not media or media not in self._names:
+                        continue
+                    try:
+                        image_data = zf.read(media)
+                        left, top, width, height = self._geometry(shape) or (0, 0, 0, 0)
+                        images.append({
+                            'slide_index': slide_idx,
+                            'shape_index': shape_idx,
+                            'left': left,
+                            'top': top,
+                            'width': width,
+                            'height': height,
+                            'data': base64.b64encode(image_data).decode('utf-8'),
+                            'content_type': self._media_content_type(media),
+                            'size': len(image_data)
+                        })
+                    except Exception as e:
+                        logger.warning(f"Error extracting image from slide {slide_idx}: {e}")
+        return images
+
+    def image_count(self) -> int:
+        with self._open() as zf:
+            return sum(1 for part in self._slide_parts
+                       for shape in self._top_level_shapes(zf, part) if shape.tag == P + 'pic')
+
+    def media(self) -> List[Dict]:
+        """Media parts listed from the zip central directory, without decompressing them"""
+        with self._open() as zf:
+            return [{
+                'name': info.filename,
+                'size': info.file_size,
+                'compressed_size': info.compress_size,
+                'content_type': self._media_content_type(info.filename)
+            } for info in zf.infolist() if info.filename.startswith('ppt/media/')]
+
+    def slide_size(self) -> Dict:
+        width, height = self._slide_size
+        return {
+            'width': width,
+            'height': height,
+            'width_inches': width / EMU_PER_INCH,
+            'height_inches': height / EMU_PER_INCH
+        }
+
+    def master_slides(self) -> Dict:
+        master = self._master()
+        shapes = []
+        for shape in master['shapes']:
+            if shape['placeholder']:
+                shape_type = MSO_SHAPE_TYPE.PLACEHOLDER
+            elif shape['text_box']:
+                shape_type = MSO_SHAPE_TYPE.TEXT_BOX
+            else:
+                shape_type = _SHAPE_TYPES.get(shape['tag'], MSO_SHAPE_TYPE.AUTO_SHAPE)
+            left, top, width, height = shape['geometry']
+            shape_info = {'type': shape_type, 'left': left, 'top': top,
+                          'width': width, 'height': height}
+            if shape.get('text'):
+                shape_info['has_text'] = True
+                shape_info['text_sample'] = shape['text'][:50]
+            shapes.append(shape_info)
+
+        return {
+            'layouts_count': len(master['layouts']),
+            'has_master': master['part'] is not None,
+            'master_shapes': shapes
+        }
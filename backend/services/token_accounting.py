@@ -0,0 +1,122 @@
+import re
+import math
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+from .slide_model import MAX_BULLETS
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio shared by the GPT, Claude and Gemini tokenizers
+# for English prose. Good enough for budgeting without pulling in a tokenizer.
+CHARS_PER_TOKEN = 4
+
+# USD per 1K tokens: (input, output)
+MODEL_PRICING = {
+    'gpt-3.5-turbo': (0.0005, 0.0015),
+    'claude-3-sonnet-20240229': (0.003, 0.015),
+    'gemini-pro': (0.0005, 0.0015),
+}
+
+# Word limits the prompts give the model for one slide
+MAX_TITLE_WORDS = 12
+MAX_BULLET_WORDS = 15
+MAX_NOTES_WORDS = 30
+TOKENS_PER_WORD = 1.3
+# Keys, quotes and brackets of one slide object, and the quoting around each bullet
+SLIDE_JSON_TOKENS = 30
+BULLET_JSON_TOKENS = 3
+
+# Output budget for a slide that uses every limit: a full title, MAX_BULLETS
+# full bullets and full notes
+TOKENS_PER_SLIDE = math.ceil(
+    (MAX_TITLE_WORDS + MAX_BULLETS * MAX_BULLET_WORDS + MAX_NOTES_WORDS) * TOKENS_PER_WORD
+) + SLIDE_JSON_TOKENS + MAX_BULLETS * BULLET_JSON_TOKENS
+RESPONSE_OVERHEAD_TOKENS = 60
+MIN_MAX_TOKENS = 256
+# Largest completion the supported chat models accept
+MAX_MAX_TOKENS = 4096
+
+# Range the analysis prompt allows when no slide count is requested
+MIN_SLIDES = 5
+MAX_SLIDES = 15
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a piece of text without a tokenizer"""
+    if not text:
+        return 0
+    return max(1, (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN)
+
+
+def compact_prompt(prompt: str) -> str:
+    """Strip indentation and collapse blank-line runs left behind by f-string templates"""
+    lines = [line.strip() for line in prompt.strip().splitlines()]
+    compacted = '\n'.join(lines)
+    return re.sub(r'\n{3,}', '\n\n', compacted)
+
+
+def max_tokens_for_slides(slide_count: int) -> int:
+    """Size the completion budget from the number of slides requested"""
+    budget = RESPONSE_OVERHEAD_TOKENS + TOKENS_PER_SLIDE * max(1, slide_count)
+    return max(MIN_MAX_TOKENS, min(MAX_MAX_TOKENS, budget))
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    """Estimate the USD cost of a call"""
+    input_price, output_price = MODEL_PRICING.get(model, (0.0, 0.0))
+    return round((input_tokens * input_price + output_tokens * output_price) / 1000, 6)
+
+
+class TokenUsage:
+    """Accumulates per-call token usage for a single request"""
+
+    def __init__(self):
+        self.calls: List[Dict[str, Any]] = []
+
+    def record(self,
+               provider: str,
+               model: str,
+               input_tokens: int,
+               output_tokens: int,
+               max_tokens: Optional[int] = None,
+               estimated: bool = False):
+        """Record one LLM call"""
+        call = {
+            'provider': provider,
+            'model': model,
+            'input_tokens': input_tokens,
+            'output_tokens': output_tokens,
+            'max_tokens': max_tokens,
+            'estimated': estimated,
+            'cost': estimate_cost(model, input_tokens, output_tokens),
+            'timestamp': datetime.now().isoformat()
+        }
+        self.calls.append(call)
+        logger.debug(
+            f"LLM call used {input_tokens} input / {output_tokens} output tokens")
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals across all recorded calls"""
+        return {
+            'calls': len(self.calls),
+            'input_tokens': sum(c['input_tokens'] for c in self.calls),
+            'output_tokens': sum(c['output_tokens'] for c in self.calls),
+            'cost': round(sum(c['cost'] for c in self.calls), 6)
+        }
+
+    def reset(self):
+        self.calls = []
+
+
+def merge_usage(previous: Optional[Dict], current: Dict) -> Dict:
+    """Add a request's usage summary onto a session's running totals"""
+    if not previous:
+        return dict(current)
+    return {
+        'calls': previous.get('calls', 0) + current.get('calls', 0),
+        'input_tokens': previous.get('input_tokens', 0) + current.get('input_tokens', 0),
+        'output_tokens': previous.get('output_tokens', 0) + current.get('output_tokens', 0),
+        'cost': round(previous.get('cost', 0.0) + current.get('cost', 0.0), 6)
+    }
@@ -0,0 +1,276 @@
+import os
+import struct
+import hashlib
+import logging
+import tempfile
+import zipfile
+import zlib
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Hostile-archive limits
+MAX_UNCOMPRESSED_BYTES = 300 * 1024 * 1024
+MAX_ENTRIES = 5000
+MAX_COMPRESSION_RATIO = 100
+# Ratios are only meaningful for entries at least this large
+RATIO_CHECK_MIN_BYTES = 1024 * 1024
+# [Content_Types].xml is buffered for inspection up to this compressed size
+MAX_CONTENT_TYPES_BYTES = 256 * 1024
+
+PRESENTATION_CONTENT_TYPES = (
+    b'application/vnd.openxmlformats-officedocument.presentationml.presentation.main+xml',
+    b'application/vnd.openxmlformats-officedocument.presentationml.template.main+xml',
+    b'application/vnd.ms-powerpoint.presentation.macroEnabled.main+xml',
+    b'application/vnd.ms-powerpoint.template.macroEnabled.main+xml',
+)
+
+LOCAL_HEADER = b'PK\x03\x04'
+CENTRAL_HEADER = b'PK\x01\x02'
+LOCAL_HEADER_STRUCT = struct.Struct('<4sHHHHHIIIHH')
+
+
+class UploadRejected(Exception):
+    """Raised as soon as an upload is known to be invalid or hostile
+
+    Deliberately not a ValueError: werkzeug's form parser silently swallows those.
+    """
+
+
+def _check_entry_name(name: str):
+    if name.startswith('/') or '..' in name.split('/') or '\\' in name:
+        raise UploadRejected(f"Illegal path in package: {name[:100]}")
+
+
+def _check_content_types(xml: bytes):
+    if not any(content_type in xml for content_type in PRESENTATION_CONTENT_TYPES):
+        raise UploadRejected("Package is not a PowerPoint presentation or template")
+
+
+class ZipStreamValidator:
+    """Validates a zip archive incrementally from its local file headers as bytes arrive"""
+
+    def __init__(self):
+        self._buffer = b''
+        self._skip = 0
+        self._capture: Optional[bytearray] = None
+        self._capture_method = 0
+        self._offset = 0
+        # Once sizes are only known from data descriptors we can no longer walk
+        # the stream; the central directory check takes over
+        self.opaque = False
+        self.reached_central_directory = False
+        self.entries = 0
+        self.uncompressed_size = 0
+        self.content_types_checked = False
+
+    def feed(self, data: bytes):
+        if self.opaque or self.reached_central_directory:
+            return
+
+        self._buffer += data
+        while self._buffer and not (self.opaque or self.reached_central_directory):
+            if self._skip:
+                taken = self._buffer[:self._skip]
+                if self._capture is not None:
+                    self._capture.extend(taken)
+                self._skip -= len(taken)
+                self._offset += len(taken)
+                self._buffer = self._buffer[len(taken):]
+                if not self._skip and self._capture is not None:
+                    self._finish_capture()
+                continue
+
+            if len(self._buffer) < LOCAL_HEADER_STRUCT.size:
+                return
+
+            signature = self._buffer[:4]
+            if signature == CENTRAL_HEADER:
+                self.reached_central_directory = True
+                return
+            if signature != LOCAL_HEADER:
+                if self._offset == 0:
+                    raise UploadRejected("File is not a valid .pptx/.potx package")
+                # Anything else (e.g. a data descriptor) means we lose our place
+                self.opaque = True
+                return
+
+            (_, _, flags, method, _, _, _, compressed, uncompressed,
+             name_length, extra_length) = LOCAL_HEADER_STRUCT.unpack_from(self._buffer)
+            header_size = LOCAL_HEADER_STRUCT.size + name_length + extra_length
+            if len(self._buffer) < header_size:
+                return
+
+            name = self._buffer[LOCAL_HEADER_STRUCT.size:LOCAL_HEADER_STRUCT.size + name_length]
+            name = name.decode('utf-8', 'replace')
+            self._check_entry(name, compressed, uncompressed)
+
+            self._buffer = self._buffer[header_size:]
+            self._offset += header_size
+
+            if flags & 0x08 or compressed == 0xFFFFFFFF:
+                # Sizes live in a trailing data descriptor or ZIP64 extra field
+                self.opaque = True
+                return
+
+            if name == '[Content_Types].xml' and compressed <= MAX_CONTENT_TYPES_BYTES:
+                self._capture = bytearray()
+                self._capture_method = method
+                if compressed == 0:
+                    self._finish_capture()
+            self._skip = compressed
+
+    def _check_entry(self, name: str, compressed: int, uncompressed: int):
+        self.entries += 1
+        if self.entries > MAX_ENTRIES:
+            raise UploadRejected("Package contains too many parts")
+
+        _check_entry_name(name)
+
+        if uncompressed != 0xFFFFFFFF:
+            self.uncompressed_size += uncompressed
+            if self.uncompressed_size > MAX_UNCOMPRESSED_BYTES:
+                raise UploadRejected("Package expands beyond the allowed size")
+            if uncompressed >= RATIO_CHECK_MIN_BYTES and \
+                    uncompressed > MAX_COMPRESSION_RATIO * max(1, compressed):
+                raise UploadRejected("Package part has a suspicious compression ratio")
+
+    def _finish_capture(self):
+        data = bytes(self._capture)
+        self._capture = None
+        try:
+            if self._capture_method == zipfile.ZIP_DEFLATED:
+                data = zlib.decompressobj(-15).decompress(data, MAX_UNCOMPRESSED_BYTES)
+            elif self._capture_method != zipfile.ZIP_STORED:
+                return
+        except zlib.error:
+            raise UploadRejected("Package content types are corrupt")
+
+        _check_content_types(data)
+        self.content_types_checked = True
+
+
+class ValidatingSpoolFile:
+    """Upload sink that hashes, size-checks and zip-validates chunks as they are written
+
+    Used as werkzeug's file stream so the upload lands on disk exactly once and
+    bad packages are rejected before the rest of the body is read.
+    """
+
+    def __init__(self, directory: str, filename: Optional[str] = None,
+                 max_bytes: Optional[int] = None):
+        self._file = tempfile.NamedTemporaryFile(dir=directory, suffix='.upload', delete=False)
+        self.name = self._file.name
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self.validator = ZipStreamValidator()
+        self.persisted = False
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        try:
+            if self.max_bytes is not None and self.size > self.max_bytes:
+                raise UploadRejected("File too large")
+            self.validator.feed(data)
+        except UploadRejected:
+            self.discard()
+            raise
+
+        self._hash.update(data)
+        return self._file.write(data)
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    def flush(self):
+        self._file.flush()
+
+    def readable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def persist(self, path: str) -> str:
+        """Move the spooled upload to its final path without copying it"""
+        self._file.close()
+        os.replace(self.name, path)
+        self.name = path
+        self.persisted = True
+        return path
+
+    def discard(self):
+        self._file.close()
+        if not self.persisted and os.path.exists(self.name):
+            os.remove(self.name)
+
+    def close(self):
+        # Uploads that were never persisted are not worth keeping
+        self.discard()
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+
+def validate_package(path: str, spool: Optional[ValidatingSpoolFile] = None) -> Dict[str, Any]:
+    """Check an uploaded package's central directory; cheap compared to a full parse"""
+
+    try:
+        with zipfile.ZipFile(path) as zf:
+            infos = zf.infolist()
+            if len(infos) > MAX_ENTRIES:
+                raise UploadRejected("Package contains too many parts")
+
+            total = 0
+            for info in infos:
+                _check_entry_name(info.filename)
+                total += info.file_size
+                if info.file_size >= RATIO_CHECK_MIN_BYTES and \
+                        info.file_size > MAX_COMPRESSION_RATIO * max(1, info.compress_size):
+                    raise UploadRejected("Package part has a suspicious compression ratio")
+            if total > MAX_UNCOMPRESSED_BYTES:
+                raise UploadRejected("Package expands beyond the allowed size")
+
+            names = {info.filename for info in infos}
+            if '[Content_Types].xml' not in names or 'ppt/presentation.xml' not in names:
+                raise UploadRejected("File is not a valid .pptx/.potx package")
+
+            if not (spool and spool.validator.content_types_checked):
+                content_types = zf.getinfo('[Content_Types].xml')
+                if content_types.file_size > MAX_CONTENT_TYPES_BYTES * 16:
+                    raise UploadRejected("Package content types are too large")
+                _check_content_types(zf.read(content_types))
+
+    except zipfile.BadZipFile:
+        raise UploadRejected("File is not a valid .pptx/.potx package")
+
+    return {
+        'sha256': spool.sha256 if spool else _hash_file(path),
+        'size': os.path.getsize(path),
+        'entries': len(infos),
+        'uncompressed_size': total
+    }
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,185 @@
+"""Soak test: run many synthetic analyze/generate cycles and check that memory plateaus
+
+    python soak_test.py --cycles 2000 --template corporate.pptx
+
+Every cycle drives the real Flask app in-process: analyze text (with the
+local engine, so no provider is called), upload a template, generate the
+deck, write speaker notes and render a preview. Sessions are expired a fixed
+number of cycles after they were made, so their count is the same at every
+sample however fast the machine is. Caches are shrunk so they fill up during
+the warm-up instead of looking like growth. The run fails if RSS keeps
+climbing after warm-up, or if sessions, opened templates or files pile up.
+"""
+
+import argparse
+import gc
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import deque
+from typing import Dict, List, Any, Optional
+
+os.environ.setdefault('MEMORY_SAMPLE_RATE', '0.02')
+
+import app as backend  # noqa: E402
+from services.admission import AdmissionController  # noqa: E402
+from services.memory_monitor import current_rss_bytes, session_store_stats  # noqa: E402
+
+logger = logging.getLogger('soak_test')
+
+SAMPLE_TEXT = """Quarterly update {n}
+
+Revenue grew in every region this quarter, led by the enterprise segment.
+Costs stayed flat while headcount increased by {n} percent.
+
+Product
+The new editor shipped to all customers. Adoption reached {n} thousand users.
+Reliability improved after the storage migration.
+
+Next steps
+Expand the partner program. Hire for support. Review pricing in cycle {n}.
+"""
+
+
+def _blank_template() -> str:
+    from pptx import Presentation
+
+    path = os.path.join(tempfile.mkdtemp(prefix='soak-'), 'blank.pptx')
+    Presentation().save(path)
+    return path
+
+
+def _check(response, step: str) -> Dict[str, Any]:
+    if response.status_code != 200:
+        raise RuntimeError(f"{step} failed with {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return response.get_json(silent=True) or {}
+
+
+def run_cycle(client, n: int, template_path: str) -> str:
+    session = _check(client.post('/api/analyze-text', json={
+        'text': SAMPLE_TEXT.format(n=n), 'provider': 'local'}), 'analyze-text')
+    session_id = session['session_id']
+
+    with open(template_path, 'rb') as f:
+        _check(client.post('/api/analyze-template', data={
+            'session_id': session_id, 'template': (f, os.path.basename(template_path))},
+            content_type='multipart/form-data'), 'analyze-template')
+
+    _check(client.post('/api/generate-presentation', json={'session_id': session_id}),
+           'generate-presentation')
+    _check(client.post('/api/generate-speaker-notes', json={
+        'session_id': session_id, 'provider': 'local'}), 'generate-speaker-notes')
+    _check(client.post('/api/preview', json={'session_id': session_id}), 'preview')
+    return session_id
+
+
+def _sample(cycle: int) -> Dict[str, Any]:
+    gc.collect()
+    temp = backend.temp_tracker.stats()
+    sessions = session_store_stats(backend.session_store)
+    return {
+        'cycle': cycle,
+        'rss': current_rss_bytes(),
+        'temp_files': temp['files'],
+        'temp_dirs': temp['directories'],
+        'sessions': sessions['sessions'],
+        'session_bytes': sessions['bytes'],
+        'held_sources': sessions['held_template_sources']
+    }
+
+
+def evaluate(samples: List[Dict[str, Any]], warmup: float, max_growth_mb: float) -> List[str]:
+    """Reasons the run did not plateau; empty if it did"""
+
+    measured = samples[int(len(samples) * warmup):]
+    if len(measured) < 4:
+        return ["Not enough samples after warm-up; run more cycles"]
+
+    half = len(measured) // 2
+    early, late = measured[:half], measured[half:]
+    problems = []
+
+    growth = statistics.median(s['rss'] for s in late) - statistics.median(s['rss'] for s in early)
+    if growth > max_growth_mb * 1024 * 1024:
+        problems.append(f"RSS still growing after warm-up: +{growth / 1024 / 1024:.1f}MB "
+                        f"between halves (limit {max_growth_mb}MB)")
+
+    # Counts move with cache eviction, so one high sample is noise; a late half
+    # whose median sits above everything the early half saw is growth
+    for field in ('temp_files', 'temp_dirs', 'sessions', 'held_sources'):
+        early_max = max(s[field] for s in early)
+        late_median = statistics.median(s[field] for s in late)
+        if late_median > early_max:
+            problems.append(f"{field} keeps growing: at most {early_max} early, "
+                            f"median {late_median:g} late")
+    return problems
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Soak-test the backend for memory growth")
+    parser.add_argument('--cycles', type=int, default=2000)
+    parser.add_argument('--template', default=None, help="Template to upload (default: a blank deck)")
+    parser.add_argument('--sample-every', type=int, default=50, help="Cycles between memory samples")
+    parser.add_argument('--warmup', type=float, default=0.25, help="Fraction of samples ignored as warm-up")
+    parser.add_argument('--max-growth-mb', type=float, default=8.0,
+                        help="Allowed RSS growth between the two halves of the measured run")
+    parser.add_argument('--session-cycles', type=int, default=5, help="Cycles a session lives before it is expired")
+    parser.add_argument('--cache-mb', type=int, default=2, help="Size of each server-side cache during the run")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    # Per-request logging from the app would drown the report
+    logging.getLogger().setLevel(logging.WARNING)
+    logger.setLevel(logging.INFO)
+
+    template_path = args.template or _blank_template()
+
+    # A single in-process client would be rate limited like one very busy user
+    backend.admission = AdmissionController(key_rate=1e6, key_burst=1e6, ip_rate=1e6, ip_burst=1e6)
+    cache_bytes = args.cache_mb * 1024 * 1024
+    backend.deck_cache.max_bytes = cache_bytes
+    backend.slide_part_cache.max_bytes = cache_bytes
+    backend.thumbnail_renderer.cache.max_bytes = cache_bytes
+
+    client = backend.app.test_client()
+    samples = []
+    started = time.monotonic()
+
+    live_sessions = deque()
+
+    for cycle in range(1, args.cycles + 1):
+        live_sessions.append(run_cycle(client, cycle, template_path))
+        while len(live_sessions) > args.session_cycles:
+            backend.drop_session(live_sessions.popleft())
+
+        if cycle % args.sample_every == 0 or cycle == args.cycles:
+            sample = _sample(cycle)
+            samples.append(sample)
+            logger.info(f"cycle {cycle}: rss {sample['rss'] / 1024 / 1024:.1f}MB, "
+                        f"{sample['sessions']} sessions ({sample['session_bytes'] // 1024}KB), "
+                        f"{sample['temp_files']} temp files in {sample['temp_dirs']} dirs")
+
+    elapsed = time.monotonic() - started
+    problems = evaluate(samples, args.warmup, args.max_growth_mb)
+    print(f"{args.cycles} cycles in {elapsed:.1f}s ({args.cycles / elapsed:.1f} cycles/s), "
+          f"peak RSS {backend.memory_monitor.stats()['peak_rss_bytes'] / 1024 / 1024:.1f}MB")
+    for name, entry in sorted(backend.memory_monitor.stats()['endpoints'].items()):
+        print(f"  {name}: peak {entry['max_peak_bytes'] / 1024:.0f}KB traced "
+              f"over {entry['samples']} sampled requests")
+
+    if problems:
+        for problem in problems:
+            print(f"FAIL: {problem}")
+        return 1
+    print("PASS: memory plateaued")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
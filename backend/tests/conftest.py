@@ -0,0 +1,36 @@
+import os
+import sys
+import zipfile
+
+import pytest
+from pptx import Presentation
+
+# Services are imported the way app.py imports them
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PRESENTATION_MAIN = b'presentationml.presentation.main+xml'
+TEMPLATE_MAIN = b'presentationml.template.main+xml'
+
+
+def save_as_template(pptx_path: str, potx_path: str) -> str:
+    """Copy a .pptx into a .potx, which differs only in the main part's content type"""
+    with zipfile.ZipFile(pptx_path) as source, \
+            zipfile.ZipFile(potx_path, 'w', zipfile.ZIP_DEFLATED) as target:
+        for info in source.infolist():
+            data = source.read(info)
+            if info.filename == '[Content_Types].xml':
+                data = data.replace(PRESENTATION_MAIN, TEMPLATE_MAIN)
+            target.writestr(info, data)
+    return potx_path
+
+
+@pytest.fixture
+def blank_pptx(tmp_path) -> str:
+    path = str(tmp_path / 'blank.pptx')
+    Presentation().save(path)
+    return path
+
+
+@pytest.fixture
+def blank_potx(blank_pptx, tmp_path) -> str:
+    return save_as_template(blank_pptx, str(tmp_path / 'blank.potx'))
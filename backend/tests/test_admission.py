@@ -0,0 +1,95 @@
+import asyncio
+import threading
+
+import pytest
+
+from services.admission import AdmissionRejected, WorkQueue
+
+
+def test_async_waiters_queue_without_threads():
+    queue = WorkQueue('llm', max_in_flight=2, max_waiting=100, max_wait_seconds=5)
+    threads_before = threading.active_count()
+    peak = []
+
+    async def work(n):
+        async with queue.slot_async(f"client {n}"):
+            peak.append((queue.in_flight, threading.active_count()))
+            await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(*(work(n) for n in range(40)))
+
+    asyncio.run(run())
+
+    assert max(in_flight for in_flight, _ in peak) == 2
+    assert max(threads for _, threads in peak) == threads_before
+    assert queue.stats()['in_flight'] == 0 and queue.stats()['waiting'] == 0
+
+
+def test_cancelled_waiter_leaves_no_slot_behind():
+    queue = WorkQueue('llm', max_in_flight=1, max_waiting=10, max_wait_seconds=5)
+
+    async def run():
+        holder_entered = asyncio.Event()
+        release = asyncio.Event()
+
+        async def holder():
+            async with queue.slot_async('a'):
+                holder_entered.set()
+                await release.wait()
+
+        async def waiter():
+            async with queue.slot_async('b'):
+                pass
+
+        holding = asyncio.ensure_future(holder())
+        await holder_entered.wait()
+        waiting = asyncio.ensure_future(waiter())
+        await asyncio.sleep(0.1)
+        assert queue.waiting == 1
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        release.set()
+        await holding
+
+    asyncio.run(run())
+
+    assert queue.stats()['in_flight'] == 0 and queue.stats()['waiting'] == 0
+
+
+def test_async_waiter_is_rejected_after_the_wait_bound():
+    queue = WorkQueue('llm', max_in_flight=1, max_waiting=10, max_wait_seconds=0.2)
+
+    async def run():
+        async with queue.slot_async('a'):
+            with pytest.raises(AdmissionRejected):
+                async with queue.slot_async('b'):
+                    pass
+
+    asyncio.run(run())
+
+    assert queue.rejected == 1 and queue.waiting == 0 and queue.in_flight == 0
+
+
+def test_sync_and_async_users_share_the_cap():
+    queue = WorkQueue('build', max_in_flight=1, max_waiting=10, max_wait_seconds=5)
+    entered = threading.Event()
+    release = threading.Event()
+
+    def sync_holder():
+        with queue.slot('sync'):
+            entered.set()
+            release.wait()
+
+    thread = threading.Thread(target=sync_holder)
+    thread.start()
+    entered.wait()
+
+    async def run():
+        asyncio.get_running_loop().call_later(0.2, release.set)
+        async with queue.slot_async('async'):
+            return queue.in_flight
+
+    assert asyncio.run(run()) == 1
+    thread.join()
+    assert queue.in_flight == 0
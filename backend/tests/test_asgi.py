@@ -0,0 +1,97 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+import app as backend
+import asgi
+from services.static_assets import StaticAssets
+
+CHUNK = b'x' * (1024 * 1024)
+LIMIT_CHUNKS = backend.app.config['MAX_CONTENT_LENGTH'] // len(CHUNK)
+
+
+def _upload(total_chunks: int, declare_length: bool):
+    headers = [(b'content-type', b'application/json')]
+    if declare_length:
+        headers.append((b'content-length', str(total_chunks * len(CHUNK)).encode()))
+    scope = {'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'POST',
+             'scheme': 'http', 'path': '/api/analyze-text', 'raw_path': b'/api/analyze-text',
+             'root_path': '', 'query_string': b'', 'client': ('127.0.0.1', 1234),
+             'server': ('127.0.0.1', 5000), 'headers': headers}
+    read = []
+    messages = []
+
+    async def receive():
+        read.append(True)
+        return {'type': 'http.request', 'body': CHUNK, 'more_body': len(read) < total_chunks}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(asgi.application(scope, receive, send))
+    return messages[0]['status'], json.loads(messages[1]['body']), len(read)
+
+
+def test_declared_oversize_body_is_refused_unread():
+    status, body, chunks_read = _upload(80, declare_length=True)
+
+    assert status == 413
+    assert 'too large' in body['error']
+    assert chunks_read == 0
+
+
+def test_undeclared_oversize_body_is_cut_off_at_the_limit():
+    status, _, chunks_read = _upload(80, declare_length=False)
+
+    assert status == 413
+    assert chunks_read == LIMIT_CHUNKS + 1
+
+
+@pytest.fixture
+def build(tmp_path, monkeypatch):
+    build_dir = tmp_path / 'build'
+    (build_dir / 'static' / 'media').mkdir(parents=True)
+    (build_dir / 'index.html').write_text('<html></html>')
+    # Bigger than one read, and not worth precompressing
+    (build_dir / 'static' / 'media' / 'photo.1a2b3c4d.png').write_bytes(os.urandom(asgi.STATIC_CHUNK_BYTES * 2 + 10))
+    assets = StaticAssets(str(build_dir), str(tmp_path / 'cache'))
+    assets.load()
+    monkeypatch.setattr(backend, 'static_assets', assets)
+    return build_dir
+
+
+def _page_load(path: str, extensions: dict):
+    scope = {'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+             'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'root_path': '',
+             'query_string': b'', 'client': ('127.0.0.1', 1234), 'server': ('127.0.0.1', 5000),
+             'headers': [], 'extensions': extensions}
+    messages = []
+
+    async def receive():
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(asgi.application(scope, receive, send))
+    return messages
+
+
+def test_page_load_is_handed_to_the_server_when_it_offers_pathsend(build):
+    messages = _page_load('/static/media/photo.1a2b3c4d.png', {'http.response.pathsend': {}})
+
+    assert messages[0]['status'] == 200
+    assert messages[1] == {'type': 'http.response.pathsend',
+                           'path': str(build / 'static' / 'media' / 'photo.1a2b3c4d.png')}
+
+
+def test_page_load_is_read_in_chunks_without_pathsend(build):
+    messages = _page_load('/static/media/photo.1a2b3c4d.png', {})
+
+    body = [message for message in messages[1:] if message['type'] == 'http.response.body']
+    assert len(body) == 3
+    assert b''.join(message['body'] for message in body) == \
+        (build / 'static' / 'media' / 'photo.1a2b3c4d.png').read_bytes()
+    assert not body[-1]['more_body']
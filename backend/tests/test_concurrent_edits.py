@@ -0,0 +1,109 @@
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+
+import app as backend
+import asgi
+from services.llm_service import LLMService
+from services.slide_model import Deck
+
+SLIDES = [{'slide_number': n, 'slide_type': 'content', 'title': f"Slide {n}", 'content': [f"Point {n}"]}
+          for n in range(1, 5)]
+
+
+async def _post(path: str, payload: dict):
+    body = json.dumps(payload).encode('utf-8')
+    scope = {'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'POST',
+             'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'root_path': '',
+             'query_string': b'', 'client': ('127.0.0.1', 1234), 'server': ('127.0.0.1', 5000),
+             'headers': [(b'content-type', b'application/json'),
+                         (b'content-length', str(len(body)).encode())]}
+    received = []
+    sent = asyncio.Event()
+
+    async def receive():
+        if not received:
+            received.append(True)
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        await sent.wait()
+        return {'type': 'http.disconnect'}
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+        if message['type'] == 'http.response.body' and not message.get('more_body'):
+            sent.set()
+
+    await asgi.application(scope, receive, send)
+    status = messages[0]['status']
+    return status, json.loads(b''.join(m.get('body', b'') for m in messages[1:]))
+
+
+@pytest.fixture
+def session_id():
+    session_id = 'concurrent-edits'
+    backend.session_store[session_id] = {'created': datetime.now(), 'slide_data': Deck.from_raw(SLIDES),
+                                         'text': 'Some text', 'guidance': ''}
+    yield session_id
+    backend.session_store.pop(session_id, None)
+
+
+@pytest.fixture
+def slow_provider(monkeypatch):
+    async def regenerate(self, slide, excerpt, neighbor_titles, guidance='', instructions='', fallback=True):
+        await asyncio.sleep(0.2 if slide.slide_number == 2 else 0.1)
+        return slide.replace(title=f"NEW {slide.slide_number}")
+
+    async def notes(self, slides, guidance='', concurrency=8, fallback=True):
+        await asyncio.sleep(0.3)
+        deck = Deck.from_raw(slides)
+        return deck.with_notes({i: f"Notes {slide.title}" for i, slide in enumerate(deck)})
+
+    monkeypatch.setattr(LLMService, 'regenerate_slide_async', regenerate)
+    monkeypatch.setattr(LLMService, 'generate_speaker_notes_async', notes)
+
+
+def _titles(session_id):
+    return [slide.title for slide in backend.session_store[session_id]['slide_data']]
+
+
+def test_concurrent_slide_rewrites_both_survive(session_id, slow_provider):
+    async def both():
+        return await asyncio.gather(
+            _post('/api/regenerate-slide', {'session_id': session_id, 'slide_number': 2, 'provider': 'local'}),
+            _post('/api/regenerate-slide', {'session_id': session_id, 'slide_number': 3, 'provider': 'local'}))
+
+    results = asyncio.run(both())
+
+    assert [status for status, _ in results] == [200, 200]
+    assert _titles(session_id) == ['Slide 1', 'NEW 2', 'NEW 3', 'Slide 4']
+
+
+def test_rewrite_of_the_same_slide_conflicts(session_id, slow_provider):
+    async def both():
+        return await asyncio.gather(
+            _post('/api/regenerate-slide', {'session_id': session_id, 'slide_number': 2, 'provider': 'local'}),
+            _post('/api/regenerate-slide', {'session_id': session_id, 'slide_number': 2,
+                                            'provider': 'local', 'instructions': 'shorter'}))
+
+    statuses = sorted(status for status, _ in asyncio.run(both()))
+
+    assert statuses == [200, 409]
+
+
+def test_notes_do_not_drop_a_concurrent_rewrite(session_id, slow_provider):
+    async def both():
+        return await asyncio.gather(
+            _post('/api/generate-speaker-notes', {'session_id': session_id, 'provider': 'local'}),
+            _post('/api/regenerate-slide', {'session_id': session_id, 'slide_number': 3, 'provider': 'local'}))
+
+    results = asyncio.run(both())
+
+    assert [status for status, _ in results] == [200, 200]
+    deck = backend.session_store[session_id]['slide_data']
+    assert deck[2].title == 'NEW 3' and not deck[2].notes
+    assert [slide.notes for i, slide in enumerate(deck) if i != 2] == \
+        ['Notes Slide 1', 'Notes Slide 2', 'Notes Slide 4']
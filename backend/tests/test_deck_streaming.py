@@ -0,0 +1,117 @@
+import io
+import zipfile
+
+import pytest
+from PIL import Image
+from pptx import Presentation
+from pptx.util import Inches
+
+from services import pptx_generator
+from services.pptx_analyzer import PPTXAnalyzer
+from services.pptx_generator import PPTXGenerator
+from services.slide_cache import SlidePartCache
+
+STREAMING = {'streaming': True, 'stream_batch_size': 2}
+
+
+@pytest.fixture
+def image_template(tmp_path) -> str:
+    """A template whose example slide carries a picture, so generated slides get one too"""
+    image = io.BytesIO()
+    Image.new('RGB', (64, 48), (200, 30, 30)).save(image, 'PNG')
+    image.seek(0)
+
+    prs = Presentation()
+    prs.slides.add_slide(prs.slide_layouts[6]).shapes.add_picture(image, Inches(1), Inches(1))
+    path = str(tmp_path / 'image_template.pptx')
+    prs.save(path)
+    return path
+
+
+def _slides(count: int, notes: bool = True):
+    slides = [{'slide_number': 1, 'slide_type': 'title', 'title': 'Deck', 'content': [],
+               'notes': 'Welcome' if notes else ''}]
+    for n in range(2, count + 1):
+        slides.append({'slide_number': n, 'slide_type': 'content', 'title': f"Slide {n}",
+                       'content': [f"Point {n}a", f"Point {n}b"],
+                       'notes': f"Notes for slide {n}" if notes else ''})
+    return slides
+
+
+def _generate(generator, slides, template_path, output_path, options=STREAMING, template_hash=None):
+    template_data = PPTXAnalyzer().analyze_template(template_path)
+    return generator.generate_presentation(slides, template_data, template_path, dict(options),
+                                           template_hash=template_hash, output_path=output_path)
+
+
+def _assert_round_trips(path: str, slides):
+    prs = Presentation(path)
+    assert [slide.shapes.title.text for slide in prs.slides] == [s['title'] for s in slides]
+    for slide, expected in zip(prs.slides, slides):
+        if expected['notes']:
+            assert slide.notes_slide.notes_text_frame.text == expected['notes']
+        else:
+            assert not slide.has_notes_slide
+    return prs
+
+
+def test_streamed_deck_keeps_notes(blank_pptx, tmp_path):
+    slides = _slides(5)
+    generator = PPTXGenerator()
+
+    _generate(generator, slides, blank_pptx, str(tmp_path / 'out.pptx'))
+
+    assert generator.last_build_stats['rebuilt'] == 5
+    _assert_round_trips(str(tmp_path / 'out.pptx'), slides)
+
+
+def test_streamed_deck_without_notes_has_no_notes_slides(blank_pptx, tmp_path):
+    slides = _slides(3, notes=False)
+
+    _generate(PPTXGenerator(), slides, blank_pptx, str(tmp_path / 'out.pptx'))
+
+    _assert_round_trips(str(tmp_path / 'out.pptx'), slides)
+
+
+def test_streamed_deck_shares_one_media_part(image_template, tmp_path):
+    slides = _slides(5)
+    output_path = str(tmp_path / 'out.pptx')
+
+    _generate(PPTXGenerator(), slides, image_template, output_path)
+
+    prs = _assert_round_trips(output_path, slides)
+    blobs = [shape.image.blob for slide in prs.slides for shape in slide.shapes if hasattr(shape, 'image')]
+    assert len(blobs) >= 4 and len(set(blobs)) == 1
+    with zipfile.ZipFile(output_path) as zf:
+        assert len([name for name in zf.namelist() if name.startswith('ppt/media/')]) == 1
+
+
+def test_cache_hit_rebuilds_nothing_and_round_trips(image_template, tmp_path):
+    slides = _slides(5)
+    generator = PPTXGenerator(slide_cache=SlidePartCache())
+
+    _generate(generator, slides, image_template, str(tmp_path / 'first.pptx'), template_hash='t1')
+    _generate(generator, slides, image_template, str(tmp_path / 'second.pptx'), template_hash='t1')
+
+    assert generator.last_build_stats == {'slides': 5, 'rebuilt': 0, 'reused': 5}
+    _assert_round_trips(str(tmp_path / 'second.pptx'), slides)
+
+
+def test_unstreamable_slide_falls_back_to_an_in_memory_build(blank_pptx, tmp_path, monkeypatch):
+    harvested = []
+
+    def unstreamable(path):
+        # As if a slide held a chart or another part the writer does not replay
+        harvested.append(path)
+        return [None] * len(Presentation(path).slides)
+
+    monkeypatch.setattr(pptx_generator, 'harvest_slide_parts', unstreamable)
+    slides = _slides(4)
+    generator = PPTXGenerator()
+
+    _generate(generator, slides, blank_pptx, str(tmp_path / 'out.pptx'),
+              options={**STREAMING, 'incremental': False})
+
+    assert len(harvested) == 1
+    assert generator.last_build_stats == {'slides': 4, 'rebuilt': 4, 'reused': 0}
+    _assert_round_trips(str(tmp_path / 'out.pptx'), slides)
@@ -0,0 +1,58 @@
+import asyncio
+
+from google.ai import generativelanguage as glm
+
+from services.deadline import Deadline
+from services.llm_service import LLMService
+
+
+def _response(text: str) -> glm.GenerateContentResponse:
+    return glm.GenerateContentResponse(
+        candidates=[glm.Candidate(content=glm.Content(role='model', parts=[glm.Part(text=text)]))],
+        usage_metadata={'prompt_token_count': 12, 'candidates_token_count': 3})
+
+
+def test_each_service_client_carries_its_own_key():
+    first, second = LLMService('gemini', 'key-one'), LLMService('gemini', 'key-two')
+
+    # Pins the installed SDK: client_options' api_key becomes that client's credentials
+    assert isinstance(first.client, glm.GenerativeServiceClient)
+    assert first.client.transport._credentials.token == 'key-one'
+    assert second.client.transport._credentials.token == 'key-two'
+
+
+def test_call_goes_through_the_keyed_client(monkeypatch):
+    service = LLMService('gemini', 'key-one')
+    service.deadline = Deadline(30)
+    requests = []
+
+    def generate_content(request, **kwargs):
+        requests.append((request, kwargs))
+        return _response('hello')
+
+    monkeypatch.setattr(service.client, 'generate_content', generate_content)
+
+    assert service._call_with_retries('Say hello', 1, 100) == 'hello'
+    request, kwargs = requests[0]
+    assert request.model == 'models/gemini-pro'
+    assert request.contents[0].parts[0].text == 'Say hello'
+    assert request.generation_config.max_output_tokens == 100
+    assert 0 < kwargs['timeout'] <= 30
+    assert service.usage.summary()['input_tokens'] == 12
+
+
+def test_async_call_uses_an_async_client_with_the_same_key(monkeypatch):
+    service = LLMService('gemini', 'key-one')
+
+    async def call():
+        client = service._get_async_client()
+        assert isinstance(client, glm.GenerativeServiceAsyncClient)
+        assert client.transport._credentials.token == 'key-one'
+
+        async def generate_content(request, **kwargs):
+            return _response('hi there')
+
+        monkeypatch.setattr(client, 'generate_content', generate_content)
+        return await service._call_with_retries_async('Say hi', 1, 50)
+
+    assert asyncio.run(call()) == 'hi there'
@@ -0,0 +1,32 @@
+import app as backend
+
+TEXT = ("Intro to cats. Cats are great pets.\n\n"
+        "Feeding cats requires care. Food matters.\n\n"
+        "Cats sleep a lot. They nap sixteen hours.\n\n"
+        "Conclusion: get a cat.")
+
+
+def _analyze(client, **fields):
+    response = client.post('/api/analyze-text', json={'text': TEXT, 'provider': 'local', **fields})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_resubmission_with_the_same_slide_count_is_incremental():
+    client = backend.app.test_client()
+    first = _analyze(client, slideCount=3)
+
+    second = _analyze(client, slideCount=3, session_id=first['session_id'])
+
+    assert 'incremental' in second
+
+
+def test_resubmission_with_another_slide_count_is_analyzed_afresh():
+    client = backend.app.test_client()
+    first = _analyze(client, slideCount=3)
+
+    second = _analyze(client, slideCount=5, session_id=first['session_id'])
+
+    assert 'incremental' not in second
+    assert second['session_id'] != first['session_id']
+    assert backend.session_store[second['session_id']]['slide_count'] == 5
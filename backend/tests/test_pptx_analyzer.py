@@ -0,0 +1,54 @@
+import zipfile
+
+import pytest
+from pptx import Presentation
+
+from services.pptx_analyzer import PPTXAnalyzer
+from services.pptx_generator import PPTXGenerator
+from services.template_inspector import presentation_source
+
+from conftest import TEMPLATE_MAIN
+
+
+def test_presentation_source_opens_pptx_from_its_path(blank_pptx):
+    assert presentation_source(blank_pptx) == blank_pptx
+
+
+def test_presentation_source_rewrites_template_content_type(blank_potx):
+    with zipfile.ZipFile(blank_potx) as zf:
+        assert TEMPLATE_MAIN in zf.read('[Content_Types].xml')
+    with pytest.raises(ValueError):
+        Presentation(blank_potx)
+
+    prs = Presentation(presentation_source(blank_potx))
+    assert len(prs.slide_layouts) == 11
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_small_potx_is_analyzed(blank_potx, streaming):
+    analysis = PPTXAnalyzer().analyze_template(blank_potx, streaming=streaming)
+
+    assert len(analysis['layouts']) == 11
+    assert analysis['colors']
+
+
+def test_released_potx_analysis_reopens_template(blank_potx):
+    analysis = PPTXAnalyzer().analyze_template(blank_potx)
+    analysis.release()
+
+    assert not analysis.holds_source
+    assert analysis['slide_size']
+    assert not analysis.holds_source
+
+
+def test_deck_generated_from_potx_is_a_presentation(blank_potx, tmp_path):
+    analysis = PPTXAnalyzer().analyze_template(blank_potx)
+    output_path = str(tmp_path / 'out.pptx')
+    slides = [{'slide_number': 1, 'slide_type': 'title', 'title': 'Hello', 'content': []},
+              {'slide_number': 2, 'slide_type': 'content', 'title': 'Points', 'content': ['One', 'Two']}]
+
+    PPTXGenerator().generate_presentation(slides, analysis, blank_potx, {'streaming': False},
+                                          output_path=output_path)
+
+    prs = Presentation(output_path)
+    assert [slide.shapes.title.text for slide in prs.slides] == ['Hello', 'Points']
@@ -0,0 +1,39 @@
+import pytest
+from pptx import Presentation
+from pptx.oxml.ns import qn
+from pptx.util import Inches
+
+import app as backend
+from services.pptx_generator import PPTXGenerator, parse_generation_options
+
+
+def test_margin_fix_writes_a_complete_xfrm_on_inherited_placeholders():
+    prs = Presentation()
+    layout = prs.slide_layouts[1]
+    for placeholder in layout.placeholders:
+        placeholder.left = Inches(0.2)
+    slide = prs.slides.add_slide(layout)
+
+    PPTXGenerator()._optimize_slide_layout(slide)
+
+    for placeholder, inherited in zip(slide.placeholders, layout.placeholders):
+        xfrm = placeholder._element.spPr.find(qn('a:xfrm'))
+        assert xfrm is not None and xfrm.find(qn('a:ext')) is not None
+        assert placeholder.left == Inches(0.5)
+        assert (placeholder.width, placeholder.height) == (inherited.width, inherited.height)
+
+
+def test_numeric_options_are_clamped():
+    options = parse_generation_options({'optimize': True, 'compression_level': 15, 'stream_batch_size': '0'})
+
+    assert options == {'optimize': True, 'compression_level': 9, 'stream_batch_size': 1}
+    assert parse_generation_options({'compression_level': -3})['compression_level'] == 0
+
+
+@pytest.mark.parametrize('options', [{'compression_level': 'x'}, {'compression_level': None}, ['optimize']])
+def test_bad_options_are_refused_before_generation(options):
+    response = backend.app.test_client().post('/api/generate-presentation',
+                                              json={'session_id': 'any', 'options': options})
+
+    assert response.status_code == 400
+    assert 'must be' in response.get_json()['error']
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from services.deadline import Deadline, DeadlineExceeded
+from services.llm_service import LLMService
+
+
+@pytest.fixture
+def slow_provider(monkeypatch):
+    calls = []
+
+    async def call(self, prompt, max_retries, max_tokens):
+        calls.append(self.deadline)
+        await self.deadline.run(asyncio.sleep(0.5), 'fake provider')
+        return 'done'
+
+    monkeypatch.setattr(LLMService, '_call_with_retries_async', call)
+    return calls
+
+
+def _service(seconds: float) -> LLMService:
+    service = LLMService('openai', 'sk-test')
+    # Started after construction, which may import provider SDKs
+    service.deadline = Deadline(seconds)
+    return service
+
+
+def test_follower_redoes_a_call_its_leader_abandoned(slow_provider):
+    leader, follower = _service(0.2), _service(10)
+
+    async def both():
+        leading = asyncio.ensure_future(leader._make_llm_call_async('same prompt'))
+        await asyncio.sleep(0.05)
+        following = asyncio.ensure_future(follower._make_llm_call_async('same prompt'))
+        return await asyncio.gather(leading, following, return_exceptions=True)
+
+    leader_result, follower_result = asyncio.run(both())
+
+    assert isinstance(leader_result, DeadlineExceeded) and leader_result.deadline is leader.deadline
+    assert follower_result == 'done'
+    assert slow_provider == [leader.deadline, follower.deadline]
+
+
+def test_follower_shares_a_call_that_completes(slow_provider):
+    first, second = _service(10), _service(10)
+
+    async def both():
+        leading = asyncio.ensure_future(first._make_llm_call_async('shared prompt'))
+        await asyncio.sleep(0.05)
+        return await asyncio.gather(leading, second._make_llm_call_async('shared prompt'))
+
+    assert asyncio.run(both()) == ['done', 'done']
+    assert slow_provider == [first.deadline]
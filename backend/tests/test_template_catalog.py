@@ -0,0 +1,33 @@
+import io
+import shutil
+
+from pptx import Presentation
+
+from services.template_catalog import TemplateCatalog
+
+from conftest import save_as_template
+
+
+def _deck_with_slides(path: str, count: int) -> str:
+    prs = Presentation()
+    for i in range(count):
+        prs.slides.add_slide(prs.slide_layouts[1]).shapes.title.text = f"Example {i}"
+    prs.save(path)
+    return path
+
+
+def test_catalog_compiles_pptx_and_potx(tmp_path):
+    catalog_dir = tmp_path / 'catalog'
+    catalog_dir.mkdir()
+    example = _deck_with_slides(str(tmp_path / 'example.pptx'), 2)
+    shutil.copy(example, catalog_dir / 'plain.pptx')
+    save_as_template(example, str(catalog_dir / 'corporate.potx'))
+
+    catalog = TemplateCatalog(str(catalog_dir))
+
+    assert catalog.load() == 2
+    for template_id in ('plain', 'corporate'):
+        entry = catalog.get(template_id)
+        base = Presentation(io.BytesIO(entry.base_deck))
+        assert len(base.slides) == 0
+        assert entry.summary()['layouts_found'] == 11
@@ -0,0 +1,34 @@
+import app as backend
+
+KEY = 'f' * 64
+CACHED_KEY = 'e' * 64
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def test_revalidation_succeeds_after_the_thumbnail_was_evicted():
+    client = backend.app.test_client()
+
+    response = client.get(f'/api/thumbnails/{KEY}', headers={'If-None-Match': f'"{KEY}"'})
+
+    assert response.status_code == 304
+    assert response.headers['ETag'] == f'"{KEY}"'
+    assert response.headers['Cache-Control'] == IMMUTABLE
+
+
+def test_unknown_thumbnail_without_validator_is_not_found():
+    response = backend.app.test_client().get(f'/api/thumbnails/{KEY}')
+
+    assert response.status_code == 404
+
+
+def test_cached_thumbnail_is_served_then_revalidated():
+    backend.thumbnail_renderer.cache.put(CACHED_KEY, b'\x89PNG thumbnail', 'image/png')
+    client = backend.app.test_client()
+
+    response = client.get(f'/api/thumbnails/{CACHED_KEY}')
+    assert response.status_code == 200
+    assert response.data == b'\x89PNG thumbnail'
+    assert response.headers['Cache-Control'] == IMMUTABLE
+
+    assert client.get(f'/api/thumbnails/{CACHED_KEY}',
+                      headers={'If-None-Match': response.headers['ETag']}).status_code == 304
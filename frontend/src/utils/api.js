@@ -2,22 +2,33 @@ import axios from 'axios';
 
 const API_BASE_URL = process.env.REACT_APP_API_URL || '';
 
+const REQUEST_TIMEOUT_MS = 60000; // 60 seconds timeout for generation
+
 // Create axios instance with default config
 const api = axios.create({
   baseURL: API_BASE_URL,
-  timeout: 60000, // 60 seconds timeout for generation
+  timeout: REQUEST_TIMEOUT_MS,
   headers: {
     'Content-Type': 'application/json',
   },
 });
 
+// Lets the server stop working on requests we have already given up on; taken
+// from each request's own timeout, so longer calls get a longer server budget
+api.interceptors.request.use((config) => {
+  if (config.timeout) {
+    config.headers['X-Request-Timeout'] = String(config.timeout / 1000);
+  }
+  return config;
+});
+
 // Response interceptor for error handling
 api.interceptors.response.use(
   (response) => response,
   (error) => {
     console.error('API Error:', error);
     
-    if (error.code === 'ECONNABORTED') {
+    if (error.code === 'ECONNABORTED' || error.response?.status === 504) {
       throw new Error('Request timed out. Please try again with shorter content.');
     }
     